@@ -0,0 +1,149 @@
+import importlib.util
+import sys
+import types
+from pathlib import Path
+import pytest
+
+TIK_MODULES = {
+    "tik_manager4.management.management_core": {"ManagementCore": object},
+    "tik_manager4.core.constants": {"DataTypes": None},
+    "tik_manager4.external.tracktor.tracktor_api": {"TracktorAPI": None},
+    "tik_manager4.management.tracktor.ui.login": {"Login": None},
+}
+
+
+class FakeTask:
+    def __init__(self, name, uid=None):
+        self.name = name
+        self.id = uid
+        self.properties = {}
+
+    def edit_property(self, key, value):
+        self.properties[key] = value
+
+    def get_property(self, key):
+        return self.properties.get(key)
+
+    def apply_settings(self, force=False):
+        pass
+
+
+class FakeSub:
+    def __init__(self):
+        self.tasks = {}
+
+    def add_task(self, name, categories=None, uid=None):
+        self.tasks[name] = FakeTask(name, uid)
+        return self.tasks[name]
+
+    def delete_task(self, name):
+        del self.tasks[name]
+
+    def rename_task(self, old_name, new_name):
+        task = self.tasks.pop(old_name)
+        task.name = new_name
+        self.tasks[new_name] = task
+
+
+@pytest.fixture
+def platform(monkeypatch):
+    # TIK Manager isn't installed here, so the plugin's imports from it are replaced by stand-ins
+    for name, attributes in TIK_MODULES.items():
+        parts = name.split(".")
+        for i in range(1, len(parts) + 1):
+            monkeypatch.setitem(sys.modules, ".".join(parts[:i]),
+                                sys.modules.get(".".join(parts[:i]), types.ModuleType(".".join(parts[:i]))))
+        for key, value in attributes.items():
+            monkeypatch.setattr(sys.modules[name], key, value, raising=False)
+
+    path = Path(__file__).parent.parent / "tik_tracktor" / "tracktor" / "main.py"
+    spec = importlib.util.spec_from_file_location("tracktor_plugin_main", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    platform = module.ProductionPlatform.__new__(module.ProductionPlatform)
+    platform.subs = {"assets": FakeSub(), "shots": FakeSub()}
+    platform._get_assets_sub = lambda: platform.subs["assets"]
+    platform._get_shots_sub = lambda: platform.subs["shots"]
+    return platform
+
+
+def asset(uid, name, status="WIP"):
+    return {"id": uid, "asset_name": name, "asset_type": "prop", "asset_status": status}
+
+
+def test_sync_updates_renames_and_deletes(platform):
+    platform._sync_tasks([asset(1, "chair"), asset(2, "table")], [{"id": 1, "shot_name": "SHT_0010", "status": "WIP"}])
+
+    result = platform._sync_tasks([asset(1, "armchair", status="Done")], [])
+
+    tasks = platform.subs["assets"].tasks
+    assert set(tasks) == {"armchair"}
+    assert tasks["armchair"].get_property("tracktor_asset_status") == "Done"
+    assert platform.subs["shots"].tasks == {}
+    assert (result["renamed"], result["updated"], result["deleted"]) == (1, 1, 2)
+
+
+def test_sync_keeps_hand_made_tasks(platform):
+    platform.subs["assets"].add_task("reference_board")
+
+    result = platform._sync_tasks([asset(1, "chair")], [])
+
+    assert set(platform.subs["assets"].tasks) == {"reference_board", "chair"}
+    assert result["deleted"] == 0
+
+
+def test_sync_matches_hand_made_tasks_by_name(platform):
+    platform.subs["assets"].add_task("chair")
+
+    result = platform._sync_tasks([asset(1, "chair")], [])
+
+    assert result["created"] == 0
+    assert platform.subs["assets"].tasks["chair"].get_property("tracktor_asset_type") == "prop"
+
+
+class FakeTik:
+    def __init__(self, current):
+        self.active = current
+        self.project = types.SimpleNamespace(absolute_path=current, settings={})
+
+    def set_project(self, path):
+        if path == "/broken":
+            raise RuntimeError("not a project")
+        self.active = path
+
+
+def test_sync_projects_restores_the_active_project(platform):
+    platform.tik_main = FakeTik("/current")
+    platform.date_stamp = lambda: "2025-01-01"
+
+    with pytest.raises(RuntimeError):
+        platform.sync_projects(["/other", "/broken"])
+
+    assert platform.tik_main.active == "/current"
+
+
+class OfflineAPI:
+    def __init__(self, assets):
+        self.assets = assets
+        self.offline_hits = 0
+
+    def get_project_contents(self, project_id):
+        # the server is down, so the contents come from the cache
+        self.offline_hits += 1
+        return self.assets, []
+
+
+def test_sync_from_offline_cache_only_adds_tasks(platform):
+    platform._sync_tasks([asset(1, "chair"), asset(2, "table")], [])
+    platform.subs["assets"].tasks["chair"].edit_property("tracktor_asset_status", "Done")
+    platform.api = OfflineAPI([asset(1, "armchair"), asset(3, "lamp")])
+    platform.date_stamp = lambda: "2025-01-01"
+    platform._get_linked_project_id = lambda: 1
+
+    ok, message = platform.sync_project()
+
+    tasks = platform.subs["assets"].tasks
+    assert ok and "cached" in message
+    assert set(tasks) == {"chair", "table", "lamp"}
+    assert tasks["chair"].get_property("tracktor_asset_status") == "Done"
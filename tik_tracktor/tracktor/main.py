@@ -7,6 +7,7 @@ from tik_manager4.core.constants import DataTypes
 from tik_manager4.external.tracktor.tracktor_api import TracktorAPI
 from tik_manager4.management.tracktor.ui.login import Login
 from pathlib import Path
+import time
 
 # add external folder with extra dependencies if needed
 print("tracktor/main.py loaded")
@@ -39,6 +40,17 @@ class ProductionPlatform(ManagementCore):
     lock_subproject_creation = True
     lock_task_creation = True
 
+    asset_categories = ["MOD", "SRF", "RIG", "CFX", "LIT"]
+    shot_categories = ["LAY", "ANI", "CFX", "LIT"]
+    # task property -> the Tracktor field it mirrors, kept up to date by sync_project
+    asset_fields = {
+        "tracktor_asset_type": "asset_type",
+        "tracktor_asset_status": "asset_status",
+    }
+    shot_fields = {
+        "tracktor_shot_status": "status",
+    }
+
     def __init__(self, tik_main_obj):
         """
         Initializes the ProductionPlatform instance.
@@ -168,7 +180,9 @@ class ProductionPlatform(ManagementCore):
         print(f"current_project_path: {current_project_path}")
 
         print(f"Fetching project from Tracktor: {tracktor_project_id}")
-        project = self.api.get_project(tracktor_project_id)
+        # one request gives a consistent view of the project, its shots and assets
+        snapshot = self.api.get_project_snapshot(tracktor_project_id)
+        project = snapshot["project"]
         print(f"Project fetched: {project}")
 
         project_name = project["name"]
@@ -193,27 +207,7 @@ class ProductionPlatform(ManagementCore):
 
         print("Project creation succeeded")
 
-        # Fetch all assets and shots from Tracktor
-        all_assets = self.api.get_assets(tracktor_project_id)
-        all_shots = self.api.get_shots(tracktor_project_id)
-
-        print("Fetched assets and shots")
-
-        # Get or create the 'Assets' and 'Shots' subprojects
-        assets_sub = self._get_assets_sub()
-        shots_sub = self._get_shots_sub()
-
-        print("Created assets and shots subproject")
-
-        # Sync assets (no categories)
-        for asset in all_assets:
-            self._sync_new_asset(asset, assets_sub, [])
-
-        # Sync shots (no categories)
-        for shot in all_shots:
-            self._sync_new_shot(shot, shots_sub, [])
-
-        print("Synced shots and assets")
+        self._sync_tasks(snapshot["assets"], snapshot["shots"])
 
         # Tag the project as management driven
         self.tik_main.project.settings.edit_property("management_driven", True)
@@ -228,7 +222,147 @@ class ProductionPlatform(ManagementCore):
 
         return project_path
 
-    def _sync_new_asset(self, asset_data, assets_sub, asset_categories):
+    def _sync_tasks(self, tracktor_assets, tracktor_shots, additive=False):
+        """
+        Brings the tasks of the active Tik Manager project in line with the Tracktor assets and shots.
+
+        Runs in phases: diff every item against the existing tasks first, apply deletions,
+        renames and field changes, create the new tasks in one pass, then write the pending
+        task settings in one pass per subproject. Only what changed is touched. The time spent in
+        each phase is printed.
+
+        Args:
+            tracktor_assets (list): Asset data from Tracktor.
+            tracktor_shots (list): Shot data from Tracktor.
+            additive (bool, optional): Only create the missing tasks, leaving existing ones as they are.
+                Used when the data may be stale, e.g. served from the offline cache.
+
+        Returns:
+            dict: The number of tasks 'created', 'updated', 'renamed' and 'deleted', and the
+                seconds spent per phase under 'timings'.
+        """
+        timings = {}
+
+        start = time.perf_counter()
+        subs = {"assets": self._get_assets_sub(), "shots": self._get_shots_sub()}
+        diffs = {"assets": self._diff_tasks(tracktor_assets, "asset_name", self.asset_fields, subs["assets"], additive),
+                 "shots": self._diff_tasks(tracktor_shots, "shot_name", self.shot_fields, subs["shots"], additive)}
+        timings["plan"] = time.perf_counter() - start
+
+        # deletions and renames go first, so their names are free for the new tasks
+        start = time.perf_counter()
+        pending = {"assets": [], "shots": []}
+        for kind, diff in diffs.items():
+            sub = subs[kind]
+            for task in diff["deleted"]:
+                sub.delete_task(task.name)
+            for task, new_name in diff["renamed"]:
+                sub.rename_task(task.name, new_name)
+            for task, changes in diff["changed"]:
+                for key, value in changes.items():
+                    task.edit_property(key, value)
+                pending[kind].append(task)
+        timings["update"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for asset in diffs["assets"]["new"]:
+            pending["assets"].append(self._sync_new_asset(asset, subs["assets"], self.asset_categories, apply=False))
+        for shot in diffs["shots"]["new"]:
+            pending["shots"].append(self._sync_new_shot(shot, subs["shots"], self.shot_categories, apply=False))
+        timings["create"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for kind in ("assets", "shots"):
+            self._flush_tasks(pending[kind])
+        timings["flush"] = time.perf_counter() - start
+
+        counts = {key: sum(len(diff[key]) for diff in diffs.values())
+                  for key in ("new", "changed", "renamed", "deleted")}
+        print("Tracktor sync: {} new, {} changed, {} renamed, {} deleted; planned in {:.2f}s, updated in {:.2f}s, "
+              "created in {:.2f}s, flushed settings in {:.2f}s".format(
+                  counts["new"], counts["changed"], counts["renamed"], counts["deleted"],
+                  timings["plan"], timings["update"], timings["create"], timings["flush"]))
+        return {"created": counts["new"], "updated": counts["changed"], "renamed": counts["renamed"],
+                "deleted": counts["deleted"], "timings": timings}
+
+    @staticmethod
+    def _diff_tasks(items, name_key, fields, sub, additive=False):
+        """
+        Compares Tracktor items with the tasks of a subproject, matching them by the Tracktor ID
+        passed to add_task as the task's uid. Tasks without a uid (e.g. made by hand before the
+        project was linked) are matched by name instead, and are never deleted: only tasks with a
+        uid that no Tracktor item has any more count as deleted.
+
+        Args:
+            items (list): Asset or shot data from Tracktor.
+            name_key (str): The key holding the item's name, used as the task name.
+            fields (dict): Maps task property names to the Tracktor keys they mirror.
+            sub: The Tik Manager subproject.
+            additive (bool, optional): Only look for new items. Nothing is changed, renamed or deleted,
+                so the names of the existing tasks all stay taken.
+
+        Returns:
+            dict: 'new' items to create tasks for, 'changed' (task, {property: value}) pairs,
+                'renamed' (task, new name) pairs and 'deleted' tasks.
+        """
+        tasks = list(sub.tasks.values())
+        tasks_by_id = {task.id: task for task in tasks if task.id is not None}
+        tasks_by_name = {task.name: task for task in tasks}
+
+        # 1. pair every item with its task, by ID first and by name for tasks without one
+        pairs = []
+        matched = set()
+        for item in items:
+            task = tasks_by_id.get(item["id"])
+            if task is None:
+                task = tasks_by_name.get(item[name_key])
+                if task is not None and task.id is not None:
+                    task = None
+            if task is not None and id(task) in matched:
+                task = None
+            if task is not None:
+                matched.add(id(task))
+            pairs.append((item, task))
+
+        diff = {"new": [], "changed": [], "renamed": [], "deleted": []}
+        # hand-made tasks without a uid are left alone, only synced tasks can be deleted
+        if not additive:
+            diff["deleted"] = [task for task in tasks if id(task) not in matched and task.id is not None]
+
+        # 2. names of the deleted tasks are free again, names of the kept ones are not
+        deleted = {id(task) for task in diff["deleted"]}
+        taken_names = {task.name for task in tasks if id(task) not in deleted}
+        for item, task in pairs:
+            name = item[name_key]
+            if task is None:
+                if name not in taken_names:
+                    taken_names.add(name)
+                    diff["new"].append(item)
+                continue
+            if additive:
+                continue
+            if task.name != name and name not in taken_names:
+                taken_names.discard(task.name)
+                taken_names.add(name)
+                diff["renamed"].append((task, name))
+            changes = {key: item[source] for key, source in fields.items()
+                       if source in item and task.get_property(key) != item[source]}
+            if changes:
+                diff["changed"].append((task, changes))
+        return diff
+
+    @staticmethod
+    def _flush_tasks(tasks):
+        """
+        Writes the settings edited on new or changed tasks.
+
+        Args:
+            tasks (list): The Tik Manager tasks with pending settings.
+        """
+        for task in tasks:
+            task.apply_settings(force=True)
+
+    def _sync_new_asset(self, asset_data, assets_sub, asset_categories, apply=True):
         """
         Syncs a new asset from Tracktor.
 
@@ -236,6 +370,8 @@ class ProductionPlatform(ManagementCore):
             asset_data (dict): Asset data from Tracktor.
             assets_sub: The Tik Manager assets subproject.
             asset_categories (list): List of asset categories.
+            apply (bool): Whether to write the task settings right away. Batched syncs pass False
+                and write them with _flush_tasks. Defaults to True.
 
         Returns:
             Task: The created Tik Manager task for the asset.
@@ -244,15 +380,15 @@ class ProductionPlatform(ManagementCore):
         asset_name = asset_data["asset_name"]
 
         sub = assets_sub
-        sub.add_task(asset_name, categories=["MOD", "SRF", "RIG", "CFX", "LIT"], uid=asset_id)
-        task = sub.tasks[asset_name]
+        task = sub.add_task(asset_name, categories=asset_categories, uid=asset_id)
     
-        task.edit_property("tracktor_asset_type", asset_data["asset_type"])
-        task.edit_property("tracktor_asset_status", asset_data["asset_status"])
-        task.apply_settings(force=True)
+        for key, source in self.asset_fields.items():
+            task.edit_property(key, asset_data[source])
+        if apply:
+            task.apply_settings(force=True)
         return task
     
-    def _sync_new_shot(self, shot_data, shots_sub, shot_categories):
+    def _sync_new_shot(self, shot_data, shots_sub, shot_categories, apply=True):
         """
         Syncs a new shot from Tracktor.
 
@@ -260,6 +396,8 @@ class ProductionPlatform(ManagementCore):
             shot_data (dict): Shot data from Tracktor.
             shots_sub: The Tik Manager shots subproject.
             shot_categories (list): List of shot categories.
+            apply (bool): Whether to write the task settings right away. Batched syncs pass False
+                and write them with _flush_tasks. Defaults to True.
 
         Returns:
             Task: The created Tik Manager task for the shot.
@@ -269,11 +407,11 @@ class ProductionPlatform(ManagementCore):
         shot_name = shot_data["shot_name"]
         sub = shots_sub
         
-        task = sub.add_task(shot_name, categories=["LAY", "ANI", "CFX", "LIT"], uid=shot_id)
-        print("DEBUG: sub.tasks keys after add_task:", list(sub.tasks.keys()))
-        # task = sub.tasks[shot_name]
-        # Optionally, add more Tracktor fields as metadata:
-
+        task = sub.add_task(shot_name, categories=shot_categories, uid=shot_id)
+        for key, source in self.shot_fields.items():
+            task.edit_property(key, shot_data.get(source))
+        if apply:
+            task.apply_settings(force=True)
         return task
     
     def _get_assets_sub(self):
@@ -313,6 +451,20 @@ class ProductionPlatform(ManagementCore):
         """
         return self.sync_project()
     
+    def _get_linked_project_id(self):
+        """
+        Gets the Tracktor project the active Tik Manager project is linked to.
+
+        Returns:
+            int or None: The Tracktor project ID, or None if the project isn't linked to Tracktor.
+        """
+        project_id = self.tik_main.project.settings.get("host_project_id")
+        if not project_id:
+            return None
+        if self.tik_main.project.settings.get("management_platform") != "tracktor":
+            return None
+        return project_id
+
     def sync_project(self):
         """
         Synchronizes the Tik Manager project with Tracktor.
@@ -323,42 +475,84 @@ class ProductionPlatform(ManagementCore):
         
         sync_stamp = self.date_stamp()
 
-        project_id = self.tik_main.project.settings.get("host_project_id")
-
+        project_id = self._get_linked_project_id()
         if not project_id:
             return False, "Project is not linked to a Tracktor project."
 
-        management_platform = self.tik_main.project.settings.get("management_platform")
-        if management_platform != "tracktor":
-            return False, "Project is not linked to a Tracktor project."
+        # 1. Fetch current assets/shots from Tracktor, both at the same time
+        offline_hits = self.api.offline_hits
+        tracktor_assets, tracktor_shots = self.api.get_project_contents(project_id)
+        offline = self.api.offline_hits != offline_hits
+        return self._apply_sync(tracktor_assets, tracktor_shots, sync_stamp, offline)
+
+    def sync_projects(self, project_paths, max_concurrency=None):
+        """
+        Synchronizes several linked Tik Manager projects with Tracktor.
+
+        The assets and shots of all projects are fetched in parallel (at most max_concurrency
+        requests at a time), then applied to each project in turn, since Tik Manager works on
+        one active project at a time. The originally active project is restored afterwards.
+        If any of the responses came from the offline cache, every project is synced as in
+        _apply_sync with offline set, since the requests run concurrently and can't be told apart.
 
-        # 1. Fetch current assets/shots from Tracktor
-        tracktor_assets = self.api.get_assets(project_id)
-        tracktor_shots = self.api.get_shots(project_id)
-        tracktor_asset_names = {asset["asset_name"] for asset in tracktor_assets}
-        tracktor_shot_names = {shot["shot_name"] for shot in tracktor_shots}
-
-        # 2. Fetch current assets/shots from Tik
-        assets_sub = self._get_assets_sub()
-        shots_sub = self._get_shots_sub()
-        tik_assets = assets_sub.tasks
-        tik_shots = shots_sub.tasks
-        tik_asset_names = set(tik_assets.keys())
-        tik_shot_names = set(tik_shots.keys())
-
-        asset_categories = ["MOD", "SRF", "RIG", "CFX", "LIT"]
-        shot_categories = ["LAY", "ANI", "CFX", "LIT"]
-        # 3. Add new assets/shots from Tracktor
-        for asset in tracktor_assets:
-            if asset["asset_name"] not in tik_asset_names:
-                self._sync_new_asset(asset, assets_sub, asset_categories)
-        for shot in tracktor_shots:
-            print(["shot_name"])
-            if shot["shot_name"] not in tik_shot_names:
-                self._sync_new_shot(shot, shots_sub, shot_categories)
-
-        # 5. (Optional) Update changed assets/shots
-        # You can compare fields and update Tik if needed
+        Args:
+            project_paths (list): Paths of the Tik Manager projects to sync.
+            max_concurrency (int, optional): The most requests in flight at once.
+                Defaults to the API's max_concurrency.
+
+        Returns:
+            dict: Maps each project path to a (bool, str) tuple indicating success and a message.
+        """
+        sync_stamp = self.date_stamp()
+        current_project_path = self.tik_main.project.absolute_path
+
+        results = {}
+        linked = {}
+        # everything that switches projects is inside the try, so the active project is always restored
+        try:
+            for project_path in project_paths:
+                self.tik_main.set_project(project_path)
+                project_id = self._get_linked_project_id()
+                if project_id:
+                    linked[project_path] = project_id
+                else:
+                    results[project_path] = (False, "Project is not linked to a Tracktor project.")
+
+            offline_hits = self.api.offline_hits
+            contents = self.api.get_projects_contents(set(linked.values()), max_concurrency)
+            offline = self.api.offline_hits != offline_hits
+            for project_path, project_id in linked.items():
+                tracktor_assets, tracktor_shots = contents[project_id]
+                self.tik_main.set_project(project_path)
+                results[project_path] = self._apply_sync(tracktor_assets, tracktor_shots, sync_stamp, offline)
+        finally:
+            self.tik_main.set_project(current_project_path)
+
+        return results
+
+    def _apply_sync(self, tracktor_assets, tracktor_shots, sync_stamp, offline=False):
+        """
+        Brings the tasks of the active Tik Manager project in line with the Tracktor assets and shots:
+        creates the missing tasks, updates changed fields, renames tasks and deletes the tasks whose
+        item is gone, then stores the sync time stamp.
+
+        Data from the offline cache can be up to offline_max_age old, and the project may have been
+        synced since by someone else. In that case only the missing tasks are created; nothing is
+        updated, renamed or deleted and the last sync stamp is left as it was.
+
+        Args:
+            tracktor_assets (list): Asset data from Tracktor.
+            tracktor_shots (list): Shot data from Tracktor.
+            sync_stamp (str): The time stamp stored as the project's last sync.
+            offline (bool, optional): Whether any of the data was served from the offline cache.
+
+        Returns:
+            tuple: (bool, str) indicating success and a message.
+        """
+        # 2. Diff against the current Tik tasks, then create, update, rename and delete only what changed
+        self._sync_tasks(tracktor_assets, tracktor_shots, additive=offline)
+        if offline:
+            return True, "Tracktor is unreachable, only added the missing tasks from cached data."
 
         self.tik_main.project.settings.edit_property("last_sync", sync_stamp)
         self.tik_main.project.settings.apply_settings(force=True)
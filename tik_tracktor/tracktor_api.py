@@ -1,19 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 30)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_POOL_SIZE = 10
+# requests in flight at once when fetching concurrently
+DEFAULT_MAX_CONCURRENCY = 4
+# seconds a cached response may be served while the server can't be reached
+DEFAULT_OFFLINE_MAX_AGE = 24 * 60 * 60
+# cached responses unused for this many seconds are dropped when the cache is opened
+DEFAULT_CACHE_EXPIRY = 30 * 24 * 60 * 60
+
+
+def get_default_cache_path():
+    """
+    Gets the path of the response cache, TRACKTOR_CACHE_DIR/responses.db or ~/.tracktor/responses.db.
+
+    Returns:
+        Path: The cache database path.
+    """
+    cache_dir = os.environ.get("TRACKTOR_CACHE_DIR") or Path.home() / ".tracktor"
+    return Path(cache_dir) / "responses.db"
+
+
+class ResponseCache:
+    """
+    Persistent on-disk cache of GET responses, keyed by the full request URL (so by server and
+    project), stored in a small SQLite database.
+
+    Responses are kept with the ETag the server sent. The next request for the same URL sends
+    If-None-Match, so an unchanged project costs one empty 304 instead of the full body, and the
+    cached body is served right away if the server can't be reached.
+
+    Attributes:
+        path (Path): The cache database path.
+        connection (sqlite3.Connection): The cache database connection.
+    """
+
+    def __init__(self, path=None, expiry=DEFAULT_CACHE_EXPIRY):
+        """
+        Opens the cache, creating it if it doesn't exist, and drops entries unused for longer than expiry.
+
+        Args:
+            path (str or Path, optional): The cache database path. Defaults to get_default_cache_path().
+            expiry (float, optional): Seconds an unused entry is kept.
+        """
+        self.path = Path(path) if path else get_default_cache_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self.connection:
+            self.connection.execute("""
+                                    CREATE TABLE IF NOT EXISTS responses(
+                                    url TEXT PRIMARY KEY,
+                                    etag TEXT,
+                                    body TEXT NOT NULL,
+                                    stored_at REAL NOT NULL
+                                    )
+                                    """)
+            self.connection.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - expiry,))
+
+    def get(self, url):
+        """
+        Gets the cached response of a URL.
+
+        Args:
+            url (str): The full request URL.
+
+        Returns:
+            tuple or None: (etag or None, decoded JSON body, stored_at), or None if nothing is cached.
+        """
+        with self._lock:
+            row = self.connection.execute("SELECT etag, body, stored_at FROM responses WHERE url = ?",
+                                          (url,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def set(self, url, etag, body):
+        """
+        Stores the response of a URL, replacing any older one.
+
+        Args:
+            url (str): The full request URL.
+            etag (str or None): The ETag the server sent with the response.
+            body: The decoded JSON body.
+        """
+        with self._lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO responses(url, etag, body, stored_at) VALUES(?, ?, ?, ?)",
+                                    (url, etag, json.dumps(body), time.time()))
+
+    def touch(self, url):
+        """
+        Marks a cached response as confirmed current by the server.
+
+        Args:
+            url (str): The full request URL.
+        """
+        with self._lock, self.connection:
+            self.connection.execute("UPDATE responses SET stored_at = ? WHERE url = ?", (time.time(), url))
+
+    def clear(self, prefix=""):
+        """
+        Drops cached responses.
+
+        Args:
+            prefix (str, optional): Only drop URLs starting with this, e.g. a server's base URL.
+        """
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM responses WHERE substr(url, 1, ?) = ?", (len(prefix), prefix))
+
+    def close(self):
+        """
+        Closes the cache database.
+        """
+        with self._lock:
+            self.connection.close()
+
 
 class TracktorAPI:
     """
     Tracktor API wrapper for Tracktor integration into TIK Manager.
     Sends requests for Tracktor backend directly. 
 
+    All requests go through one requests.Session, so connections to the backend are kept alive
+    and reused between calls. Idempotent requests are retried with exponential backoff when the
+    connection fails or the server answers 429/502/503/504 (honouring Retry-After).
+    Independent reads (e.g. the shots and assets of several projects) can be sent in parallel
+    with run_concurrently, at most max_concurrency at a time.
+
+    GET responses are kept in a ResponseCache on disk. Later sessions revalidate them with the
+    server's ETag, and serve them as they are while the server is unreachable.
+
     Attributes:
         base_url (str): The base URL of the Tracktor backend.
         username (str): Username for authentication.
         password (str): Password for authentication.
+        token (str or None): Session token from login, sent as a Bearer token.
+        timeout (float or tuple): The (connect, read) timeout of every request.
+        max_concurrency (int): The most requests run_concurrently sends at once.
+        session (requests.Session): The pooled HTTP session.
+        cache (ResponseCache or None): The response cache, None when caching is off.
+        offline_max_age (float): Seconds a cached response may be served while the server is unreachable.
+        offline (bool): Whether the last GET was answered from the cache because the server was unreachable.
+        offline_hits (int): How many GETs have been answered from the cache because the server was unreachable.
+            Unlike offline it isn't overwritten by concurrent requests, so a caller can compare it before
+            and after a batch of requests to tell whether any of them got cached data.
 
     """
 
 
-    def __init__(self, base_url, username=None, password=None):
+    def __init__(self, base_url, username=None, password=None, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF, pool_size=DEFAULT_POOL_SIZE,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, cache=True, offline_max_age=DEFAULT_OFFLINE_MAX_AGE):
         """
         Initializes the TracktorAPI instance.
 
@@ -21,10 +170,86 @@ class TracktorAPI:
             base_url (str): The base URL of the Tracktor backend.
             username (str, optional): Username for authentication.
             password (str, optional): Password for authentication.
+            timeout (float or tuple, optional): Seconds to wait for the connection and for the response.
+            retries (int, optional): How many times an idempotent request is retried.
+            backoff_factor (float, optional): Base of the exponential wait between retries, in seconds.
+            pool_size (int, optional): Connections kept open to the backend.
+            max_concurrency (int, optional): The most requests sent at once by run_concurrently.
+            cache (bool or ResponseCache, optional): A response cache to use, True for the default
+                one, or False to turn caching off. Defaults to True.
+            offline_max_age (float, optional): Seconds a cached response may be served while the server
+                is unreachable.
         """
         self.base_url = base_url.rstrip("/")
         self.username = username
         self.password = password
+        self.token = None
+        self.timeout = timeout
+        self.max_concurrency = max(1, int(max_concurrency))
+        # every concurrent request should find a kept-alive connection
+        pool_size = max(pool_size, self.max_concurrency)
+
+        retry = Retry(total=retries,
+                      backoff_factor=backoff_factor,
+                      status_forcelist=(429, 502, 503, 504),
+                      allowed_methods=frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}),
+                      respect_retry_after_header=True,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept": "application/json",
+                                     "Accept-Encoding": "gzip, deflate"})
+
+        if cache is True:
+            try:
+                cache = ResponseCache()
+            except (OSError, sqlite3.Error):
+                # a read-only home directory shouldn't stop the plugin from working
+                cache = None
+        self.cache = cache or None
+        self.offline_max_age = offline_max_age
+        self.offline = False
+        self.offline_hits = 0
+        self._offline_lock = threading.Lock()
+
+    def close(self):
+        """
+        Closes the pooled connections and the response cache.
+        """
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def run_concurrently(self, calls, max_concurrency=None):
+        """
+        Runs independent API calls in parallel on a bounded thread pool, so the total wait is
+        about that of the slowest call instead of the sum of all of them.
+
+        Args:
+            calls (dict): Maps a key to a callable taking no arguments, e.g.
+                {"shots": lambda: api.get_shots(1)}.
+            max_concurrency (int, optional): The most calls in flight at once. Defaults to self.max_concurrency.
+
+        Returns:
+            dict: Maps each key to its call's return value.
+
+        Raises:
+            Exception: The first error raised by a call, once all calls have finished.
+        """
+        if not calls:
+            return {}
+        workers = min(len(calls), max_concurrency or self.max_concurrency)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tracktor-api") as executor:
+            futures = {key: executor.submit(call) for key, call in calls.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def api_request(self, method, endpoint, **kwargs):
         """
@@ -33,7 +258,7 @@ class TracktorAPI:
         Args:
             method (str): HTTP method (e.g., 'GET', 'POST', 'PUT').
             endpoint (str): API endpoint (e.g., '/projects').
-            **kwargs: Additional arguments.
+            **kwargs: Additional arguments for requests, e.g. json or params. timeout defaults to self.timeout.
 
         Returns:
             dict or None: The JSON response from the backend, or None if no content.
@@ -45,16 +270,87 @@ class TracktorAPI:
         url = f"{self.base_url}{endpoint}"
         headers = kwargs.pop("headers", {})
 
-        if self.username and self.password:
-            headers["X-Username"] = self.username
-            headers["X-Password"] = self.password
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
 
-        response = requests.request(method, url, headers=headers, **kwargs)
+        kwargs.setdefault("timeout", self.timeout)
+        if method.upper() == "GET" and self.cache is not None:
+            return self._cached_get(url, headers, **kwargs)
+
+        response = self.session.request(method, url, headers=headers, **kwargs)
         response.raise_for_status()
         if response.content:
             return response.json()
         return None
 
+    def _served_offline(self, body):
+        """
+        Records that a GET was answered from the cache because the server was unreachable.
+
+        Args:
+            body (dict or list or None): The cached response.
+
+        Returns:
+            dict or list or None: The cached response.
+        """
+        with self._offline_lock:
+            self.offline = True
+            self.offline_hits += 1
+        return body
+
+    def _cached_get(self, url, headers, **kwargs):
+        """
+        Sends a GET through the response cache. A cached ETag is sent as If-None-Match and a 304
+        is answered from the cache. If the server can't be reached or its gateway reports it down,
+        a cached response younger than offline_max_age is returned instead.
+
+        Args:
+            url (str): The full request URL.
+            headers (dict): The request headers.
+            **kwargs: Additional arguments for requests.
+
+        Returns:
+            dict or list or None: The JSON response, or None if no content.
+
+        Raises:
+            requests.HTTPError: If the HTTP request fails.
+            requests.ConnectionError: If the server can't be reached and nothing usable is cached.
+        """
+        if kwargs.get("params"):
+            url = requests.Request("GET", url, params=kwargs.pop("params")).prepare().url
+        cached = self.cache.get(url)
+        if cached is not None and cached[0]:
+            headers["If-None-Match"] = cached[0]
+
+        usable = cached is not None and time.time() - cached[2] <= self.offline_max_age
+        try:
+            response = self.session.request("GET", url, headers=headers, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if not usable:
+                raise
+            return self._served_offline(cached[1])
+        # a gateway error that outlasted the retries means the backend is down too
+        if response.status_code in (502, 503, 504) and usable:
+            return self._served_offline(cached[1])
+        self.offline = False
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(url)
+            return cached[1]
+        response.raise_for_status()
+        if not response.content:
+            return None
+        body = response.json()
+        self.cache.set(url, response.headers.get("ETag"), body)
+        return body
+
+    def clear_cache(self):
+        """
+        Drops the cached responses of this server.
+        """
+        if self.cache is not None:
+            self.cache.clear(self.base_url)
+
     def login(self):
         """
         Checks that the usename and password are present before passing them to authentication
@@ -76,17 +372,25 @@ class TracktorAPI:
 
         response = self.api_request("POST", "/login", json=credentials)
         if response and response.get("success"):
+            # the session token replaces the credentials on later requests
+            self.token = response.get("token")
             return True
         else:
             return False
 
     def logout(self):
         """
-        Logs out the current user by clearing credentials.
+        Logs out the current user by revoking the session and clearing credentials.
 
         Returns:
             bool: True if logout was successful.
         """
+        if self.token:
+            try:
+                self.api_request("POST", "/logout")
+            except requests.RequestException:
+                pass
+        self.token = None
         self.username = None
         self.password = None
         return True
@@ -103,6 +407,18 @@ class TracktorAPI:
         """
         return self.api_request("GET", f"/projects/{project_id}")
     
+    def get_project_snapshot(self, project_id):
+        """
+        Retrieves a project together with its shots, assets, note counts and members in one request.
+
+        Args:
+            project_id (int): The project id.
+
+        Returns:
+            dict: Snapshot with 'project', 'revision', 'shots', 'assets', 'note_counts' and 'members'.
+        """
+        return self.api_request("GET", f"/projects/{project_id}/snapshot")
+    
     def get_projects(self):
         """
         Retrieves all projects.
@@ -135,3 +451,39 @@ class TracktorAPI:
             list: A list of asset data dictionaries.
         """
         return self.api_request("GET", f"/projects/{project_id}/assets")
+
+    def get_project_contents(self, project_id):
+        """
+        Retrieves the assets and shots of a project, fetching both at the same time.
+
+        Args:
+            project_id (int): The project id.
+
+        Returns:
+            tuple: (list, list) the asset and shot data dictionaries.
+        """
+        contents = self.run_concurrently({
+            "assets": lambda: self.get_assets(project_id),
+            "shots": lambda: self.get_shots(project_id),
+        })
+        return contents["assets"], contents["shots"]
+
+    def get_projects_contents(self, project_ids, max_concurrency=None):
+        """
+        Retrieves the assets and shots of several projects, with at most max_concurrency
+        requests in flight.
+
+        Args:
+            project_ids (list): The project ids.
+            max_concurrency (int, optional): The most requests in flight at once. Defaults to self.max_concurrency.
+
+        Returns:
+            dict: Maps each project id to its (assets, shots) tuple.
+        """
+        calls = {}
+        for project_id in project_ids:
+            calls[(project_id, "assets")] = lambda project_id=project_id: self.get_assets(project_id)
+            calls[(project_id, "shots")] = lambda project_id=project_id: self.get_shots(project_id)
+        contents = self.run_concurrently(calls, max_concurrency)
+        return {project_id: (contents[(project_id, "assets")], contents[(project_id, "shots")])
+                for project_id in project_ids}
@@ -8,6 +8,7 @@ export function ItemPage(){
     const [item, setItem] = useState(null)
     const navigate = useNavigate()
     const [activeTab, setActiveTab] = useState("")
+    const [noteCounts, setNoteCounts] = useState({})
     const [searchParams, setSearchParams] = useSearchParams()
 
     const department = searchParams.get("department") || "All"
@@ -31,6 +32,41 @@ export function ItemPage(){
         fetchItem()
     },[itemId, itemType])
 
+    useEffect(() => {
+        // the newest note id the user had seen on this item, notes after it are counted as unread
+        const seenKey = `notes_seen_${projectId}_${itemType}_${itemId}`
+        const seen = Number(localStorage.getItem(seenKey)) || 0
+        let latest = seen
+
+        // one request for the note counts of every item and department of the project
+        const fetchNoteCounts = async () => {
+            try {
+                const counts = await axios.get(`http://localhost:8080/api/projects/${projectId}/notes/counts`, {params: {since: seen}})
+                const itemCounts = {}
+                counts.data
+                    .filter((row) => row.item_type === itemType && String(row.item_id) === String(itemId))
+                    .forEach((row) => {
+                        const dept = itemCounts[row.item_dept] || {count: 0, unread: 0}
+                        itemCounts[row.item_dept] = {count: dept.count + row.count, unread: dept.unread + row.unread}
+                        latest = Math.max(latest, row.latest_id)
+                    })
+                setNoteCounts(itemCounts)
+            } catch (error) {
+                setNoteCounts({})
+            }
+        }
+        fetchNoteCounts()
+
+        // notes added on the notes page or by other users show up without a reload
+        const interval = setInterval(fetchNoteCounts, 30000)
+        window.addEventListener("focus", fetchNoteCounts)
+        return () => {
+            clearInterval(interval)
+            window.removeEventListener("focus", fetchNoteCounts)
+            localStorage.setItem(seenKey, latest)
+        }
+    },[projectId, itemId, itemType])
+
     useEffect(() => {
     if (departments.length > 0) {
         setActiveTab(departments[0]);
@@ -45,6 +81,25 @@ export function ItemPage(){
         setActiveTab(dept)
     }
 
+    const noteCount = (dept) => dept === "All"
+        ? Object.values(noteCounts).reduce(
+            (total, counts) => ({count: total.count + counts.count, unread: total.unread + counts.unread}),
+            {count: 0, unread: 0})
+        : noteCounts[dept] || {count: 0, unread: 0}
+
+    const noteBadge = (dept) => {
+        const {count, unread} = noteCount(dept)
+        if (!count) return null
+        return (
+            <span
+                className={`ml-2 px-2 rounded-full text-xs font-bold ${unread ? "bg-red-500 text-white" : "bg-amber-100 text-amber-800"}`}
+                title={unread ? `${count} notes, ${unread} new` : `${count} notes`}
+            >
+                {unread ? `${count} (${unread} new)` : count}
+            </span>
+        )
+    }
+
     const handleStatusClick = (dept) => {
         navigate(`/${username}/projects/${projectId}/${itemType}/${itemId}/${dept}/notes`)
     }
@@ -65,7 +120,7 @@ export function ItemPage(){
                             key={dept}
                             className={`px-4 py-2 rounded-t ${activeTab === dept ? "bg-amber-300 text-white font-bold" : "bg-gray-100 text-amber-800"}`}
                             onClick={() => handleTabChange(dept)}
-                            title={dept.toUpperCase()}
+                            title={<>{dept.toUpperCase()}{noteBadge(dept)}</>}
                         />
 
                     ))}
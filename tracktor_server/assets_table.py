@@ -1,5 +1,13 @@
 import sqlite3
 from sqlite3 import Error
+from db_pool import get_pool
+from queries import list_rows
+from revisions_table import bump_revision, create_revisions_table, record_deletions
+from project_cache import invalidate_projects
+from stats_table import create_status_counts
+
+# the columns the status endpoints may write to
+STATUS_COLUMNS = ("asset_status", "prepro_status", "mod_status", "srf_status", "cfx_status", "lit_status")
 
 class Assets:
     """
@@ -26,38 +34,39 @@ class Assets:
     
     def get_db(self):
         """
-        Opens the named database or creates one if it doesn't exist.
+        Gets a pooled connection to the named database, creating the db if it doesn't exist.
+        Closing the connection returns it to the pool.
         
         Returns:
             sqlite3.Connection: The db connection object.
         """
-        connection = sqlite3.connect(self.db_name)
-        connection.row_factory = sqlite3.Row
-        return connection
+        return get_pool(self.db_name).connect()
         
     def init_assets_table(self):
         """
         Creates and SQL table for assets if it doesn't already exist.
         """
-        connection = self.get_db()
-        connection.execute("""
-                                CREATE TABLE IF NOT EXISTS assets(
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                project_id INTEGER,
-                                asset_name TEXT NOT NULL,
-                                asset_type TEXT NOT NULL,
-                                asset_status TEXT NOT NULL,
-                                prepro_status TEXT NOT NULL,
-                                mod_status TEXT NOT NULL,
-                                srf_status TEXT NOT NULL,
-                                cfx_status TEXT NOT NULL,
-                                lit_status TEXT NOT NULL,
-                                UNIQUE(asset_name)
-                                )
-                                """
-                                )
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("""
+                                    CREATE TABLE IF NOT EXISTS assets(
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                    project_id INTEGER,
+                                    asset_name TEXT NOT NULL,
+                                    asset_type TEXT NOT NULL,
+                                    asset_status TEXT NOT NULL,
+                                    prepro_status TEXT NOT NULL,
+                                    mod_status TEXT NOT NULL,
+                                    srf_status TEXT NOT NULL,
+                                    cfx_status TEXT NOT NULL,
+                                    lit_status TEXT NOT NULL,
+                                    revision INTEGER NOT NULL DEFAULT 0,
+                                    UNIQUE(asset_name)
+                                    )
+                                    """
+                                    )
+            create_revisions_table(connection)
+            create_status_counts(connection, "assets", STATUS_COLUMNS)
+            connection.commit()
 
 
     def add_asset_for_project(self, project_id, asset_name, asset_type):
@@ -73,28 +82,29 @@ class Assets:
             int: The ID of the newly created asset.
         """
 
-        connection = self.get_db()
-        cursor = connection.cursor()
-        new_status = "Not Started"
-        cursor.execute("""
-                        INSERT INTO assets(
-                        project_id,
-                        asset_name,
-                        asset_type,
-                        asset_status,
-                        prepro_status,
-                        mod_status,
-                        srf_status,
-                        cfx_status,
-                        lit_status
-                       )
-                       VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)
-                       """,
-                       (project_id, asset_name, asset_type, new_status, new_status, new_status, new_status, new_status, new_status))
-        
-        connection.commit()
-        asset_id = cursor.lastrowid
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            new_status = "Not Started"
+            revision = bump_revision(connection, project_id)
+            cursor.execute("""
+                            INSERT INTO assets(
+                            project_id,
+                            asset_name,
+                            asset_type,
+                            asset_status,
+                            prepro_status,
+                            mod_status,
+                            srf_status,
+                            cfx_status,
+                            lit_status,
+                            revision
+                           )
+                           VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                           """,
+                           (project_id, asset_name, asset_type, new_status, new_status, new_status, new_status, new_status, new_status, revision))
+            asset_id = cursor.lastrowid
+            connection.commit()
+        invalidate_projects(self.db_name, [project_id])
         return asset_id
 
         
@@ -109,9 +119,8 @@ class Assets:
             list[sqlite3.Row]: A list of asset rows for the project.
 
         """
-        connection = self.get_db()
-        asset_rows = connection.execute("SELECT * FROM assets WHERE project_id = ?", (project_id,)).fetchall()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            asset_rows = connection.execute("SELECT * FROM assets WHERE project_id = ?", (project_id,)).fetchall()
         return asset_rows
     
     def get_asset_from_project(self, project_id, asset_id):
@@ -126,22 +135,27 @@ class Assets:
             sqlite3.Row: The asset row, or None if not found.
 
         """
-        connection = self.get_db()
-        row = connection.execute("SELECT * FROM assets WHERE project_id = ? AND id = ?", (project_id, asset_id)).fetchone()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            row = connection.execute("SELECT * FROM assets WHERE project_id = ? AND id = ?", (project_id, asset_id)).fetchone()
         return row
     
-    def get_all_assets(self):
+    def get_all_assets(self, fields=None, filters=None, after=None, limit=None):
         """
-        Gets all existing assets from the db.
-        
+        Streams all asset rows, optionally filtered and paginated by id.
+
+        Args:
+            fields (list[str], optional): The columns to return. Defaults to all columns.
+            filters (dict, optional): Column -> value pairs to match (e.g. {'project_id': 1, 'mod_status': 'Approved'}).
+            after (int, optional): Only return rows with an id greater than this.
+            limit (int, optional): The maximum number of rows to return.
+
         Returns:
-            list[sqlite3.Row]: A list of all asset rows.
+            Iterator[sqlite3.Row]: The asset rows, ordered by id.
+
+        Raises:
+            ValueError: If a field or filter isn't a column of the table.
         """
-        connection = self.get_db()
-        assets_rows = connection.execute("SELECT * FROM assets").fetchall()
-        connection.close()
-        return assets_rows
+        return list_rows(self.get_db(), "assets", fields, filters, after, limit)
     
     def remove_assets_from_project(self, project_id):
         """
@@ -151,11 +165,12 @@ class Assets:
             project_id (int): The ID of the project.
         """
 
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM assets WHERE project_id = ?", (project_id,))
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            record_deletions(connection, "assets", "project_id = ?", (project_id,))
+            cursor.execute("DELETE FROM assets WHERE project_id = ?", (project_id,))
+            connection.commit()
+        invalidate_projects(self.db_name, [project_id])
     
     def remove_asset_from_project(self, asset_id):
         """
@@ -164,11 +179,12 @@ class Assets:
         Args:
             asset_id (int): The ID of the asset to remove.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM assets WHERE id=?", (asset_id,))
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            revisions = record_deletions(connection, "assets", "id = ?", (asset_id,))
+            cursor.execute("DELETE FROM assets WHERE id=?", (asset_id,))
+            connection.commit()
+        invalidate_projects(self.db_name, revisions)
 
     def change_asset_status(self, asset_id, status_item, new_status):
         """
@@ -178,10 +194,60 @@ class Assets:
             asset_id (int): The ID of the asset.
             status_item (str): The status column to update (e.g., 'mod_status').
             new_status (str): The new status value.
-        """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute(f"UPDATE assets SET {status_item} = ? WHERE id = ?", (new_status, asset_id))
-        connection.commit()
-        connection.close()
+
+        Raises:
+            ValueError: If status_item isn't one of STATUS_COLUMNS, or new_status isn't a string.
+        """
+        if status_item not in STATUS_COLUMNS:
+            raise ValueError(f"Unknown status item: {status_item}")
+        # checked before the transaction, a value sqlite can't bind would fail with the write lock held
+        if not isinstance(new_status, str):
+            raise ValueError("The status value must be a string")
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            row = cursor.execute("SELECT project_id FROM assets WHERE id = ?", (asset_id,)).fetchone()
+            if row is not None:
+                revision = bump_revision(connection, row["project_id"])
+                cursor.execute(f"UPDATE assets SET {status_item} = ?, revision = ? WHERE id = ?", (new_status, revision, asset_id))
+            connection.commit()
+        if row is not None:
+            invalidate_projects(self.db_name, [row["project_id"]])
+
+    def change_asset_statuses(self, project_id, changes):
+        """
+        Applies many status changes to assets of one project in a single transaction.
+        Every change is validated before anything is written, and assets of other projects are left alone.
+
+        Args:
+            project_id (int): The ID of the project the assets belong to.
+            changes (list[tuple]): (asset_id, status_item, new_status) for every change.
+
+        Returns:
+            int: The number of changes that matched an asset of the project.
+
+        Raises:
+            ValueError: If a status_item isn't one of STATUS_COLUMNS, or a new_status isn't a string.
+        """
+        unknown = sorted({str(status_item) for _, status_item, _ in changes if status_item not in STATUS_COLUMNS})
+        if unknown:
+            raise ValueError(f"Unknown status items: {', '.join(unknown)}")
+        if not all(isinstance(new_status, str) for _, _, new_status in changes):
+            raise ValueError("Every status value must be a string")
+
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            revision = bump_revision(connection, project_id)
+            updated = 0
+            for asset_id, status_item, new_status in changes:
+                cursor.execute(f"UPDATE assets SET {status_item} = ?, revision = ? WHERE id = ? AND project_id = ?",
+                               (new_status, revision, asset_id, project_id))
+                updated += cursor.rowcount
+            if updated:
+                connection.commit()
+            else:
+                connection.rollback()
+        if updated:
+            invalidate_projects(self.db_name, [project_id])
+        return updated
         
@@ -0,0 +1,395 @@
+#!/usr/bin/env -S uv run --script
+
+"""
+Tracktor Server async API
+
+ASGI variant of the Tracktor API for serving many concurrent polling clients from one process.
+
+The endpoints the UI and the TIK plugin poll (ping, login, the project views, snapshot,
+stats, changes and the note feed and counts) are async Quart handlers. Their SQLite and bcrypt work runs on a bounded
+thread pool (TRACKTOR_DB_THREADS, default 8), so an idle or waiting client costs a coroutine
+instead of a thread. The handlers build their data with the *_view functions of main.py,
+so both variants answer the same way. Every other request is passed to the regular Flask app
+through a2wsgi, on a thread pool of its own (TRACKTOR_WSGI_THREADS, default 8), so slow
+clients of streamed Flask responses can't take the threads the async handlers need.
+
+Run it with:
+
+    python async_main.py       (TRACKTOR_HOST, TRACKTOR_PORT and TRACKTOR_WORKERS as in serve.py)
+
+or point any ASGI server at async_main:application.
+Requires the 'async' extra (quart, uvicorn, a2wsgi).
+"""
+
+import asyncio
+import itertools
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from a2wsgi import WSGIMiddleware
+from quart import Quart, Response, jsonify, request
+from werkzeug.exceptions import HTTPException
+from password_hasher import HasherBusy
+from main import (app as wsgi_app, notes_table, users_table, revisions_table, project_cache, login_throttle,
+                  sessions_table, get_list_args, wants_stream, stream_chunks, rows_to_dicts, STREAM_MIMETYPES,
+                  project_view, project_shots_view, project_assets_view, shot_view, asset_view, dept_notes_view,
+                  snapshot_view, stats_view, note_counts_view, changes_view)
+
+DB_THREADS = int(os.environ.get("TRACKTOR_DB_THREADS", "8"))
+WSGI_THREADS = int(os.environ.get("TRACKTOR_WSGI_THREADS", "8"))
+# chunks of a streamed Flask response buffered ahead of a slow client
+STREAM_BUFFER = 16
+# rows serialised per trip to the thread pool when streaming a list
+STREAM_BATCH = 500
+
+db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="tracktor-db")
+wsgi_bridge = WSGIMiddleware(wsgi_app, workers=WSGI_THREADS, send_queue_size=STREAM_BUFFER)
+
+async_app = Quart(__name__)
+
+
+async def run_db(function, *args):
+    """
+    Runs blocking database (or bcrypt) work on the bounded thread pool.
+
+    Args:
+        function (callable): The blocking function.
+        *args: Its arguments.
+
+    Returns:
+        The function's return value.
+    """
+    return await asyncio.get_running_loop().run_in_executor(db_executor, function, *args)
+
+
+@async_app.after_request
+async def add_cors_headers(response):
+    """
+    Adds the same CORS headers as flask_cors does for main.app.
+
+    Args:
+        response (Response): The outgoing response.
+
+    Returns:
+        Response: The response with its CORS headers.
+    """
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Expose-Headers"] = "X-Next-Cursor, ETag"
+    return response
+
+
+async def conditional_response(project_id, build):
+    """
+    Async version of main.conditional_response: ETag from the project revision,
+    304 if the client holds it, otherwise the body from the project cache or from build().
+
+    Args:
+        project_id (int): The ID of the project the data belongs to.
+        build (callable): Blocking function returning the JSON-able data, one of main's *_view functions.
+            Raises LookupError if the data doesn't exist.
+
+    Returns:
+        Response: 304, 404 or the data with its ETag.
+    """
+    revision = await run_db(revisions_table.get_revision, project_id)
+    etag = f"r{revision}:{request.path}"
+    if request.if_none_match.contains(etag):
+        response = Response("", status=304)
+    else:
+        body = project_cache.get(project_id, request.path, revision)
+        if body is None:
+            try:
+                data = await run_db(build)
+            except LookupError as error:
+                return jsonify({"error": str(error)}), 404
+            body = await jsonify(data).get_data()
+            project_cache.set(project_id, request.path, revision, body)
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@async_app.route("/api/ping")
+async def ping():
+    """
+    Health check endpoint to verify API is reachable.
+
+    Returns:
+        Response: JSON message confirming API is reachable.
+    """
+    return jsonify({"message": "Tracktor API is reachable"})
+
+
+@async_app.route("/api/login", methods=['POST'])
+async def login_user():
+    """
+    Authenticates a user with username and password. The bcrypt check runs on the thread pool.
+
+    Request JSON:
+        user_name (str): The username.
+        user_password (str): The plaintext password.
+
+    Returns:
+        Response: JSON with success status, user ID and session token, or error message.
+    """
+    data = await request.get_json(silent=True) or {}
+    if "user_name" not in data or "user_password" not in data:
+        return jsonify({"error": "Missing user name or password"}), 400
+
+    retry_after = login_throttle.attempt(data["user_name"], request.remote_addr)
+    if retry_after:
+        response = jsonify({"success": False, "error": "Too many login attempts, try again later"})
+        response.headers["Retry-After"] = str(math.ceil(retry_after))
+        return response, 429
+    try:
+        success, user_id = await run_db(users_table.verify_user, data["user_name"], data["user_password"])
+    except HasherBusy as error:
+        response = jsonify({"error": str(error)})
+        response.headers["Retry-After"] = "1"
+        return response, 503
+    if success:
+        token, expires_at = await run_db(sessions_table.create_session, user_id)
+        return jsonify({"success": True, "user_id": user_id, "token": token, "expires_at": expires_at}), 200
+    return jsonify({"success": False, "error": "Invalid username or password!"})
+
+
+@async_app.route("/api/projects/<int:project_id>", methods=['GET'])
+async def display_project(project_id):
+    """
+    Gets the data of a specified project.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        Response: JSON dict with project data, or 304/404.
+    """
+    return await conditional_response(project_id, lambda: project_view(project_id))
+
+
+@async_app.route("/api/projects/<int:project_id>/shots", methods=['GET'])
+async def display_shots_for_project(project_id):
+    """
+    Gets details of all shots for a specific project.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        Response: JSON list of shot dicts, or 304.
+    """
+    return await conditional_response(project_id, lambda: project_shots_view(project_id))
+
+
+@async_app.route("/api/projects/<int:project_id>/assets", methods=['GET'])
+async def display_assets_for_project(project_id):
+    """
+    Gets details of all assets for a specific project.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        Response: JSON list of asset dicts, or 304.
+    """
+    return await conditional_response(project_id, lambda: project_assets_view(project_id))
+
+
+@async_app.route("/api/projects/<int:project_id>/shots/<int:shot_id>", methods=['GET'])
+async def display_shot(project_id, shot_id):
+    """
+    Gets a specific shot from a project.
+
+    Args:
+        project_id (int): The ID of the project.
+        shot_id (int): The ID of the shot.
+
+    Returns:
+        Response: JSON dict with the shot, or 304/404.
+    """
+    return await conditional_response(project_id, lambda: shot_view(project_id, shot_id))
+
+
+@async_app.route("/api/projects/<int:project_id>/assets/<int:asset_id>", methods=['GET'])
+async def display_asset(project_id, asset_id):
+    """
+    Gets a specific asset from a project.
+
+    Args:
+        project_id (int): The ID of the project.
+        asset_id (int): The ID of the asset.
+
+    Returns:
+        Response: JSON dict with the asset, or 304/404.
+    """
+    return await conditional_response(project_id, lambda: asset_view(project_id, asset_id))
+
+
+@async_app.route("/api/projects/<int:project_id>/<item_type>/<int:item_id>/<item_dept>/notes", methods=['GET'])
+async def display_notes(project_id, item_type, item_id, item_dept):
+    """
+    Gets all notes for the item.
+
+    Args:
+        project_id (int): The ID of the project.
+        item_type (str): The type of item (e.g., 'shot', 'asset').
+        item_id (int): The ID of the item.
+        item_dept (str): The department.
+
+    Returns:
+        Response: JSON list of note dicts, or 304.
+    """
+    return await conditional_response(project_id, lambda: dept_notes_view(item_type, item_id, item_dept))
+
+
+@async_app.route("/api/projects/<int:project_id>/notes", methods=['GET'])
+async def display_project_notes(project_id):
+    """
+    Gets the notes of a project in the order they were written, as a feed.
+    Takes the same arguments as the Flask route (see main.get_list_args).
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        Response: JSON list of note dicts, with X-Next-Cursor when the page is full,
+        a streamed list if the client asked for one (see main.wants_stream), or error.
+    """
+    try:
+        fields, filters, after, limit = get_list_args(request)
+        filters.pop("project_id", None)
+        rows = await run_db(notes_table.get_project_notes, project_id, filters, after, limit, fields)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    mode = wants_stream(request)
+    if mode:
+        return Response(stream_rows(stream_chunks(rows, mode)), mimetype=STREAM_MIMETYPES[mode])
+    notes = await run_db(rows_to_dicts, rows)
+    response = jsonify(notes)
+    if limit is not None and len(notes) == limit:
+        response.headers["X-Next-Cursor"] = str(notes[-1]["id"])
+    return response
+
+
+async def stream_rows(chunks):
+    """
+    Sends the chunks of a streamed list, reading and serialising them in batches on the thread pool,
+    so a slow client holds a coroutine rather than a pool thread.
+
+    Args:
+        chunks (Iterator[str]): The chunks, see main.stream_chunks.
+
+    Yields:
+        bytes: The chunks of the response body.
+    """
+    try:
+        while True:
+            batch = await run_db(lambda: list(itertools.islice(chunks, STREAM_BATCH)))
+            if not batch:
+                return
+            yield "".join(batch).encode("utf-8")
+    finally:
+        # closes the rows, which hands their connection back to the pool
+        await run_db(chunks.close)
+
+
+@async_app.route("/api/projects/<int:project_id>/notes/counts", methods=['GET'])
+async def display_project_note_counts(project_id):
+    """
+    Gets the number of notes per item and department of a project, for badges.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Query args:
+        since (int, optional): The id of the last note the client has seen.
+
+    Returns:
+        Response: JSON list of count dicts, or 304 without since, or error.
+    """
+    since = request.args.get("since")
+    if since is None:
+        return await conditional_response(project_id, lambda: note_counts_view(project_id))
+    try:
+        return jsonify(await run_db(note_counts_view, project_id, since))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+
+@async_app.route("/api/projects/<int:project_id>/snapshot", methods=['GET'])
+async def display_project_snapshot(project_id):
+    """
+    Gets a project with its shots, assets, note counts and members in one response.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        Response: JSON snapshot dict, or 304/404.
+    """
+    return await conditional_response(project_id, lambda: snapshot_view(project_id))
+
+
+@async_app.route("/api/projects/<int:project_id>/stats", methods=['GET'])
+async def display_project_stats(project_id):
+    """
+    Gets the number of shots and assets of a project and how many are in each status.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        Response: JSON dict of counts, or 304.
+    """
+    return await conditional_response(project_id, lambda: stats_view(project_id))
+
+
+@async_app.route("/api/projects/<int:project_id>/changes", methods=['GET'])
+async def project_changes(project_id):
+    """
+    Gets the shots, assets and notes of a project that changed after a revision.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Query args:
+        since (int, optional): The revision of the last sync. Defaults to 0.
+
+    Returns:
+        Response: JSON dict with the revision, the changes and the deleted IDs, or error.
+    """
+    try:
+        return jsonify(await run_db(changes_view, project_id, request.args.get("since")))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+
+async def application(scope, receive, send):
+    """
+    ASGI entry point: async handlers for the routes of async_app, the Flask app for everything else.
+
+    Args:
+        scope (dict): The ASGI scope.
+        receive (callable): The ASGI receive channel.
+        send (callable): The ASGI send channel.
+    """
+    if scope["type"] == "http" and scope["method"] != "OPTIONS":
+        try:
+            async_app.url_map.bind("localhost").match(scope["path"], method=scope["method"])
+        except HTTPException:
+            return await wsgi_bridge(scope, receive, send)
+        return await async_app(scope, receive, send)
+    if scope["type"] == "http":
+        # CORS preflights are answered by flask_cors
+        return await wsgi_bridge(scope, receive, send)
+    return await async_app(scope, receive, send)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("async_main:application",
+                host=os.environ.get("TRACKTOR_HOST", "0.0.0.0"),
+                port=int(os.environ.get("TRACKTOR_PORT", "8080")),
+                workers=int(os.environ.get("TRACKTOR_WORKERS", "1")))
@@ -0,0 +1,236 @@
+"""
+Shared SQLite connection pool for the Tracktor table classes.
+
+Every table class asks the pool for a connection instead of opening a new one.
+Closing a pooled connection hands it back to the pool, so the file handle and schema cache
+are reused. Table methods check connections out with `with pool.connection() as connection:`,
+which rolls back and hands the connection back even when a query raises.
+
+Pools are per process. A forked child (e.g. a gunicorn worker) starts with empty pools
+and never touches the connections it inherited from its parent.
+"""
+
+import os
+import queue
+from contextlib import contextmanager
+import sqlite3
+import threading
+from engine_config import get_profile
+
+DEFAULT_POOL_SIZE = int(os.environ.get("TRACKTOR_DB_POOL_SIZE", "8"))
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    SQLite connection that returns itself to its pool when closed.
+
+    Attributes:
+        pool (ConnectionPool or None): The pool the connection belongs to.
+        checked_out (bool): Whether the connection is in use, rather than idle in its pool.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.checked_out = False
+
+    def close(self):
+        """
+        Returns the connection to its pool, or closes it if it doesn't belong to one.
+        Closing a connection that was already returned does nothing, so it can't close
+        a handle that is idle in the pool or already handed to someone else.
+        """
+        if self.pool is None:
+            super().close()
+        elif self.checked_out:
+            self.pool.release(self)
+
+    def discard(self):
+        """
+        Closes the underlying SQLite handle for good.
+        """
+        self.pool = None
+        self.checked_out = False
+        try:
+            super().close()
+        except sqlite3.Error:
+            pass
+
+
+class ConnectionPool:
+    """
+    Bounded pool of idle connections to one SQLite database file.
+
+    Connections are created on demand, so callers never block on the pool.
+    At most `size` idle connections are kept around, the rest are closed on release.
+
+    Attributes:
+        db_name (str): The name of the SQLite database file.
+        size (int): The maximum number of idle connections kept open.
+    """
+
+    def __init__(self, db_name, size=DEFAULT_POOL_SIZE):
+        """
+        Initializes the pool for the database.
+
+        Args:
+            db_name (str): The name of the SQLite database file.
+            size (int): The maximum number of idle connections kept open.
+        """
+        self.db_name = db_name
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _open(self):
+        """
+        Opens a new connection to the database, creating the file if it doesn't exist.
+        The engine profile pragmas (WAL, cache size, etc.) are applied here.
+
+        Returns:
+            PooledConnection: The new connection.
+        """
+        connection = sqlite3.connect(self.db_name, factory=PooledConnection, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        get_profile().apply(connection)
+        connection.pool = self
+        connection.checked_out = True
+        return connection
+
+    def _is_healthy(self, connection):
+        """
+        Checks that an idle connection can still run a query.
+
+        Args:
+            connection (PooledConnection): The connection to check.
+
+        Returns:
+            bool: True if the connection is usable.
+        """
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def connect(self):
+        """
+        Checks out a connection, reusing an idle one if possible.
+
+        Returns:
+            PooledConnection: A healthy connection to the database.
+        """
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if self._is_healthy(connection):
+                connection.checked_out = True
+                return connection
+            connection.discard()
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks out a connection for the length of a with block. The connection is rolled back
+        if the block raises and is always handed back to the pool, so an error can't leave
+        a transaction, or the write lock, held by a stranded connection.
+
+        Yields:
+            PooledConnection: A healthy connection to the database.
+        """
+        connection = self.connect()
+        try:
+            yield connection
+        except BaseException:
+            try:
+                connection.rollback()
+            except sqlite3.Error:
+                pass
+            raise
+        finally:
+            connection.close()
+
+    def release(self, connection):
+        """
+        Takes a connection back, rolling back anything left uncommitted.
+
+        Args:
+            connection (PooledConnection): The connection to return.
+        """
+        connection.checked_out = False
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error:
+            connection.discard()
+            return
+
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.discard()
+
+    def close_all(self):
+        """
+        Closes every idle connection in the pool.
+        """
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            connection.discard()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name):
+    """
+    Gets the process-wide pool for a database file, creating it on first use.
+
+    Args:
+        db_name (str): The name of the SQLite database file.
+
+    Returns:
+        ConnectionPool: The pool for the database.
+    """
+    pool = _pools.get(db_name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db_name)
+            if pool is None:
+                pool = ConnectionPool(db_name)
+                _pools[db_name] = pool
+    return pool
+
+
+def close_pools():
+    """
+    Closes the idle connections of every pool in the process.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+        _pools.clear()
+
+
+# connections inherited from the parent process, kept alive so the child never closes them:
+# closing a copied SQLite handle can release the parent's locks or checkpoint its WAL
+_inherited_pools = []
+
+
+def _reset_pools_after_fork():
+    """
+    Gives a forked child its own, empty pools.
+    """
+    global _pools, _pools_lock
+    _inherited_pools.extend(_pools.values())
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
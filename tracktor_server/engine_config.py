@@ -0,0 +1,116 @@
+"""
+SQLite engine settings for the Tracktor database.
+
+The profile is read from environment variables next to TRACKTOR_DB_PATH and applied
+to every connection the pool opens:
+
+    TRACKTOR_DB_JOURNAL_MODE   journal mode, default WAL
+    TRACKTOR_DB_SYNCHRONOUS    synchronous level, default NORMAL
+    TRACKTOR_DB_MMAP_SIZE      memory-mapped I/O size in bytes, default 256 MiB
+    TRACKTOR_DB_CACHE_SIZE     page cache size, negative values are KiB, default -16000 (~16 MB)
+    TRACKTOR_DB_BUSY_TIMEOUT   milliseconds to wait for a lock, default 5000
+"""
+
+import os
+
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+class EngineProfile:
+    """
+    A set of SQLite pragmas applied uniformly to every connection.
+
+    Attributes:
+        journal_mode (str): The journal mode (e.g. 'WAL').
+        synchronous (str): The synchronous level (e.g. 'NORMAL').
+        mmap_size (int): Memory-mapped I/O size in bytes.
+        cache_size (int): Page cache size, in pages or negative KiB.
+        busy_timeout (int): Milliseconds to wait for a lock before failing.
+    """
+
+    def __init__(self, journal_mode="WAL", synchronous="NORMAL", mmap_size=268435456,
+                 cache_size=-16000, busy_timeout=5000):
+        """
+        Initializes the profile and validates the values.
+
+        Args:
+            journal_mode (str): The journal mode.
+            synchronous (str): The synchronous level.
+            mmap_size (int): Memory-mapped I/O size in bytes.
+            cache_size (int): Page cache size.
+            busy_timeout (int): Lock wait in milliseconds.
+
+        Raises:
+            ValueError: If a value isn't a valid SQLite setting.
+        """
+        journal_mode = str(journal_mode).upper()
+        synchronous = str(synchronous).upper()
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"Invalid journal mode: {journal_mode}")
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Invalid synchronous level: {synchronous}")
+
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.mmap_size = int(mmap_size)
+        self.cache_size = int(cache_size)
+        self.busy_timeout = int(busy_timeout)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds a profile from the TRACKTOR_DB_* environment variables.
+
+        Returns:
+            EngineProfile: The profile, with defaults for unset variables.
+        """
+        defaults = cls()
+        return cls(
+            journal_mode=os.environ.get("TRACKTOR_DB_JOURNAL_MODE", defaults.journal_mode),
+            synchronous=os.environ.get("TRACKTOR_DB_SYNCHRONOUS", defaults.synchronous),
+            mmap_size=os.environ.get("TRACKTOR_DB_MMAP_SIZE", defaults.mmap_size),
+            cache_size=os.environ.get("TRACKTOR_DB_CACHE_SIZE", defaults.cache_size),
+            busy_timeout=os.environ.get("TRACKTOR_DB_BUSY_TIMEOUT", defaults.busy_timeout),
+        )
+
+    def apply(self, connection):
+        """
+        Applies the pragmas to a freshly opened connection.
+
+        Args:
+            connection (sqlite3.Connection): The db connection.
+        """
+        # values are validated in __init__, so formatting them in is safe
+        connection.execute(f"PRAGMA busy_timeout = {self.busy_timeout}")
+        connection.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        connection.execute(f"PRAGMA synchronous = {self.synchronous}")
+        connection.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        connection.execute(f"PRAGMA cache_size = {self.cache_size}")
+
+
+_profile = None
+
+
+def get_profile():
+    """
+    Gets the engine profile of the process, reading the environment on first use.
+
+    Returns:
+        EngineProfile: The active profile.
+    """
+    global _profile
+    if _profile is None:
+        _profile = EngineProfile.from_env()
+    return _profile
+
+
+def set_profile(profile):
+    """
+    Replaces the engine profile used for new connections.
+
+    Args:
+        profile (EngineProfile or None): The new profile, or None to re-read the environment.
+    """
+    global _profile
+    _profile = profile
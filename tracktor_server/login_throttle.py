@@ -0,0 +1,115 @@
+"""
+Sliding-window throttling of login attempts, per user name and per client address.
+
+Attempts over the limit are refused before any bcrypt work is done, so one client
+hammering /api/login can't use up the password hashing pool.
+
+    TRACKTOR_LOGIN_WINDOW      window length in seconds, default 60
+    TRACKTOR_LOGIN_USER_LIMIT  attempts per user name per window, default 10
+    TRACKTOR_LOGIN_IP_LIMIT    attempts per client address per window, default 300
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+
+class LoginThrottle:
+    """
+    Counts recent login attempts per user name and per address.
+
+    Attributes:
+        window (float): The window length in seconds.
+        user_limit (int): Attempts allowed per user name per window.
+        ip_limit (int): Attempts allowed per address per window.
+        throttled (int): Attempts refused so far.
+    """
+
+    def __init__(self, window=60, user_limit=10, ip_limit=300):
+        """
+        Initializes the throttle.
+
+        Args:
+            window (float): The window length in seconds.
+            user_limit (int): Attempts allowed per user name per window.
+            ip_limit (int): Attempts allowed per address per window.
+        """
+        self.window = float(window)
+        self.user_limit = int(user_limit)
+        self.ip_limit = int(ip_limit)
+        self.throttled = 0
+        # key -> timestamps of the attempts in the window
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds a throttle from the TRACKTOR_LOGIN_* environment variables.
+
+        Returns:
+            LoginThrottle: The throttle, with defaults for unset variables.
+        """
+        return cls(window=os.environ.get("TRACKTOR_LOGIN_WINDOW", 60),
+                   user_limit=os.environ.get("TRACKTOR_LOGIN_USER_LIMIT", 10),
+                   ip_limit=os.environ.get("TRACKTOR_LOGIN_IP_LIMIT", 300))
+
+    def _recent(self, key, now):
+        """
+        Gets the attempts of a key still inside the window. The lock must be held.
+
+        Args:
+            key (tuple): The (kind, value) key.
+            now (float): The current monotonic time.
+
+        Returns:
+            deque: The attempt timestamps.
+        """
+        attempts = self._attempts.setdefault(key, deque())
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+        return attempts
+
+    def attempt(self, user_name, address):
+        """
+        Records a login attempt if it's allowed.
+
+        Args:
+            user_name (str): The user name being logged into.
+            address (str or None): The client address.
+
+        Returns:
+            float: 0 if the attempt may go ahead, otherwise the seconds until it would be allowed.
+        """
+        now = time.monotonic()
+        keys = [(("user", user_name), self.user_limit), (("ip", address), self.ip_limit)]
+        with self._lock:
+            retry_after = 0.0
+            for key, limit in keys:
+                attempts = self._recent(key, now)
+                if len(attempts) >= limit:
+                    retry_after = max(retry_after, attempts[0] + self.window - now)
+            if retry_after:
+                self.throttled += 1
+                return retry_after
+            for key, limit in keys:
+                self._attempts[key].append(now)
+            # forget keys without recent attempts so the dict doesn't grow forever
+            if len(self._attempts) > 10000:
+                for key in [key for key, attempts in self._attempts.items() if not self._recent(key, now)]:
+                    del self._attempts[key]
+            return 0.0
+
+    def stats(self):
+        """
+        Gets the throttle counters.
+
+        Returns:
+            dict: window, user_limit, ip_limit and throttled.
+        """
+        with self._lock:
+            return {"window": self.window,
+                    "user_limit": self.user_limit,
+                    "ip_limit": self.ip_limit,
+                    "throttled": self.throttled}
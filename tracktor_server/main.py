@@ -9,18 +9,28 @@ The file contains endpoints to connect incoming requests to their respective fun
 """
 print("main.py loaded - FLATTENED IMPORTS")
 import os
-from flask import Flask, jsonify, request
+import json
+import math
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 from projects_table import Projects
 from shots_table import Shots
 from users_table import Users
 from usersProjects_table import UsersProjects
 from assets_table import Assets
-from notes_table import Notes
+from notes_table import Notes, SEARCH_PAGE_SIZE
+from revisions_table import Revisions
+from stats_table import Stats
+from password_hasher import HasherBusy, get_hasher
+from login_throttle import LoginThrottle
+from sessions_table import Sessions
+from migrations import migrate
+from queries import page_size
+from project_cache import get_cache
 
 
 app = Flask(__name__)
-cors = CORS(app, resources={r"/*": {"origins": "*"}}) # specify origins
+cors = CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=["X-Next-Cursor", "ETag"]) # specify origins
 
 # Use TRACKTOR_DB_PATH env variable for test DB, default to 'tracktor.db' for production
 db_path = os.environ.get("TRACKTOR_DB_PATH", "tracktor.db")
@@ -30,38 +40,427 @@ users_table = Users(db_path)
 usersProjects_table = UsersProjects(db_path)
 assets_table = Assets(db_path)
 notes_table = Notes(db_path)
+revisions_table = Revisions(db_path)
+stats_table = Stats(db_path)
+project_cache = get_cache(db_path)
+login_throttle = LoginThrottle.from_env()
+sessions_table = Sessions(db_path)
+migrate(db_path)
+sessions_table.purge_expired()
+
+# the streamed list formats, see wants_stream
+STREAM_MIMETYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+def get_list_args(source=None):
+    """
+    Reads the paging arguments of a list endpoint from the query string.
+
+    Query args:
+        fields (str, optional): Comma separated columns to return.
+        after (int, optional): The id cursor, returned in X-Next-Cursor by the previous page.
+        limit (int, optional): The page size.
+        stream (str, optional): 'ndjson' or 'json' to stream the rows (see list_response).
+        Args starting with an underscore are ignored, so cache busters like _=1700000000 are harmless.
+        Any other arg is treated as a column filter, e.g. project_id=3 or lay_status=Approved,
+        and one that isn't a column of the table is a 400 rather than being silently dropped.
+
+    Args:
+        source (Request, optional): The request to read, e.g. a Quart request in async_main.
+            Defaults to the current Flask request.
+
+    Returns:
+        tuple: (list[str] or None, dict, str or None, int or None) fields, filters, after and limit.
+
+    Raises:
+        ValueError: If the limit isn't a positive integer.
+    """
+    args = (source or request).args.to_dict()
+    fields = args.pop("fields", None)
+    if fields:
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+    after = args.pop("after", None)
+    limit = page_size(args.pop("limit", None))
+    args.pop("stream", None)
+    filters = {column: value for column, value in args.items() if not column.startswith("_")}
+    return fields or None, filters, after, limit
+
+def wants_stream(source=None):
+    """
+    Checks whether the client asked for a streamed list response.
+
+    Args:
+        source (Request, optional): The request to read. Defaults to the current Flask request.
+
+    Query args:
+        stream (str, optional): 'ndjson' or 'json'.
+
+    Returns:
+        str or None: 'ndjson', 'json' or None for a regular response.
+    """
+    source = source or request
+    stream = source.args.get("stream")
+    if stream in STREAM_MIMETYPES:
+        return stream
+    if source.accept_mimetypes.best == STREAM_MIMETYPES["ndjson"]:
+        return "ndjson"
+    return None
+
+def stream_chunks(rows, mode, hidden=()):
+    """
+    Serialises rows into the chunks of a streamed list response, one chunk per row.
+
+    Args:
+        rows (Iterator[sqlite3.Row]): The rows to send.
+        mode (str): 'ndjson' for one JSON object per line, 'json' for a chunked JSON array.
+        hidden (tuple[str]): Columns to leave out of the response.
+
+    Yields:
+        str: The chunks of the response body.
+    """
+    def serialise(row):
+        item = dict(row)
+        for column in hidden:
+            item.pop(column, None)
+        return json.dumps(item)
+
+    if mode == "ndjson":
+        for row in rows:
+            yield serialise(row) + "\n"
+        return
+    yield "["
+    separator = ""
+    for row in rows:
+        yield separator + serialise(row)
+        separator = ","
+    yield "]"
+
+def stream_response(rows, mode, hidden=()):
+    """
+    Streams rows to the client as they are read from the cursor.
+
+    Args:
+        rows (Iterator[sqlite3.Row]): The rows to send.
+        mode (str): 'ndjson' for one JSON object per line, 'json' for a chunked JSON array.
+        hidden (tuple[str]): Columns to leave out of the response.
+
+    Returns:
+        Response: The streamed response.
+    """
+    return Response(stream_with_context(stream_chunks(rows, mode, hidden)), mimetype=STREAM_MIMETYPES[mode])
+
+def list_response(rows, limit, hidden=()):
+    """
+    Serialises a page of rows, adding an X-Next-Cursor header when the page is full.
+    If the client asked for a stream (see wants_stream), the rows are streamed instead
+    and no cursor header is sent - the id of the last row is the cursor.
+
+    Args:
+        rows (Iterator[sqlite3.Row]): The rows of the page.
+        limit (int or None): The page size that was requested.
+        hidden (tuple[str]): Columns to leave out of the response.
+
+    Returns:
+        Response: JSON list of row dicts.
+    """
+    mode = wants_stream()
+    if mode:
+        return stream_response(rows, mode, hidden)
+
+    items = []
+    for row in rows:
+        item = dict(row)
+        for column in hidden:
+            item.pop(column, None)
+        items.append(item)
+    response = jsonify(items)
+    if limit is not None and len(items) == limit:
+        response.headers["X-Next-Cursor"] = str(items[-1]["id"])
+    return response
+
+def conditional_response(project_id, build):
+    """
+    Answers a GET for project data with a strong ETag derived from the project's revision.
+
+    The revision is read before the data, so the ETag can be older than the data but never newer.
+    If the client already holds the current ETag, a 304 is returned without building the response.
+    Otherwise the body is served from the project cache when it was built at the current revision,
+    and successful responses are cached for the next request.
+
+    Args:
+        project_id (int): The ID of the project the data belongs to.
+        build (callable): Builds the JSON-able data, e.g. one of the *_view functions.
+            Raises LookupError if the data doesn't exist.
+
+    Returns:
+        Response: 304 Not Modified, 404, or the data with its ETag.
+    """
+    revision = revisions_table.get_revision(project_id)
+    etag = f"r{revision}:{request.path}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = project_cache.get(project_id, request.path, revision)
+        if body is not None:
+            response = Response(body, mimetype="application/json")
+        else:
+            try:
+                response = jsonify(build())
+            except LookupError as error:
+                return jsonify({"error": str(error)}), 404
+            project_cache.set(project_id, request.path, revision, response.get_data())
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+# The data of the project views, shared by the Flask routes and the async ones in async_main.
+# They return JSON-able data and raise LookupError (-> 404) or ValueError (-> 400).
+
+def rows_to_dicts(rows):
+    """
+    Converts rows for JSON.
+
+    Args:
+        rows (Iterable[sqlite3.Row]): The rows.
+
+    Returns:
+        list[dict]: The rows as dicts.
+    """
+    return [dict(row) for row in rows]
+
+def project_view(project_id):
+    """
+    Gets the data of a project.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        dict: The project.
+
+    Raises:
+        LookupError: If the project doesn't exist.
+    """
+    row = projects_table.get_project(project_id)
+    if row is None:
+        raise LookupError("Project not found")
+    return dict(row)
+
+def project_shots_view(project_id):
+    """
+    Gets the shots of a project, in shot order.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        list[dict]: The shots.
+    """
+    return rows_to_dicts(shots_table.get_shots_from_project(project_id))
+
+def project_assets_view(project_id):
+    """
+    Gets the assets of a project.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        list[dict]: The assets.
+    """
+    return rows_to_dicts(assets_table.get_assets_from_project(project_id))
+
+def shot_view(project_id, shot_id):
+    """
+    Gets one shot of a project.
+
+    Args:
+        project_id (int): The ID of the project.
+        shot_id (int): The ID of the shot.
+
+    Returns:
+        dict: The shot.
+
+    Raises:
+        LookupError: If the project has no such shot.
+    """
+    row = shots_table.get_shot_from_project(project_id, shot_id)
+    if row is None:
+        raise LookupError("Shot not found")
+    return dict(row)
+
+def asset_view(project_id, asset_id):
+    """
+    Gets one asset of a project.
+
+    Args:
+        project_id (int): The ID of the project.
+        asset_id (int): The ID of the asset.
+
+    Returns:
+        dict: The asset.
+
+    Raises:
+        LookupError: If the project has no such asset.
+    """
+    row = assets_table.get_asset_from_project(project_id, asset_id)
+    if row is None:
+        raise LookupError("Asset not found")
+    return dict(row)
+
+def dept_notes_view(item_type, item_id, item_dept):
+    """
+    Gets the notes of one department of an item.
+
+    Args:
+        item_type (str): The type of item (e.g., 'shot', 'asset').
+        item_id (int): The ID of the item.
+        item_dept (str): The department.
+
+    Returns:
+        list[dict]: The notes.
+    """
+    return rows_to_dicts(notes_table.get_notes_for_dept(item_type, item_id, item_dept))
+
+def snapshot_view(project_id):
+    """
+    Gets a project with its shots, assets, note counts and members, read in one transaction.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        dict: The project, revision, shots, assets, note_counts and members.
+
+    Raises:
+        LookupError: If the project doesn't exist.
+    """
+    snapshot = projects_table.get_snapshot(project_id)
+    if snapshot is None:
+        raise LookupError("Project not found")
+    snapshot["project"] = dict(snapshot["project"])
+    for part in ("shots", "assets", "note_counts", "members"):
+        snapshot[part] = rows_to_dicts(snapshot[part])
+    return snapshot
+
+def stats_view(project_id):
+    """
+    Gets the number of shots and assets of a project and how many are in each status.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        dict: The counts per item type and status column.
+    """
+    return stats_table.get_project_stats(project_id)
+
+def note_counts_view(project_id, since=None):
+    """
+    Gets the number of notes per item and department of a project.
+
+    Args:
+        project_id (int): The ID of the project.
+        since (str or int, optional): The id of the last note the client has seen.
+
+    Returns:
+        list[dict]: item_type, item_id, item_dept, count, unread and latest_id per item and department.
+
+    Raises:
+        ValueError: If since isn't a note id.
+    """
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        raise ValueError("since must be a note id")
+    return rows_to_dicts(notes_table.get_note_counts(project_id, since))
+
+def changes_view(project_id, since=None):
+    """
+    Gets the shots, assets and notes of a project that changed after a revision.
+
+    Args:
+        project_id (int): The ID of the project.
+        since (str or int, optional): The revision of the last sync. Defaults to 0, i.e. everything.
+
+    Returns:
+        dict: The current revision, the changed shots, assets and notes, and the IDs of deleted items.
+
+    Raises:
+        ValueError: If since isn't an integer revision.
+    """
+    try:
+        since = int(since or 0)
+    except ValueError:
+        raise ValueError("since must be an integer revision")
+    changes = revisions_table.get_changes(project_id, since)
+    for table in ("shots", "assets", "notes"):
+        changes[table] = rows_to_dicts(changes[table])
+    return changes
+
+def get_bearer_token():
+    """
+    Gets the session token of the request from its 'Authorization: Bearer <token>' header.
+
+    Returns:
+        str or None: The token, or None if the header is missing or not a bearer token.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return token.strip()
+
+def get_session_user_id():
+    """
+    Gets the user logged in with the request's session token.
+
+    Returns:
+        int or None: The user ID, or None if there's no valid session.
+    """
+    return sessions_table.get_user_id(get_bearer_token())
+
+def busy_response(error, retry_after):
+    """
+    Builds the 503 response for a request refused because the server is overloaded.
+
+    Args:
+        error (Exception): The reason.
+        retry_after (int): Seconds the client should wait before retrying.
+
+    Returns:
+        tuple: (Response, 503).
+    """
+    response = jsonify({"error": str(error)})
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 503
 
 @app.route("/init", methods = ['GET'])
 def init_db():
     """
-    Initialise all the tables in the database.
+    Initialise all the tables in the database and apply pending schema migrations.
 
     Returns:
         Response: JSON message confirming the init.
     """
-    projects_table.init_project_table()
-    shots_table.init_shots_table()
-    users_table.init_users_table()
-    usersProjects_table.init_usersProjects_table()
-    assets_table.init_assets_table()
-    notes_table.init_notes_table()
+    migrate(db_path)
     return jsonify({"message" : "Database init complete"})
 
 @app.route("/api/users", methods =['GET'])
 def existing_users():
     """
-    Gets all users from the db, excluding passwords.
+    Gets users from the db, excluding passwords.
+    Supports fields=, after=, limit= and column filters, unknown columns are a 400 (see get_list_args).
 
     Returns:
-        Response: JSON list of user dicts.
+        Response: JSON list of user dicts, or error.
     """
-    rows = users_table.get_users()
-    users = []
-    for row in rows:
-        user_dict = dict(row)
-        user_dict.pop("user_password", None)
-        users.append(user_dict)
-    return jsonify(users)
+    try:
+        fields, filters, after, limit = get_list_args()
+        if "user_password" in filters or (fields and "user_password" in fields):
+            raise ValueError("Passwords can't be selected or filtered on")
+        rows = users_table.get_users(fields, filters, after, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return list_response(rows, limit, hidden=("user_password",))
 
 @app.route("/api/projects", methods=['GET'])
 def existing_projects():
@@ -78,55 +477,75 @@ def existing_projects():
 @app.route("/api/shots", methods=['GET'])
 def existing_shots():
     """
-    Gets all shots from the db.
+    Gets shots from the db.
+    Supports fields=, after=, limit= and column filters, unknown columns are a 400 (see get_list_args).
 
     Returns:
-        Response: JSON list of shot dicts.
+        Response: JSON list of shot dicts, or error.
     """
-    shot_rows = shots_table.get_all_shots()
-    return jsonify([dict(shot_row) for shot_row in shot_rows])
+    try:
+        fields, filters, after, limit = get_list_args()
+        shot_rows = shots_table.get_all_shots(fields, filters, after, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return list_response(shot_rows, limit)
     
 @app.route("/api/usersProjects", methods = ['GET'])
 def existing_assignments():
     """
-    Gets all assignments from the db.
+    Gets assignments from the db.
+    Supports fields=, after=, limit= and column filters, unknown columns are a 400 (see get_list_args).
 
     Args:
         user_id (int, optional) = The ID of the user to retrieve projects for.
 
     Returns:
-        Response: JSON list of assignment dicts if no user specified, 
-        or JSON list if project IDs, assigned to the user.
+        Response: JSON list of project IDs if only user_id is given,
+        otherwise JSON list of assignment dicts, or error.
     """
     user_id = request.args.get("user_id")
-    if user_id is not None:
+    if user_id is not None and len(request.args) == 1:
         user_assignments = usersProjects_table.get_assignments(user_id)
         return jsonify([row[0] for row in user_assignments])
-    else:
-        rows = usersProjects_table.get_all_assignments()
-        return jsonify([dict(row) for row in rows])
+
+    try:
+        fields, filters, after, limit = get_list_args()
+        rows = usersProjects_table.get_all_assignments(fields, filters, after, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return list_response(rows, limit)
     
 @app.route("/api/assets", methods=['GET'])
 def existing_assets():
     """
-    Gets all assets from the db.
+    Gets assets from the db.
+    Supports fields=, after=, limit= and column filters, unknown columns are a 400 (see get_list_args).
 
     Returns:
-        Response: JSON list of assets dicts.
+        Response: JSON list of assets dicts, or error.
     """
-    asset_rows = assets_table.get_all_assets()
-    return jsonify([dict(asset_row) for asset_row in asset_rows])
+    try:
+        fields, filters, after, limit = get_list_args()
+        asset_rows = assets_table.get_all_assets(fields, filters, after, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return list_response(asset_rows, limit)
 
 @app.route("/api/notes", methods=['GET'])
 def existing_notes():
     """
-    Gets all nodes from the db.
+    Gets notes from the db.
+    Supports fields=, after=, limit= and column filters, unknown columns are a 400 (see get_list_args).
 
     Returns:
-        Response: JSON list of node dicts.
+        Response: JSON list of note dicts, or error.
     """
-    notes_rows = notes_table.get_all_notes()
-    return jsonify([dict(note_row) for note_row in notes_rows])
+    try:
+        fields, filters, after, limit = get_list_args()
+        notes_rows = notes_table.get_all_notes(fields, filters, after, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return list_response(notes_rows, limit)
 
 
 @app.route("/api/projects", methods=['POST'])
@@ -172,17 +591,6 @@ def delete_project(project_id):
         Response: JSON message confirming deletion.
     """
     projects_table.remove_project(project_id)
-    assets = assets_table.get_assets_from_project(project_id)
-    shots = shots_table.get_shots_from_project(project_id)
-
-    items = assets + shots
-    
-    for item in items:
-        notes_table.remove_notes(item["id"])
-    
-    shots_table.remove_shots_from_project(project_id)
-    assets_table.remove_assets_from_project(project_id)
-
     return jsonify({"message": "Project deleted"}), 200
     
 @app.route("/api/projects/<int:project_id>", methods=['GET'])
@@ -194,12 +602,9 @@ def display_project(project_id):
         project_id (int): The ID of the project.
     
     Returns:
-        Response: JSON dict with project data.
+        Response: JSON dict with project data, or 304 if If-None-Match holds the current ETag.
     """
-    row = projects_table.get_project(project_id)
-    if row is None:
-        return jsonify({"error": "Project not found"}), 404
-    return jsonify(dict(row))
+    return conditional_response(project_id, lambda: project_view(project_id))
 
 @app.route("/api/projects/<int:project_id>/shots", methods=['GET'])
 def display_shots_for_project(project_id):
@@ -210,10 +615,9 @@ def display_shots_for_project(project_id):
         project_id (int): The ID of the project.
 
     Returns:
-        Response: JSON list of shot dicts with the same project_id.
+        Response: JSON list of shot dicts with the same project_id, or 304 if If-None-Match holds the current ETag.
     """
-    shots = shots_table.get_shots_from_project(project_id)
-    return jsonify([dict(shot) for shot in shots])
+    return conditional_response(project_id, lambda: project_shots_view(project_id))
 
 @app.route("/api/projects/<int:project_id>/assets", methods=['GET'])
 def display_assets_for_project(project_id):
@@ -224,10 +628,59 @@ def display_assets_for_project(project_id):
         project_id (int): The ID of the project.
 
     Returns:
-        Response: JSON list of asset dicts with the same project_id.
+        Response: JSON list of asset dicts with the same project_id, or 304 if If-None-Match holds the current ETag.
+    """
+    return conditional_response(project_id, lambda: project_assets_view(project_id))
+
+@app.route("/api/projects/<int:project_id>/snapshot", methods=['GET'])
+def display_project_snapshot(project_id):
+    """
+    Gets a project with its shots, assets, note counts and members in one response,
+    read from a single transaction.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        Response: JSON dict with project, revision, shots, assets, note_counts and members,
+        or 304 if If-None-Match holds the current ETag.
+    """
+    return conditional_response(project_id, lambda: snapshot_view(project_id))
+
+@app.route("/api/projects/<int:project_id>/stats", methods=['GET'])
+def display_project_stats(project_id):
+    """
+    Gets the number of shots and assets of a project and how many are in each status,
+    per status column (e.g. how many lay_status are 'Complete').
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        Response: JSON dict of counts per item type and status column, or 304 if If-None-Match holds the current ETag.
+    """
+    return conditional_response(project_id, lambda: stats_view(project_id))
+
+@app.route("/api/projects/<int:project_id>/changes", methods=['GET'])
+def project_changes(project_id):
+    """
+    Gets the shots, assets and notes of a project that changed after a revision.
+    Clients store the returned revision and pass it as `since` on their next sync.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Query args:
+        since (int, optional): The revision of the last sync. Defaults to 0, i.e. everything.
+
+    Returns:
+        Response: JSON dict with the current revision, the changed shots, assets and notes,
+        and the IDs of deleted items, or error.
     """
-    assets = assets_table.get_assets_from_project(project_id)
-    return jsonify([dict(asset) for asset in assets])
+    try:
+        return jsonify(changes_view(project_id, request.args.get("since")))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
 
 @app.route("/api/projects/<int:project_id>/shots/<int:shot_id>", methods = ['PATCH'])
 def change_shot_status(project_id, shot_id):
@@ -250,9 +703,62 @@ def change_shot_status(project_id, shot_id):
     value = data.get("value")
     if not status_item or value is None:
         return jsonify({"error" : "Missing required components to update the shot"})
-    shots_table.change_shot_status(shot_id, status_item, value)
+    try:
+        shots_table.change_shot_status(shot_id, status_item, value)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
     return jsonify({"message" : "Shot updated"})
 
+def get_status_changes():
+    """
+    Reads the list of status changes of a batch PATCH request.
+
+    Request JSON:
+        changes (list[dict]): Every change has an id, a status_item and a value.
+
+    Returns:
+        list[tuple]: (item_id, status_item, value) for every change.
+
+    Raises:
+        ValueError: If the list is missing or empty, or a change is incomplete or not made of strings.
+    """
+    data = request.get_json(silent=True) or {}
+    changes = data.get("changes")
+    if not isinstance(changes, list) or not changes:
+        raise ValueError("Missing list of changes")
+    parsed = []
+    for change in changes:
+        if not isinstance(change, dict) or not change.get("status_item") or change.get("value") is None:
+            raise ValueError("Every change needs an id, a status_item and a value")
+        if not isinstance(change["status_item"], str) or not isinstance(change["value"], str):
+            raise ValueError("The status_item and value of every change must be strings")
+        try:
+            item_id = int(change.get("id"))
+        except (TypeError, ValueError):
+            raise ValueError("Every change needs an integer id")
+        parsed.append((item_id, change["status_item"], change["value"]))
+    return parsed
+
+@app.route("/api/projects/<int:project_id>/shots", methods = ['PATCH'])
+def change_shot_statuses(project_id):
+    """
+    Updates the statuses of many shots of a project in one transaction.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Request JSON:
+        changes (list[dict]): {"id": shot_id, "status_item": field, "value": new status} per change.
+
+    Returns:
+        Response: JSON with the number of updated shots, or error.
+    """
+    try:
+        updated = shots_table.change_shot_statuses(project_id, get_status_changes())
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    return jsonify({"message": "Shots updated", "updated": updated})
+
 @app.route("/api/projects/<int:project_id>/assets/<int:asset_id>", methods=['PATCH'])
 def change_asset_status(project_id, asset_id):
     """
@@ -274,9 +780,32 @@ def change_asset_status(project_id, asset_id):
     value = data.get("value")
     if not status_item or value is None:
         return jsonify({"error" : "Missing required components to update the asset"})
-    assets_table.change_asset_status(asset_id, status_item, value)
+    try:
+        assets_table.change_asset_status(asset_id, status_item, value)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
     return jsonify({"message" : "Asset updated"})
 
+@app.route("/api/projects/<int:project_id>/assets", methods = ['PATCH'])
+def change_asset_statuses(project_id):
+    """
+    Updates the statuses of many assets of a project in one transaction.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Request JSON:
+        changes (list[dict]): {"id": asset_id, "status_item": field, "value": new status} per change.
+
+    Returns:
+        Response: JSON with the number of updated assets, or error.
+    """
+    try:
+        updated = assets_table.change_asset_statuses(project_id, get_status_changes())
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    return jsonify({"message": "Assets updated", "updated": updated})
+
 @app.route("/api/users", methods = ['POST'])
 def create_new_user():
     """
@@ -296,7 +825,10 @@ def create_new_user():
     name = data.get("user_name")
     password = data.get("user_password")
 
-    user_id = users_table.add_user(name, password)
+    try:
+        user_id = users_table.add_user(name, password)
+    except HasherBusy as error:
+        return busy_response(error, 1)
     return jsonify({"message": "New user created!"})
 
 @app.route("/api/login", methods = ['POST'])
@@ -309,7 +841,8 @@ def login_user():
         user_password (str): The plaintext password.
 
     Returns:
-        Response: JSON with success status and user ID, or error message.
+        Response: JSON with success status, user ID and a session token to send as
+        'Authorization: Bearer <token>', or error message.
     """
 
     data = request.get_json()
@@ -319,12 +852,62 @@ def login_user():
     name = data.get("user_name")
     password = data.get("user_password")
 
-    success, user_id = users_table.verify_user(name, password)
+    retry_after = login_throttle.attempt(name, request.remote_addr)
+    if retry_after:
+        response = jsonify({"success": False, "error": "Too many login attempts, try again later"})
+        response.headers["Retry-After"] = str(math.ceil(retry_after))
+        return response, 429
+    try:
+        success, user_id = users_table.verify_user(name, password)
+    except HasherBusy as error:
+        return busy_response(error, 1)
     if success:
-        return jsonify({"success": True, "user_id": user_id}), 200
+        token, expires_at = sessions_table.create_session(user_id)
+        return jsonify({"success": True, "user_id": user_id, "token": token, "expires_at": expires_at}), 200
     else:
         return jsonify({"success": False, "error": "Invalid username or password!"})
 
+@app.route("/api/logout", methods = ['POST'])
+def logout_user():
+    """
+    Revokes the session token of the request.
+
+    Returns:
+        Response: JSON message confirming logout.
+    """
+    token = get_bearer_token()
+    if token:
+        sessions_table.revoke(token)
+    return jsonify({"message": "Logged out"})
+
+@app.route("/api/logout_all", methods = ['POST'])
+def logout_user_everywhere():
+    """
+    Revokes every session of the request's user, e.g. after a lost device.
+
+    Returns:
+        Response: JSON message confirming logout, or 401 if the token is missing, expired or revoked.
+    """
+    user_id = get_session_user_id()
+    if user_id is None:
+        return jsonify({"error": "Not logged in"}), 401
+    sessions_table.revoke_user(user_id)
+    return jsonify({"message": "Logged out everywhere"})
+
+@app.route("/api/session", methods = ['GET'])
+def current_session():
+    """
+    Gets the user of the request's session token.
+
+    Returns:
+        Response: JSON with the user ID and name, or 401 if the token is missing, expired or revoked.
+    """
+    user_id = get_session_user_id()
+    user = users_table.get_user(user_id) if user_id is not None else None
+    if user is None:
+        return jsonify({"error": "Not logged in"}), 401
+    return jsonify({"user_id": user_id, "user_name": user["user_name"]})
+
 @app.route("/api/projects/<int:project_id>/share", methods = ['GET'])
 def share_project(project_id):
     """
@@ -366,6 +949,26 @@ def join_project():
     usersProjects_table.add_assignment(user_id, project_id, "Member")
     return jsonify({"message": "Project joined!", "project_id": project_id})
 
+@app.route("/api/cache", methods=['GET'])
+def cache_stats():
+    """
+    Gets the hit/miss counters and size of the project view cache.
+
+    Returns:
+        Response: JSON dict of cache stats.
+    """
+    return jsonify(project_cache.stats())
+
+@app.route("/api/auth/stats", methods=['GET'])
+def auth_stats():
+    """
+    Gets the queue depth and counters of the password hashing pool and the login throttle.
+
+    Returns:
+        Response: JSON dict with 'hasher' and 'throttle' stats.
+    """
+    return jsonify({"hasher": get_hasher().stats(), "throttle": login_throttle.stats()})
+
 @app.route("/api/ping")
 def ping():
     """
@@ -427,6 +1030,30 @@ def create_shot(project_id):
     shot = shots_table.get_shot_from_project(project_id, shot_id)
     return jsonify(dict(shot)), 201
 
+@app.route("/api/projects/<int:project_id>/create_shots", methods=['POST'])
+def create_shots(project_id):
+    """
+    Creates several shots for a project in one go.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Request JSON:
+        shot_names (list[str]): The names of the shots.
+
+    Returns:
+        Response: JSON with the new shot IDs, or error.
+    """
+    data = request.get_json()
+    shot_names = data.get("shot_names")
+    if not shot_names or not isinstance(shot_names, list):
+        return jsonify({"error": "Missing shot names"}), 400
+    if not all(isinstance(shot_name, str) and shot_name for shot_name in shot_names):
+        return jsonify({"error": "Shot names must be non-empty strings"}), 400
+
+    shot_ids = shots_table.add_shots(project_id, shot_names)
+    return jsonify({"project_id": project_id, "shot_ids": shot_ids}), 201
+
 @app.route("/api/projects/<int:project_id>/assets/<int:asset_id>", methods=['GET'])
 def display_asset(project_id, asset_id):
     """
@@ -437,10 +1064,9 @@ def display_asset(project_id, asset_id):
         asset_id (int): The ID of the asset.
 
     Returns:
-        Response: JSON dict with the asset.
+        Response: JSON dict with the asset, 404, or 304 if If-None-Match holds the current ETag.
     """
-    asset = assets_table.get_asset_from_project(project_id, asset_id)
-    return jsonify(dict(asset))
+    return conditional_response(project_id, lambda: asset_view(project_id, asset_id))
 
 @app.route("/api/projects/<int:project_id>/shots/<int:shot_id>", methods=['GET'])
 def display_shot(project_id, shot_id):
@@ -452,10 +1078,79 @@ def display_shot(project_id, shot_id):
         asset_id (int): The ID of the shot.
 
     Returns:
-        Response: JSON dict with the shot.
+        Response: JSON dict with the shot, 404, or 304 if If-None-Match holds the current ETag.
     """
-    shot = shots_table.get_shot_from_project(project_id, shot_id)
-    return jsonify(dict(shot))
+    return conditional_response(project_id, lambda: shot_view(project_id, shot_id))
+
+@app.route("/api/projects/<int:project_id>/notes", methods=['GET'])
+def display_project_notes(project_id):
+    """
+    Gets the notes of a project in the order they were written, as a feed.
+    Supports fields=, after=, limit=, stream= and column filters like /api/notes,
+    unknown columns are a 400 (see get_list_args).
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Returns:
+        Response: JSON list of note dicts, or error.
+    """
+    try:
+        fields, filters, after, limit = get_list_args()
+        filters.pop("project_id", None)
+        notes_rows = notes_table.get_project_notes(project_id, filters, after, limit, fields)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return list_response(notes_rows, limit)
+
+@app.route("/api/projects/<int:project_id>/notes/counts", methods=['GET'])
+def display_project_note_counts(project_id):
+    """
+    Gets the number of notes per item and department of a project, for badges.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Query args:
+        since (int, optional): The id of the last note the client has seen; newer notes are counted as unread.
+
+    Returns:
+        Response: JSON list of dicts with item_type, item_id, item_dept, count, unread and latest_id.
+        Without since, 304 if If-None-Match holds the current ETag.
+    """
+    since = request.args.get("since")
+    if since is None:
+        return conditional_response(project_id, lambda: note_counts_view(project_id))
+    try:
+        return jsonify(note_counts_view(project_id, since))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+@app.route("/api/projects/<int:project_id>/notes/search", methods=['GET'])
+def search_project_notes(project_id):
+    """
+    Searches the notes of a project by their text, best matches first.
+
+    Args:
+        project_id (int): The ID of the project.
+
+    Query args:
+        q (str): The search text. Every word has to match.
+        limit (int, optional): The page size, 20 by default.
+        offset (int, optional): The number of results to skip.
+
+    Returns:
+        Response: JSON dict with the 'results' (note dicts with a 'snippet' and a 'rank') and
+        the 'next_offset' of the following page (None on the last page), or error.
+    """
+    try:
+        limit = page_size(request.args.get("limit", SEARCH_PAGE_SIZE))
+        offset = int(request.args.get("offset", 0))
+        results = notes_table.search_notes(project_id, request.args.get("q", ""), limit, offset)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    next_offset = offset + len(results) if len(results) == limit else None
+    return jsonify({"results": results, "next_offset": next_offset})
 
 @app.route("/api/projects/<int:project_id>/<item_type>/<int:item_id>/<item_dept>/notes", methods=['GET'])
 def display_notes(project_id, item_type, item_id, item_dept):
@@ -469,10 +1164,9 @@ def display_notes(project_id, item_type, item_id, item_dept):
         item_dept (str): The department.
 
     Returns:
-        Response: JSON list of note dicts.
+        Response: JSON list of note dicts, or 304 if If-None-Match holds the current ETag.
     """
-    notes = notes_table.get_notes_for_dept(item_type, item_id, item_dept)
-    return jsonify([dict(note) for note in notes])
+    return conditional_response(project_id, lambda: dept_notes_view(item_type, item_id, item_dept))
 
 @app.route("/api/projects/<int:project_id>/<item_type>/<int:item_id>/<item_dept>/notes", methods=['POST'])
 def add_note(project_id, item_type, item_id, item_dept):
@@ -489,14 +1183,21 @@ def add_note(project_id, item_type, item_id, item_dept):
         note_body (str): The content of the note.
 
     Returns:
-        Response: JSON dict with the new note, or error.
+        Response: JSON dict with the new note, or error. The author is the user of the
+        request's session token, 'janedoe' without one.
     """
     data = request.get_json()
     note_body = data.get("note_body")
     if not note_body:
         return jsonify({"error" : "Missing the note itself"}), 400
+
+    author = "janedoe"
+    user_id = get_session_user_id()
+    if user_id is not None:
+        user = users_table.get_user(user_id)
+        author = user["user_name"] if user else author
     
-    new_note_id = notes_table.add_note(item_type, item_id, item_dept, note_body, user="janedoe")
+    new_note_id = notes_table.add_note(item_type, item_id, item_dept, note_body, user=author, project_id=project_id)
     new_note = notes_table.get_note_by_id(new_note_id)
     return jsonify(dict(new_note)), 201
 
@@ -0,0 +1,236 @@
+"""
+Versioned schema migrations for the Tracktor database.
+
+The schema version is stored in SQLite's user_version pragma.
+migrate() first creates any missing tables through the table classes, then applies
+every migration newer than the stored version, each in its own transaction.
+Migration steps only add to the schema (columns, indexes, backfills), so they can run
+against a live database while the server keeps serving requests.
+"""
+
+import logging
+from db_pool import get_pool
+from projects_table import Projects
+from shots_table import Shots, shot_sort_key, STATUS_COLUMNS as SHOT_STATUS_COLUMNS
+from users_table import Users
+from usersProjects_table import UsersProjects
+from assets_table import Assets, STATUS_COLUMNS as ASSET_STATUS_COLUMNS
+from notes_table import Notes, create_notes_search, rebuild_notes_search
+from revisions_table import Revisions, CHANGE_TABLES
+from stats_table import create_status_counts, rebuild_status_counts
+from sessions_table import Sessions
+
+logger = logging.getLogger(__name__)
+
+
+def column_exists(connection, table, column):
+    """
+    Checks whether a table already has a column.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+        table (str): The table name.
+        column (str): The column name.
+
+    Returns:
+        bool: True if the column exists.
+    """
+    columns = connection.execute(f"PRAGMA table_info({table})").fetchall()
+    return any(row["name"] == column for row in columns)
+
+
+def add_column(connection, table, column, definition):
+    """
+    Adds a column to a table, unless the table was already created with it.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+        table (str): The table name.
+        column (str): The column name.
+        definition (str): The column type and constraints.
+    """
+    if not column_exists(connection, table, column):
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _index_foreign_keys(connection):
+    """
+    Indexes the columns the table classes filter on.
+    """
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_shots_project_id ON shots(project_id)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_assets_project_id ON assets(project_id)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_notes_item ON notes(item_type, item_id, item_dept)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_usersProjects_user_id ON usersProjects(user_id, project_id)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_users_user_name ON users(user_name)")
+
+
+def _add_shot_sort_key(connection):
+    """
+    Stores a numeric sort key per shot, so shot lists come back in index order.
+    """
+    add_column(connection, "shots", "sort_key", "INTEGER NOT NULL DEFAULT 0")
+    rows = connection.execute("SELECT id, shot_name FROM shots").fetchall()
+    connection.executemany("UPDATE shots SET sort_key = ? WHERE id = ?",
+                           [(shot_sort_key(row["shot_name"]), row["id"]) for row in rows])
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_shots_project_sort ON shots(project_id, sort_key)")
+    # the new index starts with project_id, so the old one is redundant
+    connection.execute("DROP INDEX IF EXISTS idx_shots_project_id")
+
+
+def _backfill_note_projects(connection):
+    """
+    Gives notes without a project the project of their shot or asset.
+    """
+    connection.execute("""
+                        UPDATE notes SET project_id = (SELECT project_id FROM shots WHERE shots.id = notes.item_id)
+                        WHERE project_id IS NULL AND item_type IN ('shot', 'shots')
+                        """)
+    connection.execute("""
+                        UPDATE notes SET project_id = (SELECT project_id FROM assets WHERE assets.id = notes.item_id)
+                        WHERE project_id IS NULL AND item_type IN ('asset', 'assets')
+                        """)
+
+
+def _add_change_tracking(connection):
+    """
+    Stamps shots, assets and notes with the project revision of their last write,
+    and gives notes their project, so a project's changes can be read by index.
+    """
+    add_column(connection, "shots", "revision", "INTEGER NOT NULL DEFAULT 0")
+    add_column(connection, "assets", "revision", "INTEGER NOT NULL DEFAULT 0")
+    add_column(connection, "notes", "revision", "INTEGER NOT NULL DEFAULT 0")
+    add_column(connection, "notes", "project_id", "INTEGER")
+    _backfill_note_projects(connection)
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_shots_project_revision ON shots(project_id, revision)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_assets_project_revision ON assets(project_id, revision)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_notes_project_revision ON notes(project_id, revision)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_deleted_items_project_revision ON deleted_items(project_id, revision)")
+
+
+def _add_status_counts(connection):
+    """
+    Counts the statuses of existing shots and assets, which the status_counts triggers keep up to date from then on.
+    """
+    create_status_counts(connection, "shots", SHOT_STATUS_COLUMNS)
+    create_status_counts(connection, "assets", ASSET_STATUS_COLUMNS)
+    rebuild_status_counts(connection, "shots", SHOT_STATUS_COLUMNS)
+    rebuild_status_counts(connection, "assets", ASSET_STATUS_COLUMNS)
+
+
+def _index_sessions(connection):
+    """
+    Indexes sessions by user for revoking, and by expiry for purging.
+    """
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)")
+
+
+def _index_note_bodies(connection):
+    """
+    Indexes the bodies of existing notes for full-text search, which the notes_fts triggers keep up to date from then on.
+    """
+    create_notes_search(connection)
+    rebuild_notes_search(connection)
+
+
+def _index_project_notes(connection):
+    """
+    Indexes notes by project, in id order for the note feed and per item and department for
+    the note counts, after giving the project to notes whose shot or asset was made after migration 3.
+    """
+    _backfill_note_projects(connection)
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_notes_project_feed ON notes(project_id, id)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_notes_project_item ON notes(project_id, item_type, item_id, item_dept)")
+
+
+def _stamp_untracked_rows(connection):
+    """
+    Gives shots, assets and notes that predate change tracking revision 1, and every project
+    with such rows at least revision 1, so a sync from revision 0 returns them.
+    Migration 3 left them at revision 0, which no 'revision > since' query ever matches.
+    """
+    for table in CHANGE_TABLES:
+        connection.execute(f"UPDATE {table} SET revision = 1 WHERE revision = 0 AND project_id IS NOT NULL")
+        connection.execute(f"""
+                            INSERT INTO project_revisions(project_id, revision)
+                            SELECT DISTINCT project_id, 1 FROM {table} WHERE project_id IS NOT NULL
+                            ON CONFLICT(project_id) DO NOTHING
+                            """)
+
+
+# (version, description, step) - append new migrations to the end, never edit old ones
+MIGRATIONS = [
+    (1, "Index foreign-key and lookup columns", _index_foreign_keys),
+    (2, "Add shots.sort_key", _add_shot_sort_key),
+    (3, "Track the revision of shots, assets and notes", _add_change_tracking),
+    (4, "Count shot and asset statuses per project", _add_status_counts),
+    (5, "Index sessions", _index_sessions),
+    (6, "Index note bodies for full-text search", _index_note_bodies),
+    (7, "Index notes by project for the feed and counts", _index_project_notes),
+    (8, "Stamp rows that predate change tracking with revision 1", _stamp_untracked_rows),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(db_name):
+    """
+    Gets the schema version of the database.
+
+    Args:
+        db_name (str): The name of the SQLite database file.
+
+    Returns:
+        int: The schema version, 0 for a database that was never migrated.
+    """
+    with get_pool(db_name).connection() as connection:
+        return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def create_tables(db_name):
+    """
+    Creates all the tables that don't exist yet.
+
+    Args:
+        db_name (str): The name of the SQLite database file.
+    """
+    Projects(db_name).init_project_table()
+    Shots(db_name).init_shots_table()
+    Users(db_name).init_users_table()
+    UsersProjects(db_name).init_usersProjects_table()
+    Assets(db_name).init_assets_table()
+    Notes(db_name).init_notes_table()
+    Revisions(db_name).init_revisions_table()
+    Sessions(db_name).init_sessions_table()
+
+
+def migrate(db_name):
+    """
+    Brings the database up to the latest schema version.
+
+    Args:
+        db_name (str): The name of the SQLite database file.
+
+    Returns:
+        list[int]: The versions that were applied.
+    """
+    create_tables(db_name)
+
+    applied = []
+    if get_version(db_name) >= LATEST_VERSION:
+        return applied
+
+    with get_pool(db_name).connection() as connection:
+        for version, description, step in MIGRATIONS:
+            # take the write lock before checking, so concurrent workers don't apply a step twice
+            connection.execute("BEGIN IMMEDIATE")
+            current = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version <= current:
+                connection.rollback()
+                continue
+            step(connection)
+            connection.execute(f"PRAGMA user_version = {int(version)}")
+            connection.commit()
+            logger.info("Applied migration %d: %s", version, description)
+            applied.append(version)
+    return applied
@@ -1,10 +1,174 @@
 #!/usr/bin/env -S uv run --script
 
+import re
+import html
 import sqlite3
 import datetime
 from sqlite3 import Error
+from db_pool import get_pool
+from queries import list_rows, page_size
+from revisions_table import bump_revision, create_revisions_table, record_deletions
+from project_cache import invalidate_projects
 from pathlib import Path
 
+# notes written before notes.project_id existed belong to a project through their shot or asset
+LEGACY_PROJECT_NOTES = {
+    "shots": "(notes.project_id IS NULL AND notes.item_type IN ('shot', 'shots') "
+             "AND notes.item_id IN (SELECT id FROM shots WHERE project_id = ?))",
+    "assets": "(notes.project_id IS NULL AND notes.item_type IN ('asset', 'assets') "
+              "AND notes.item_id IN (SELECT id FROM assets WHERE project_id = ?))",
+}
+SEARCH_PAGE_SIZE = 20
+SNIPPET_TOKENS = 12
+SNIPPET_MARKS = ("<mark>", "</mark>")
+# FTS5 marks the matches with these control characters so the note text can be escaped first
+SNIPPET_SENTINELS = ("\x02", "\x03")
+
+
+def create_notes_search(connection):
+    """
+    Creates the notes_fts full-text index over note bodies if it doesn't already exist, and the
+    triggers that keep it in step with the notes table. Every add_note, remove_notes and project
+    deletion updates the index inside its own transaction.
+
+    notes_fts is an external-content FTS5 table, so note bodies aren't stored twice.
+    Without FTS5 in the SQLite build nothing is created and search_notes falls back to LIKE.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+
+    Returns:
+        bool: True if the index exists.
+    """
+    try:
+        connection.execute("""
+                            CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                            note_body,
+                            content='notes',
+                            content_rowid='id',
+                            tokenize='porter unicode61'
+                            )
+                            """)
+    except sqlite3.OperationalError:
+        return False
+
+    connection.execute("""
+                        CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+                        INSERT INTO notes_fts(rowid, note_body) VALUES (NEW.id, NEW.note_body);
+                        END
+                        """)
+    connection.execute("""
+                        CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+                        INSERT INTO notes_fts(notes_fts, rowid, note_body) VALUES ('delete', OLD.id, OLD.note_body);
+                        END
+                        """)
+    connection.execute("""
+                        CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF note_body ON notes BEGIN
+                        INSERT INTO notes_fts(notes_fts, rowid, note_body) VALUES ('delete', OLD.id, OLD.note_body);
+                        INSERT INTO notes_fts(rowid, note_body) VALUES (NEW.id, NEW.note_body);
+                        END
+                        """)
+    return True
+
+
+def rebuild_notes_search(connection):
+    """
+    Re-indexes every note body, e.g. for notes written before the index existed.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+    """
+    if has_notes_search(connection):
+        connection.execute("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+
+
+def has_notes_search(connection):
+    """
+    Checks whether the full-text index exists.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+
+    Returns:
+        bool: True if notes_fts exists.
+    """
+    row = connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'").fetchone()
+    return row is not None
+
+
+def project_notes_condition(connection, project_id):
+    """
+    Builds the WHERE condition matching the notes of a project.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+        project_id (int): The ID of the project.
+
+    Returns:
+        tuple: (str, list) the condition and its parameters.
+    """
+    existing = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conditions = ["notes.project_id = ?"]
+    for table, condition in LEGACY_PROJECT_NOTES.items():
+        if table in existing:
+            conditions.append(condition)
+    return "(" + " OR ".join(conditions) + ")", [project_id] * len(conditions)
+
+
+def search_terms(query):
+    """
+    Splits a search query into words. Punctuation is dropped, so user input can't form
+    FTS5 syntax (quotes, NEAR, column filters) or LIKE wildcards.
+
+    Args:
+        query (str): The search text, e.g. 'fix the flicker on the cape'.
+
+    Returns:
+        list[str]: The words of the query.
+    """
+    return re.findall(r"\w+", query or "")
+
+
+def mark_snippet(snippet):
+    """
+    Escapes an FTS5 snippet for HTML and turns its sentinel marks into <mark></mark>.
+
+    Args:
+        snippet (str): The snippet, with the matches between SNIPPET_SENTINELS.
+
+    Returns:
+        str: The escaped snippet, with the matches marked.
+    """
+    escaped = html.escape(snippet or "")
+    for sentinel, mark in zip(SNIPPET_SENTINELS, SNIPPET_MARKS):
+        escaped = escaped.replace(sentinel, mark)
+    return escaped
+
+
+def like_snippet(body, terms, size=SNIPPET_TOKENS):
+    """
+    Cuts a snippet around the first matching word of a note, for searches without FTS5.
+
+    Args:
+        body (str): The note body.
+        terms (list[str]): The search words.
+        size (int): The number of words in the snippet.
+
+    Returns:
+        str: The HTML-escaped snippet, with the matching words marked.
+    """
+    words = body.split()
+    lowered = [term.lower() for term in terms]
+
+    def matches(word):
+        return any(term in word.lower() for term in lowered)
+
+    first = next((i for i, word in enumerate(words) if matches(word)), 0)
+    start = max(0, min(first - size // 2, len(words) - size))
+    shown = [f"{SNIPPET_MARKS[0]}{html.escape(word)}{SNIPPET_MARKS[1]}" if matches(word) else html.escape(word)
+             for word in words[start:start + size]]
+    return ("..." if start > 0 else "") + " ".join(shown) + ("..." if start + size < len(words) else "")
+
 
 class Notes:
     """
@@ -29,36 +193,38 @@ class Notes:
 
     def get_db(self):
         """
-        Opens the named database or creates one if it doesn't exist.
+        Gets a pooled connection to the named database, creating the db if it doesn't exist.
+        Closing the connection returns it to the pool.
         
         Returns:
             sqlite3.Connection: The db connection object.
         """
-        connection = sqlite3.connect(self.db_name)
-        connection.row_factory = sqlite3.Row
-        return connection
+        return get_pool(self.db_name).connect()
     
     def init_notes_table(self):
         """
         Creates an SQL table for notes if it doesn't already exist.
         """
-        connection = self.get_db()
-        connection.execute("""
-                            CREATE TABLE IF NOT EXISTS notes(
-                           id INTEGER PRIMARY KEY AUTOINCREMENT,
-                           item_type TEXT NOT NULL,
-                           item_id INTEGER,
-                           item_dept TEXT NOT NULL,
-                           timestamp TEXT NOT NULL,
-                           note_body TEXT NOT NULL,
-                           author TEXT NOT NULL
-                           )
-                           """
-                           )
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("""
+                                CREATE TABLE IF NOT EXISTS notes(
+                               id INTEGER PRIMARY KEY AUTOINCREMENT,
+                               item_type TEXT NOT NULL,
+                               item_id INTEGER,
+                               item_dept TEXT NOT NULL,
+                               timestamp TEXT NOT NULL,
+                               note_body TEXT NOT NULL,
+                               author TEXT NOT NULL,
+                               project_id INTEGER,
+                               revision INTEGER NOT NULL DEFAULT 0
+                               )
+                               """
+                               )
+            create_revisions_table(connection)
+            create_notes_search(connection)
+            connection.commit()
 
-    def add_note(self, item_type, item_id, item_dept, message, user, timestamp=None ):
+    def add_note(self, item_type, item_id, item_dept, message, user, timestamp=None, project_id=None):
         """
         Creates a note to a specified item
         
@@ -69,29 +235,34 @@ class Notes:
             message (str): The note body.
             user (str): The author of the note.
             timestamp (str): The timestamp for the note. If None, uses current time.
+            project_id (int, optional): The ID of the item's project. Its revision is bumped
+                and the note shows up in the project's changes.
 
         Returns:
             int: The ID of the newly created note.
         """
         if timestamp is None:
             timestamp = datetime.datetime.now().isoformat(timespec='minutes')
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute("""
-                        INSERT INTO notes(
-                       item_type,
-                       item_id,
-                       item_dept,
-                       timestamp,
-                       note_body,
-                       author
-                       )
-                       VALUES(?, ?, ?, ?, ?, ?)
-                       """,
-                       (item_type, item_id, item_dept, timestamp, message, user))
-        connection.commit()
-        note_id = cursor.lastrowid
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            revision = bump_revision(connection, project_id) if project_id is not None else 0
+            cursor.execute("""
+                            INSERT INTO notes(
+                           item_type,
+                           item_id,
+                           item_dept,
+                           timestamp,
+                           note_body,
+                           author,
+                           project_id,
+                           revision
+                           )
+                           VALUES(?, ?, ?, ?, ?, ?, ?, ?)
+                           """,
+                           (item_type, item_id, item_dept, timestamp, message, user, project_id, revision))
+            note_id = cursor.lastrowid
+            connection.commit()
+        invalidate_projects(self.db_name, [project_id])
         return note_id
     
     def get_notes(self, item_type, item_id):
@@ -105,23 +276,72 @@ class Notes:
         Returns:
             list[sqlite3.Row]: A list of note rows for the item.
         """
-        connection = self.get_db()
-        notes_rows = connection.execute("SELECT * FROM notes WHERE item_type = ? AND item_id = ?", (item_type, item_id)).fetchall()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            notes_rows = connection.execute("SELECT * FROM notes WHERE item_type = ? AND item_id = ?", (item_type, item_id)).fetchall()
         return notes_rows
     
-    def get_all_notes(self):
+    def get_all_notes(self, fields=None, filters=None, after=None, limit=None):
         """
-        Get all existing notes
-        
+        Streams all note rows, optionally filtered and paginated by id.
+
+        Args:
+            fields (list[str], optional): The columns to return. Defaults to all columns.
+            filters (dict, optional): Column -> value pairs to match (e.g. {'item_dept': 'LAY', 'author': 'janedoe'}).
+            after (int, optional): Only return rows with an id greater than this.
+            limit (int, optional): The maximum number of rows to return.
+
         Returns:
-            list[sqlite3.Row]: A list of all note rows.
+            Iterator[sqlite3.Row]: The note rows, ordered by id.
+
+        Raises:
+            ValueError: If a field or filter isn't a column of the table.
         """
-        connection = self.get_db()
-        notes_rows = connection.execute("SELECT * FROM notes").fetchall()
-        connection.close()
-        return notes_rows
+        return list_rows(self.get_db(), "notes", fields, filters, after, limit)
     
+    def get_project_notes(self, project_id, filters=None, after=None, limit=None, fields=None):
+        """
+        Streams the notes of a project in the order they were written, e.g. for a project-wide feed.
+        Poll with the id of the last note seen as `after` to get only the newer ones.
+
+        Args:
+            project_id (int): The ID of the project.
+            filters (dict, optional): Further column -> value pairs to match (e.g. {'item_dept': 'LAY'}).
+            after (int, optional): Only return notes with an id greater than this.
+            limit (int, optional): The maximum number of notes to return.
+            fields (list[str], optional): The columns to return. Defaults to all columns.
+
+        Returns:
+            Iterator[sqlite3.Row]: The note rows, ordered by id.
+
+        Raises:
+            ValueError: If a field or filter isn't a column of the table.
+        """
+        filters = dict(filters or {}, project_id=project_id)
+        return list_rows(self.get_db(), "notes", fields, filters, after, limit)
+
+    def get_note_counts(self, project_id, since=None):
+        """
+        Counts the notes of a project per item and department in one query, for badges.
+
+        Args:
+            project_id (int): The ID of the project.
+            since (int, optional): The id of the last note the client has seen. Notes after it
+                are counted as unread. Defaults to 0, so every note is unread.
+
+        Returns:
+            list[sqlite3.Row]: item_type, item_id, item_dept, count, unread and latest_id
+                (the id of the newest note) per item and department.
+        """
+        with get_pool(self.db_name).connection() as connection:
+            rows = connection.execute("""
+                                      SELECT item_type, item_id, item_dept, COUNT(*) AS count,
+                                      COUNT(CASE WHEN id > ? THEN 1 END) AS unread, MAX(id) AS latest_id
+                                      FROM notes WHERE project_id = ?
+                                      GROUP BY item_type, item_id, item_dept
+                                      ORDER BY item_type, item_id, item_dept
+                                      """, (int(since or 0), project_id)).fetchall()
+        return rows
+
     def get_notes_for_dept(self, item_type, item_id, item_dept):
         """
         Get all notes relevant to the item's dept (LAY, ANI), etc
@@ -135,9 +355,8 @@ class Notes:
             list[sqlite3.Row]: A list of note rows for the department.
         """
 
-        connection = self.get_db()
-        notes_rows = connection.execute("SELECT * FROM notes WHERE item_type = ? AND item_id = ? AND item_dept = ?", (item_type, item_id, item_dept)).fetchall()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            notes_rows = connection.execute("SELECT * FROM notes WHERE item_type = ? AND item_id = ? AND item_dept = ?", (item_type, item_id, item_dept)).fetchall()
         return notes_rows
     
     def get_note_by_id(self, note_id):
@@ -151,22 +370,89 @@ class Notes:
             sqlite3.Row: The note row, or None if not found.
         """
 
-        connection = self.get_db()
-        row = connection.execute("SELECT * FROM notes WHERE id = ?", (note_id,)).fetchone()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            row = connection.execute("SELECT * FROM notes WHERE id = ?", (note_id,)).fetchone()
         return row
 
-    def remove_notes(self, item_id):
+    def remove_notes(self, item_type, item_id):
         """
-        Removes all the notes associated with the item_id.
+        Removes all the notes associated with an item.
+        Shots and assets have separate ids, so the item type is matched as well.
 
         Args:
+            item_type (str): The type of item.
             item_id (int): The ID of the item (asset/shot) to select the notes from.
 
         """
 
-        connection = self.get_db()
-        connection.execute("DELETE FROM notes WHERE item_id = ?", (item_id,))
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            revisions = record_deletions(connection, "notes", "item_type = ? AND item_id = ?", (item_type, item_id))
+            connection.execute("DELETE FROM notes WHERE item_type = ? AND item_id = ?", (item_type, item_id))
+            connection.commit()
+        invalidate_projects(self.db_name, revisions)
+
+    def search_notes(self, project_id, query, limit=SEARCH_PAGE_SIZE, offset=0):
+        """
+        Searches the note bodies of a project. Every word of the query has to match;
+        with FTS5 words also match their other forms (e.g. 'flicker' finds 'flickering').
+
+        Args:
+            project_id (int): The ID of the project.
+            query (str): The search text.
+            limit (int, optional): The page size, capped at MAX_PAGE_SIZE. Defaults to SEARCH_PAGE_SIZE.
+            offset (int, optional): The number of results to skip.
+
+        Returns:
+            list[dict]: The matching notes, best match first, each with a 'snippet' of its body
+                (HTML-escaped, matches wrapped in <mark></mark>) and a 'rank'
+                (lower is better, None without FTS5).
+
+        Raises:
+            ValueError: If the query has no words, or limit/offset are invalid.
+        """
+        terms = search_terms(query)
+        if not terms:
+            raise ValueError("The search query needs at least one word")
+        limit = page_size(limit) or SEARCH_PAGE_SIZE
+        offset = int(offset or 0)
+        if offset < 0:
+            raise ValueError("offset can't be negative")
+
+        columns = "notes.id, notes.item_type, notes.item_id, notes.item_dept, notes.timestamp, notes.author, notes.project_id"
+        with get_pool(self.db_name).connection() as connection:
+            in_project, project_params = project_notes_condition(connection, project_id)
+            if has_notes_search(connection):
+                match = " ".join('"' + term + '"' for term in terms)
+                rows = connection.execute(f"""
+                                           SELECT {columns},
+                                           snippet(notes_fts, 0, ?, ?, '...', ?) AS snippet,
+                                           bm25(notes_fts) AS rank
+                                           FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid
+                                           WHERE notes_fts MATCH ? AND {in_project}
+                                           ORDER BY rank, notes.id
+                                           LIMIT ? OFFSET ?
+                                           """,
+                                          (*SNIPPET_SENTINELS, SNIPPET_TOKENS, match, *project_params, limit, offset)).fetchall()
+                results = [dict(row) for row in rows]
+                for result in results:
+                    result["snippet"] = mark_snippet(result["snippet"])
+                return results
+
+            conditions = " AND ".join(["notes.note_body LIKE ? ESCAPE '\\'"] * len(terms))
+            rows = connection.execute(f"""
+                                       SELECT {columns}, notes.note_body
+                                       FROM notes
+                                       WHERE {conditions} AND {in_project}
+                                       ORDER BY notes.id DESC
+                                       LIMIT ? OFFSET ?
+                                       """,
+                                      (*["%" + term.replace("_", "\\_") + "%" for term in terms],
+                                       *project_params, limit, offset)).fetchall()
 
+        results = []
+        for row in rows:
+            result = dict(row)
+            result["snippet"] = like_snippet(result.pop("note_body"), terms)
+            result["rank"] = None
+            results.append(result)
+        return results
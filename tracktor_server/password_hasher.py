@@ -0,0 +1,185 @@
+"""
+Bounded worker pool for bcrypt password hashing.
+
+bcrypt is deliberately slow, so hashes and checks run on a small dedicated thread pool
+(bcrypt releases the GIL while it works) instead of on the request threads. When more
+than TRACKTOR_HASH_QUEUE jobs are waiting, new ones are refused with HasherBusy instead
+of queueing up behind a login storm.
+
+    TRACKTOR_HASH_WORKERS      threads hashing in parallel, default 2
+    TRACKTOR_HASH_QUEUE        jobs allowed to wait for a thread, default 64
+    TRACKTOR_BCRYPT_ROUNDS     bcrypt work factor for new hashes, default 12
+"""
+
+import os
+import threading
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+
+
+class HasherBusy(Exception):
+    """
+    Raised when the hashing queue is full.
+    """
+
+
+class PasswordHasher:
+    """
+    Size-limited pool that hashes and checks bcrypt passwords.
+
+    Attributes:
+        workers (int): The number of hashing threads.
+        max_queue (int): The number of jobs allowed to wait for a thread.
+        rounds (int): The bcrypt work factor for new hashes.
+        completed (int): Jobs finished.
+        rejected (int): Jobs refused because the queue was full.
+    """
+
+    def __init__(self, workers=2, max_queue=64, rounds=12):
+        """
+        Initializes the pool. Threads are started on first use.
+
+        Args:
+            workers (int): The number of hashing threads.
+            max_queue (int): The number of jobs allowed to wait for a thread.
+            rounds (int): The bcrypt work factor, between 4 and 31.
+
+        Raises:
+            ValueError: If a value is out of range.
+        """
+        workers = int(workers)
+        max_queue = int(max_queue)
+        rounds = int(rounds)
+        if workers < 1 or max_queue < 0:
+            raise ValueError("workers must be positive and max_queue can't be negative")
+        if not 4 <= rounds <= 31:
+            raise ValueError(f"Invalid bcrypt rounds: {rounds}")
+
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.completed = 0
+        self.rejected = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tracktor-bcrypt")
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds a hasher from the TRACKTOR_HASH_* and TRACKTOR_BCRYPT_ROUNDS environment variables.
+
+        Returns:
+            PasswordHasher: The hasher, with defaults for unset variables.
+        """
+        return cls(workers=os.environ.get("TRACKTOR_HASH_WORKERS", 2),
+                   max_queue=os.environ.get("TRACKTOR_HASH_QUEUE", 64),
+                   rounds=os.environ.get("TRACKTOR_BCRYPT_ROUNDS", 12))
+
+    def _run(self, function, *args):
+        """
+        Runs a job on the pool and waits for its result.
+
+        Args:
+            function (callable): The bcrypt function.
+            *args: Its arguments.
+
+        Returns:
+            The function's return value.
+
+        Raises:
+            HasherBusy: If the queue is full.
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HasherBusy("Too many password checks in progress, try again shortly")
+            self._pending += 1
+        try:
+            return self._executor.submit(function, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+
+    def hash(self, password):
+        """
+        Hashes a password with a new salt.
+
+        Args:
+            password (str): The plaintext password.
+
+        Returns:
+            str: The bcrypt hash.
+
+        Raises:
+            HasherBusy: If the queue is full.
+        """
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode("utf-8"), salt).decode("utf-8")
+
+    def check(self, password, stored_hash):
+        """
+        Checks a password against a stored hash. Hashes keep working after the work factor changes,
+        since bcrypt hashes carry their own.
+
+        Args:
+            password (str): The plaintext password.
+            stored_hash (str or bytes): The bcrypt hash.
+
+        Returns:
+            bool: True if the password matches.
+
+        Raises:
+            HasherBusy: If the queue is full.
+        """
+        if isinstance(stored_hash, str):
+            stored_hash = stored_hash.encode("utf-8")
+        return self._run(bcrypt.checkpw, password.encode("utf-8"), stored_hash)
+
+    def stats(self):
+        """
+        Gets the pool counters.
+
+        Returns:
+            dict: workers, rounds, in_progress, queued, max_queue, completed and rejected.
+        """
+        with self._lock:
+            return {"workers": self.workers,
+                    "rounds": self.rounds,
+                    "in_progress": min(self._pending, self.workers),
+                    "queued": max(self._pending - self.workers, 0),
+                    "max_queue": self.max_queue,
+                    "completed": self.completed,
+                    "rejected": self.rejected}
+
+
+_hasher = None
+_hasher_pid = None
+
+
+def get_hasher():
+    """
+    Gets the password hasher of the process, reading the environment on first use.
+    A forked child gets its own, since the parent's threads don't survive the fork.
+
+    Returns:
+        PasswordHasher: The active hasher.
+    """
+    global _hasher, _hasher_pid
+    if _hasher is None or _hasher_pid != os.getpid():
+        _hasher = PasswordHasher.from_env()
+        _hasher_pid = os.getpid()
+    return _hasher
+
+
+def set_hasher(hasher):
+    """
+    Replaces the password hasher of the process.
+
+    Args:
+        hasher (PasswordHasher or None): The new hasher, or None to re-read the environment.
+    """
+    global _hasher, _hasher_pid
+    _hasher = hasher
+    _hasher_pid = os.getpid()
@@ -0,0 +1,202 @@
+"""
+In-process LRU cache for the serialised project views.
+
+Entries are keyed by project and request path and stored together with the project
+revision they were built from. A lookup only hits if the stored revision is still the
+project's current one, so a write committed by another worker or process is never
+served stale. On top of that every write method drops the project's entries straight
+away, and entries expire after a TTL.
+
+The cache is bounded by the total size of the cached bodies:
+
+    TRACKTOR_CACHE_MAX_BYTES   size limit in bytes, default 64 MiB, 0 disables the cache
+    TRACKTOR_CACHE_TTL         seconds an entry stays valid, default 300
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 300
+
+
+class ProjectCache:
+    """
+    Thread-safe LRU cache of response bodies, keyed by project.
+
+    Attributes:
+        max_bytes (int): The maximum total size of the cached bodies.
+        ttl (float): Seconds an entry stays valid.
+        hits (int): Lookups served from the cache.
+        misses (int): Lookups that had to rebuild the value.
+        evictions (int): Entries dropped to stay under max_bytes.
+        invalidations (int): Entries dropped by invalidate().
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_bytes (int): The maximum total size of the cached bodies.
+            ttl (float): Seconds an entry stays valid.
+
+        Raises:
+            ValueError: If max_bytes or ttl is negative.
+        """
+        max_bytes = int(max_bytes)
+        ttl = float(ttl)
+        if max_bytes < 0 or ttl < 0:
+            raise ValueError("max_bytes and ttl can't be negative")
+
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._size = 0
+        # (project_id, key) -> (revision, expires_at, body)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds a cache from the TRACKTOR_CACHE_* environment variables.
+
+        Returns:
+            ProjectCache: The cache, with defaults for unset variables.
+        """
+        return cls(max_bytes=os.environ.get("TRACKTOR_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+                   ttl=os.environ.get("TRACKTOR_CACHE_TTL", DEFAULT_TTL))
+
+    def get(self, project_id, key, revision):
+        """
+        Looks up a cached body.
+
+        Args:
+            project_id (int): The ID of the project.
+            key (str): The key of the view, e.g. the request path.
+            revision (int): The current revision of the project.
+
+        Returns:
+            bytes or None: The cached body, or None if it's missing, expired or from another revision.
+        """
+        with self._lock:
+            entry = self._entries.get((project_id, key))
+            if entry is not None:
+                entry_revision, expires_at, body = entry
+                if entry_revision == revision and expires_at > time.monotonic():
+                    self._entries.move_to_end((project_id, key))
+                    self.hits += 1
+                    return body
+                self._remove((project_id, key))
+            self.misses += 1
+            return None
+
+    def set(self, project_id, key, revision, body):
+        """
+        Stores a body, evicting the least recently used entries to stay under max_bytes.
+        Bodies bigger than max_bytes aren't stored.
+
+        Args:
+            project_id (int): The ID of the project.
+            key (str): The key of the view, e.g. the request path.
+            revision (int): The project revision the body was built from.
+            body (bytes): The serialised response body.
+        """
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove((project_id, key))
+            self._entries[(project_id, key)] = (revision, time.monotonic() + self.ttl, body)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, project_id=None):
+        """
+        Drops the cached entries of a project.
+
+        Args:
+            project_id (int, optional): The ID of the project. Drops every entry if None.
+        """
+        with self._lock:
+            keys = [entry_key for entry_key in self._entries if project_id is None or entry_key[0] == project_id]
+            for entry_key in keys:
+                self._remove(entry_key)
+            self.invalidations += len(keys)
+
+    def stats(self):
+        """
+        Gets the cache counters.
+
+        Returns:
+            dict: hits, misses, hit_rate, evictions, invalidations, entries, bytes, max_bytes and ttl.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "evictions": self.evictions,
+                    "invalidations": self.invalidations,
+                    "entries": len(self._entries),
+                    "bytes": self._size,
+                    "max_bytes": self.max_bytes,
+                    "ttl": self.ttl}
+
+    def _remove(self, entry_key):
+        """
+        Removes an entry if it exists. The lock must be held.
+
+        Args:
+            entry_key (tuple): The (project_id, key) of the entry.
+        """
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self._size -= len(entry[2])
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(db_name):
+    """
+    Gets the process-wide cache for a database file, creating it on first use.
+
+    Args:
+        db_name (str): The name of the SQLite database file.
+
+    Returns:
+        ProjectCache: The cache for the database.
+    """
+    cache = _caches.get(db_name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(db_name)
+            if cache is None:
+                cache = ProjectCache.from_env()
+                _caches[db_name] = cache
+    return cache
+
+
+def invalidate_projects(db_name, project_ids):
+    """
+    Drops the cached views of projects after a write. Called by the table write methods once they've committed.
+
+    Args:
+        db_name (str): The name of the SQLite database file.
+        project_ids (iterable[int]): The IDs of the projects that changed. None entries are skipped.
+    """
+    cache = _caches.get(db_name)
+    if cache is None:
+        return
+    for project_id in set(project_ids):
+        if project_id is not None:
+            cache.invalidate(project_id)
@@ -1,6 +1,22 @@
 import sqlite3
 import uuid
 from sqlite3 import Error
+from db_pool import get_pool
+from revisions_table import bump_revision, create_revisions_table
+from project_cache import invalidate_projects
+
+# (table, WHERE clause, number of project_id parameters) deleted together with a project.
+# Notes go first, they're matched through their shot or asset as well as their project_id,
+# since notes written before notes.project_id existed may not have one.
+PROJECT_CASCADE = [
+    ("notes", """project_id = ?
+                 OR (item_type IN ('shot', 'shots') AND item_id IN (SELECT id FROM shots WHERE project_id = ?))
+                 OR (item_type IN ('asset', 'assets') AND item_id IN (SELECT id FROM assets WHERE project_id = ?))""", 3),
+    ("shots", "project_id = ?", 1),
+    ("assets", "project_id = ?", 1),
+    ("usersProjects", "project_id = ?", 1),
+    ("deleted_items", "project_id = ?", 1),
+]
 
 
 class Projects:
@@ -27,33 +43,32 @@ class Projects:
 
     def get_db(self):
         """
-        Opens the named database or creates one if it doesn't exist.
+        Gets a pooled connection to the named database, creating the db if it doesn't exist.
+        Closing the connection returns it to the pool.
         
         Returns:
             sqlite3.Connection: The db connection object.
         """
-        connection = sqlite3.connect(self.db_name)
-        connection.row_factory = sqlite3.Row
-        return connection
+        return get_pool(self.db_name).connect()
     
     def init_project_table(self):
         """
         Creates an SQL table for projects if it doesn't already exist.
         """
-        connection = self.get_db()
-        connection.execute("""
-                                CREATE TABLE IF NOT EXISTS projects(
-                                id INTEGER PRIMARY KEY AUTOINCREMENT, 
-                                name TEXT NOT NULL,
-                                type TEXT NOT NULL,
-                                status TEXT,
-                                shotsNum INTEGER,
-                                deadline TEXT,
-                                project_sharecode TEXT
-                                )
-                                """)
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("""
+                                    CREATE TABLE IF NOT EXISTS projects(
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT, 
+                                    name TEXT NOT NULL,
+                                    type TEXT NOT NULL,
+                                    status TEXT,
+                                    shotsNum INTEGER,
+                                    deadline TEXT,
+                                    project_sharecode TEXT
+                                    )
+                                    """)
+            create_revisions_table(connection)
+            connection.commit()
 
     def get_projects(self):
         """
@@ -62,9 +77,8 @@ class Projects:
         Returns:
             list[sqlite3.Row]: A list of all project rows.
         """
-        connection = self.get_db()
-        rows = connection.execute("SELECT * FROM projects").fetchall()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            rows = connection.execute("SELECT * FROM projects").fetchall()
         return rows
     
     def add_project(self, name, type, status, shotsNum, deadline):
@@ -81,39 +95,52 @@ class Projects:
         Returns:
             int: The ID of the newly created project.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute("""
-                        INSERT INTO projects(
-                        name,
-                        type,
-                        status,
-                        shotsNum,
-                        deadline
-                        )
-                        VALUES(?, ?, ?, ?, ?)
-                       """,
-                       (name, type, status, shotsNum, deadline)
-                       )
-        connection.commit()
-        new_id = cursor.lastrowid
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("""
+                            INSERT INTO projects(
+                            name,
+                            type,
+                            status,
+                            shotsNum,
+                            deadline
+                            )
+                            VALUES(?, ?, ?, ?, ?)
+                           """,
+                           (name, type, status, shotsNum, deadline)
+                           )
+            new_id = cursor.lastrowid
+            bump_revision(connection, new_id)
+            connection.commit()
+        invalidate_projects(self.db_name, [new_id])
 
         new_project = {"id": new_id, "name": name}
         return new_id
     
     def remove_project(self, project_id):
         """
-        Deletes a chosen project from project table. Note that idex won't be reset.
+        Deletes a chosen project and everything that belongs to it: its notes, shots, assets,
+        user assignments and deleted item records. Note that idex won't be reset.
+
+        Everything is removed with one set-based DELETE per table inside a single transaction,
+        so an interrupted delete leaves the project untouched. Tables that haven't been created
+        yet are skipped. The revision counter is bumped rather than removed, so cached
+        responses for the project go stale.
 
         Args:
             project_id (int): The ID of the project to remove.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM projects WHERE id=?", (project_id,))
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            existing = {row["name"] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table, where, params in PROJECT_CASCADE:
+                if table in existing:
+                    cursor.execute(f"DELETE FROM {table} WHERE {where}", (project_id,) * params)
+            cursor.execute("DELETE FROM projects WHERE id=?", (project_id,))
+            bump_revision(connection, project_id)
+            connection.commit()
+        invalidate_projects(self.db_name, [project_id])
 
     def get_project(self, project_id):
         """
@@ -125,11 +152,56 @@ class Projects:
         Returns:
             sqlite3.Row: The project row, or None if not found.
         """
-        connection = self.get_db()
-        row = connection.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            row = connection.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
         return row
     
+    def get_snapshot(self, project_id):
+        """
+        Gets everything a client needs to open a project, read in one transaction
+        so all the parts are consistent with each other.
+
+        Args:
+            project_id (int): The ID of the project.
+
+        Returns:
+            dict or None: The project row, its revision, shots (in shot order), assets,
+            note counts per item and department, and members, or None if the project doesn't exist.
+        """
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("BEGIN")
+            project = cursor.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+            if project is None:
+                connection.rollback()
+                return None
+
+            row = cursor.execute("SELECT revision FROM project_revisions WHERE project_id = ?", (project_id,)).fetchone()
+            snapshot = {"project": project, "revision": row["revision"] if row else 0}
+            snapshot["shots"] = cursor.execute("SELECT * FROM shots WHERE project_id = ? ORDER BY sort_key, id",
+                                               (project_id,)).fetchall()
+            snapshot["assets"] = cursor.execute("SELECT * FROM assets WHERE project_id = ? ORDER BY id",
+                                                (project_id,)).fetchall()
+            # notes written before notes.project_id existed are found through their shot or asset
+            snapshot["note_counts"] = cursor.execute("""
+                                                      SELECT item_type, item_id, item_dept, COUNT(*) AS count FROM notes
+                                                      WHERE project_id = ?
+                                                      OR (project_id IS NULL AND item_type IN ('shot', 'shots')
+                                                          AND item_id IN (SELECT id FROM shots WHERE project_id = ?))
+                                                      OR (project_id IS NULL AND item_type IN ('asset', 'assets')
+                                                          AND item_id IN (SELECT id FROM assets WHERE project_id = ?))
+                                                      GROUP BY item_type, item_id, item_dept
+                                                      ORDER BY item_type, item_id, item_dept
+                                                      """, (project_id, project_id, project_id)).fetchall()
+            snapshot["members"] = cursor.execute("""
+                                                  SELECT usersProjects.user_id, users.user_name, usersProjects.role
+                                                  FROM usersProjects LEFT JOIN users ON users.id = usersProjects.user_id
+                                                  WHERE usersProjects.project_id = ?
+                                                  ORDER BY usersProjects.id
+                                                  """, (project_id,)).fetchall()
+            connection.commit()
+        return snapshot
+
     def get_sharecode(self, project_id):
         """
         Generates and/or returns a sharing code for the project with project_id.
@@ -140,16 +212,17 @@ class Projects:
         Returns:
             str: The share code for the project.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        row = cursor.execute("SELECT project_sharecode FROM projects WHERE id = ?", (project_id,)).fetchone()
-        sharecode = row["project_sharecode"] if row and row["project_sharecode"] else None
-        if sharecode is None:
-            sharecode = str(uuid.uuid4()).split("-")[0]
-            cursor.execute("UPDATE projects SET project_sharecode = ? WHERE id = ?", (sharecode, project_id))
-            connection.commit()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            row = cursor.execute("SELECT project_sharecode FROM projects WHERE id = ?", (project_id,)).fetchone()
+            sharecode = row["project_sharecode"] if row and row["project_sharecode"] else None
+            if sharecode is None:
+                sharecode = str(uuid.uuid4()).split("-")[0]
+                cursor.execute("UPDATE projects SET project_sharecode = ? WHERE id = ?", (sharecode, project_id))
+                bump_revision(connection, project_id)
+                connection.commit()
+                invalidate_projects(self.db_name, [project_id])
 
-        connection.close()
         return sharecode
     
     def get_project_id_by_sharecode(self, sharecode):
@@ -163,8 +236,7 @@ class Projects:
             int or None: The project ID if found, otherwise None.
         """
         
-        connection = self.get_db()
-        row = connection.execute("SELECT id FROM projects WHERE project_sharecode = ?", (sharecode,)).fetchone()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            row = connection.execute("SELECT id FROM projects WHERE project_sharecode = ?", (sharecode,)).fetchone()
         return row["id"] if row else None
 
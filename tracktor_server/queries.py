@@ -0,0 +1,150 @@
+"""
+Shared helpers for the list queries of the table classes.
+
+They add field selection, equality filters and keyset pagination on the id column
+to a plain SELECT, and stream the result from the cursor instead of calling fetchall().
+"""
+
+MAX_PAGE_SIZE = 1000
+FETCH_BATCH_SIZE = 500
+
+
+def table_columns(connection, table):
+    """
+    Gets the column names of a table.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+        table (str): The table name.
+
+    Returns:
+        list[str]: The column names, in table order.
+    """
+    return [row["name"] for row in connection.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def page_size(limit):
+    """
+    Validates a requested page size and caps it at MAX_PAGE_SIZE.
+
+    Args:
+        limit (int or str or None): The requested page size.
+
+    Returns:
+        int or None: The page size, or None for no limit.
+
+    Raises:
+        ValueError: If the limit isn't a positive integer.
+    """
+    if limit is None:
+        return None
+    limit = int(limit)
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def build_list_query(connection, table, fields=None, filters=None, after=None, limit=None):
+    """
+    Builds a SELECT with optional projection, filters and keyset pagination.
+
+    Column names are checked against the table, so they can safely be formatted into the SQL.
+    Rows are always ordered by id and the id column is always selected, so the last id
+    of a page can be passed back as `after` to get the next one.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+        table (str): The table name.
+        fields (list[str], optional): The columns to return. Defaults to all columns.
+        filters (dict, optional): Column -> value pairs the rows must match.
+        after (int, optional): Only return rows with an id greater than this.
+        limit (int, optional): The maximum number of rows to return.
+
+    Returns:
+        tuple: (str, list) the SQL and its parameters.
+
+    Raises:
+        ValueError: If a field or filter isn't a column of the table, or after/limit aren't integers.
+    """
+    columns = table_columns(connection, table)
+
+    if fields:
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        selected = ["id"] + [field for field in fields if field != "id"]
+    else:
+        selected = columns
+
+    conditions = []
+    params = []
+    for column, value in (filters or {}).items():
+        if column not in columns:
+            raise ValueError(f"Unknown filter: {column}")
+        conditions.append(f"{column} = ?")
+        params.append(value)
+    if after is not None:
+        conditions.append("id > ?")
+        params.append(int(after))
+
+    sql = f"SELECT {', '.join(selected)} FROM {table}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY id"
+
+    limit = page_size(limit)
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+def stream_rows(connection, sql, params=()):
+    """
+    Runs a query and yields its rows in batches from the cursor.
+    The connection is closed once the rows are exhausted or the generator is dropped.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+        sql (str): The query.
+        params (list or tuple): The query parameters.
+
+    Yields:
+        sqlite3.Row: The result rows.
+    """
+    try:
+        cursor = connection.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        connection.close()
+
+
+def list_rows(connection, table, fields=None, filters=None, after=None, limit=None):
+    """
+    Streams the rows of a table through build_list_query and stream_rows.
+    The query is validated straight away, so bad fields or filters raise before any row is read.
+
+    Args:
+        connection (sqlite3.Connection): The db connection, closed when the rows are consumed.
+        table (str): The table name.
+        fields (list[str], optional): The columns to return.
+        filters (dict, optional): Column -> value pairs the rows must match.
+        after (int, optional): Only return rows with an id greater than this.
+        limit (int, optional): The maximum number of rows to return.
+
+    Returns:
+        Iterator[sqlite3.Row]: The rows, ordered by id.
+
+    Raises:
+        ValueError: If the fields, filters or pagination arguments are invalid.
+    """
+    try:
+        sql, params = build_list_query(connection, table, fields, filters, after, limit)
+    except ValueError:
+        connection.close()
+        raise
+    return stream_rows(connection, sql, params)
@@ -0,0 +1,175 @@
+import sqlite3
+from sqlite3 import Error
+from db_pool import get_pool
+
+
+CHANGE_TABLES = ("shots", "assets", "notes")
+
+
+def create_revisions_table(connection):
+    """
+    Creates the per-project revision counter and deleted items tables if they don't already exist.
+    Called from the init methods of every table whose writes bump a revision.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+    """
+    connection.execute("""
+                        CREATE TABLE IF NOT EXISTS project_revisions(
+                        project_id INTEGER PRIMARY KEY,
+                        revision INTEGER NOT NULL
+                        )
+                        """)
+    connection.execute("""
+                        CREATE TABLE IF NOT EXISTS deleted_items(
+                        project_id INTEGER NOT NULL,
+                        item_type TEXT NOT NULL,
+                        item_id INTEGER NOT NULL,
+                        revision INTEGER NOT NULL
+                        )
+                        """)
+
+
+def bump_revision(connection, project_id):
+    """
+    Increments the revision counter of a project.
+
+    Runs on the caller's connection, so the bump is committed (or rolled back)
+    together with the write that caused it.
+
+    Args:
+        connection (sqlite3.Connection): The db connection of the write.
+        project_id (int): The ID of the project that changed.
+
+    Returns:
+        int: The new revision of the project.
+    """
+    connection.execute("""
+                        INSERT INTO project_revisions(project_id, revision)
+                        VALUES(?, 1)
+                        ON CONFLICT(project_id) DO UPDATE SET revision = revision + 1
+                        """, (project_id,))
+    row = connection.execute("SELECT revision FROM project_revisions WHERE project_id = ?", (project_id,)).fetchone()
+    return row[0]
+
+
+def record_deletions(connection, table, where, params=()):
+    """
+    Records a deleted item entry for every row that is about to be deleted,
+    bumping the revision of each project that loses rows.
+
+    Call it on the caller's connection right before the DELETE, with the same WHERE clause.
+
+    Args:
+        connection (sqlite3.Connection): The db connection of the delete.
+        table (str): The table the rows are deleted from ('shots', 'assets' or 'notes').
+        where (str): The WHERE clause of the delete.
+        params (tuple): The parameters of the WHERE clause.
+
+    Returns:
+        dict: project_id -> new revision, for every project that lost rows.
+    """
+    rows = connection.execute(f"SELECT id, project_id FROM {table} WHERE {where}", params).fetchall()
+    revisions = {}
+    deleted = []
+    for row in rows:
+        project_id = row["project_id"]
+        if project_id is None:
+            continue
+        if project_id not in revisions:
+            revisions[project_id] = bump_revision(connection, project_id)
+        deleted.append((project_id, table, row["id"], revisions[project_id]))
+    connection.executemany("""
+                            INSERT INTO deleted_items(project_id, item_type, item_id, revision)
+                            VALUES(?, ?, ?, ?)
+                            """, deleted)
+    return revisions
+
+
+class Revisions:
+    """
+    Class to read the per-project revision counters.
+
+    Every write to a project's shots, assets, notes or metadata bumps its counter,
+    so the server can answer conditional GETs without re-reading the data.
+
+    Attributes:
+        db_name (str): The name of the SQLite database file.
+        connection (sqlite3.Connection or None): The database connection.
+    """
+
+    def __init__(self, db_name):
+        """
+        Initializes the Revisions class with the database name.
+
+        Args:
+            db_name (str): The name of the SQLite database file.
+        """
+        self.db_name = db_name
+        self.connection = None
+
+    def get_db(self):
+        """
+        Gets a pooled connection to the named database, creating the db if it doesn't exist.
+        Closing the connection returns it to the pool.
+
+        Returns:
+            sqlite3.Connection: The db connection object.
+        """
+        return get_pool(self.db_name).connect()
+
+    def init_revisions_table(self):
+        """
+        Creates an SQL table for project revisions if it doesn't already exist.
+        """
+        with get_pool(self.db_name).connection() as connection:
+            create_revisions_table(connection)
+            connection.commit()
+
+    def get_revision(self, project_id):
+        """
+        Gets the current revision of a project.
+
+        Args:
+            project_id (int): The ID of the project.
+
+        Returns:
+            int: The revision, 0 if the project was never written to.
+        """
+        with get_pool(self.db_name).connection() as connection:
+            row = connection.execute("SELECT revision FROM project_revisions WHERE project_id = ?", (project_id,)).fetchone()
+        return row["revision"] if row else 0
+
+    def get_changes(self, project_id, since):
+        """
+        Gets everything that changed in a project after a given revision.
+        All reads happen in one transaction, so the result is a consistent snapshot.
+
+        Args:
+            project_id (int): The ID of the project.
+            since (int): The revision the client last synced to.
+
+        Returns:
+            dict: The current revision, the shots, assets and notes rows written after `since`,
+            and the IDs of the shots, assets and notes deleted after `since`.
+        """
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("BEGIN")
+            row = connection.execute("SELECT revision FROM project_revisions WHERE project_id = ?", (project_id,)).fetchone()
+            changes = {"revision": row["revision"] if row else 0, "since": since}
+            for table in CHANGE_TABLES:
+                changes[table] = connection.execute(f"""
+                                                     SELECT * FROM {table}
+                                                     WHERE project_id = ? AND revision > ?
+                                                     ORDER BY revision, id
+                                                     """, (project_id, since)).fetchall()
+            changes["deleted"] = {table: [] for table in CHANGE_TABLES}
+            deleted_rows = connection.execute("""
+                                               SELECT item_type, item_id FROM deleted_items
+                                               WHERE project_id = ? AND revision > ?
+                                               ORDER BY revision
+                                               """, (project_id, since)).fetchall()
+            for deleted_row in deleted_rows:
+                changes["deleted"].setdefault(deleted_row["item_type"], []).append(deleted_row["item_id"])
+            connection.commit()
+        return changes
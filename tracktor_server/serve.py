@@ -0,0 +1,98 @@
+#!/usr/bin/env -S uv run --script
+
+"""
+Production entry point for the Tracktor server.
+
+Runs main.app under gunicorn with threaded workers instead of the single-threaded Flask
+development server. The app is imported (and the database migrated) once in the master
+before the workers are forked, unless TRACKTOR_PRELOAD is 0. Settings come from environment variables:
+
+    TRACKTOR_HOST              address to bind, default 0.0.0.0
+    TRACKTOR_PORT              port to bind, default 8080
+    TRACKTOR_WORKERS           worker processes, default the number of CPU cores
+    TRACKTOR_THREADS           threads per worker, default 4
+    TRACKTOR_TIMEOUT           seconds before a silent worker is restarted, default 30
+    TRACKTOR_GRACEFUL_TIMEOUT  seconds workers get to finish requests on reload/shutdown, default 30
+    TRACKTOR_MAX_REQUESTS      requests before a worker is recycled, default 0 (never)
+    TRACKTOR_PRELOAD           1 to import the app once in the master, 0 to import it in every worker, default 1
+
+Send SIGHUP to the master for a graceful restart of the workers: new workers are started and
+the old ones finish their in-flight requests before exiting. With the default preload the new
+workers are forked from the master and still run the code it imported at startup, so deploying
+new code takes a full restart of the master. With TRACKTOR_PRELOAD=0 every worker imports the
+app itself (each runs the migration check, see migrations.migrate), and SIGHUP picks up new code.
+
+SQLite allows one writer at a time. Every worker has its own connection pool in WAL mode
+with a busy timeout (see engine_config), so concurrent writers wait for the lock instead
+of failing, while readers are never blocked.
+"""
+
+import os
+from gunicorn.app.base import BaseApplication
+from db_pool import close_pools
+
+
+def get_options():
+    """
+    Builds the gunicorn settings from the TRACKTOR_* environment variables.
+
+    Returns:
+        dict: The gunicorn settings.
+    """
+    host = os.environ.get("TRACKTOR_HOST", "0.0.0.0")
+    port = os.environ.get("TRACKTOR_PORT", "8080")
+    return {
+        "bind": f"{host}:{port}",
+        "workers": int(os.environ.get("TRACKTOR_WORKERS", os.cpu_count() or 1)),
+        "threads": int(os.environ.get("TRACKTOR_THREADS", "4")),
+        "worker_class": "gthread",
+        "timeout": int(os.environ.get("TRACKTOR_TIMEOUT", "30")),
+        "graceful_timeout": int(os.environ.get("TRACKTOR_GRACEFUL_TIMEOUT", "30")),
+        "max_requests": int(os.environ.get("TRACKTOR_MAX_REQUESTS", "0")),
+        "max_requests_jitter": int(os.environ.get("TRACKTOR_MAX_REQUESTS", "0")) // 10,
+        "preload_app": os.environ.get("TRACKTOR_PRELOAD", "1") != "0",
+        "accesslog": "-",
+    }
+
+
+class TracktorApplication(BaseApplication):
+    """
+    Gunicorn application serving the Tracktor Flask app.
+
+    Attributes:
+        options (dict): The gunicorn settings.
+    """
+
+    def __init__(self, options=None):
+        """
+        Initializes the application with its settings.
+
+        Args:
+            options (dict, optional): The gunicorn settings. Defaults to get_options().
+        """
+        self.options = options if options is not None else get_options()
+        super().__init__()
+
+    def load_config(self):
+        """
+        Passes the settings to gunicorn.
+        """
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        """
+        Imports the Flask app. With preload_app this runs once in the master, so the
+        schema migration happens before any worker starts. Without it, every worker runs it.
+
+        Returns:
+            Flask: The WSGI app.
+        """
+        from main import app
+        # the master must not hand its SQLite connections down to the forked workers
+        close_pools()
+        return app
+
+
+if __name__ == "__main__":
+    TracktorApplication().run()
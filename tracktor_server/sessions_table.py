@@ -0,0 +1,208 @@
+import hashlib
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from sqlite3 import Error
+from db_pool import get_pool
+
+DEFAULT_SESSION_TTL = 12 * 60 * 60
+# seconds a token found in memory is trusted before it's checked against the table again,
+# so revocations made by other worker processes are picked up
+DEFAULT_RECHECK = 30
+# tokens kept in memory at most; past it the least recently checked ones are read from the table again
+MAX_CACHED_SESSIONS = 10000
+
+
+def hash_token(token):
+    """
+    Hashes a session token for storage. Tokens are long and random, so a fast hash is enough.
+
+    Args:
+        token (str): The session token.
+
+    Returns:
+        str: The hex SHA-256 of the token.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class Sessions:
+    """
+    Class to manage connection to the backend Sessions table.
+
+    A session token is issued on login and sent back as 'Authorization: Bearer <token>'.
+    Only the hash of the token is stored. Valid tokens are kept in an in-memory map,
+    so checking a token usually costs a dict lookup instead of a query or a bcrypt check.
+
+    Attributes:
+        db_name (str): The name of the SQLite database file.
+        connection (sqlite3.Connection or None): The database connection.
+        ttl (float): Seconds a new session stays valid.
+        recheck (float): Seconds a token found in memory is trusted before the table is read again.
+    """
+
+    def __init__(self, db_name, ttl=None, recheck=None):
+        """
+        Initializes the Sessions class with the database name.
+
+        Args:
+            db_name (str): The name of the SQLite database file.
+            ttl (float, optional): Session lifetime in seconds. Defaults to TRACKTOR_SESSION_TTL or 12 hours.
+            recheck (float, optional): In-memory trust period in seconds. Defaults to TRACKTOR_SESSION_RECHECK or 30.
+        """
+        self.db_name = db_name
+        self.connection = None
+        self.ttl = float(ttl if ttl is not None else os.environ.get("TRACKTOR_SESSION_TTL", DEFAULT_SESSION_TTL))
+        self.recheck = float(recheck if recheck is not None else os.environ.get("TRACKTOR_SESSION_RECHECK", DEFAULT_RECHECK))
+        # token hash -> (user_id, expires_at, checked_at), least recently checked first
+        self._valid = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def get_db(self):
+        """
+        Gets a pooled connection to the named database, creating the db if it doesn't exist.
+        Closing the connection returns it to the pool.
+
+        Returns:
+            sqlite3.Connection: The db connection object.
+        """
+        return get_pool(self.db_name).connect()
+
+    def _remember(self, token_hash, user_id, expires_at, now):
+        """
+        Caches a valid token in memory. Expired tokens are swept out at most once per recheck period,
+        and the least recently checked tokens are dropped when there are more than MAX_CACHED_SESSIONS.
+        Must be called with the lock held.
+
+        Args:
+            token_hash (str): The hash of the session token.
+            user_id (int): The ID of the user.
+            expires_at (float): The time the session expires at.
+            now (float): The current time.
+        """
+        self._valid[token_hash] = (user_id, expires_at, now)
+        self._valid.move_to_end(token_hash)
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.recheck
+            for expired in [key for key, entry in self._valid.items() if entry[1] <= now]:
+                del self._valid[expired]
+        while len(self._valid) > MAX_CACHED_SESSIONS:
+            self._valid.popitem(last=False)
+
+    def init_sessions_table(self):
+        """
+        Creates an SQL table for sessions if it doesn't already exist.
+        """
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("""
+                                CREATE TABLE IF NOT EXISTS sessions(
+                                token_hash TEXT PRIMARY KEY,
+                                user_id INTEGER NOT NULL,
+                                created_at REAL NOT NULL,
+                                expires_at REAL NOT NULL
+                                )
+                                """)
+            connection.commit()
+
+    def create_session(self, user_id):
+        """
+        Starts a session for a user.
+
+        Args:
+            user_id (int): The ID of the logged in user.
+
+        Returns:
+            tuple: (str, float) the token and the time it expires at, in seconds since the epoch.
+        """
+        token = secrets.token_urlsafe(32)
+        token_hash = hash_token(token)
+        now = time.time()
+        expires_at = now + self.ttl
+
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("INSERT INTO sessions(token_hash, user_id, created_at, expires_at) VALUES(?, ?, ?, ?)",
+                               (token_hash, user_id, now, expires_at))
+            connection.commit()
+
+        with self._lock:
+            self._remember(token_hash, user_id, expires_at, now)
+        return token, expires_at
+
+    def get_user_id(self, token):
+        """
+        Gets the user a session token belongs to.
+
+        Args:
+            token (str): The session token.
+
+        Returns:
+            int or None: The user ID, or None if the token is unknown, expired or revoked.
+        """
+        if not token:
+            return None
+        token_hash = hash_token(token)
+        now = time.time()
+        with self._lock:
+            entry = self._valid.get(token_hash)
+            if entry is not None and entry[1] <= now:
+                del self._valid[token_hash]
+                entry = None
+        if entry is not None and entry[2] + self.recheck > now:
+            return entry[0]
+
+        with get_pool(self.db_name).connection() as connection:
+            row = connection.execute("SELECT user_id, expires_at FROM sessions WHERE token_hash = ?", (token_hash,)).fetchone()
+        with self._lock:
+            if row is None or row["expires_at"] <= now:
+                self._valid.pop(token_hash, None)
+                return None
+            self._remember(token_hash, row["user_id"], row["expires_at"], now)
+        return row["user_id"]
+
+    def revoke(self, token):
+        """
+        Ends a session.
+
+        Args:
+            token (str): The session token.
+        """
+        token_hash = hash_token(token)
+        with self._lock:
+            self._valid.pop(token_hash, None)
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("DELETE FROM sessions WHERE token_hash = ?", (token_hash,))
+            connection.commit()
+
+    def revoke_user(self, user_id):
+        """
+        Ends every session of a user, e.g. to log out of every device.
+
+        Args:
+            user_id (int): The ID of the user.
+        """
+        with self._lock:
+            for token_hash in [token_hash for token_hash, entry in self._valid.items() if entry[0] == user_id]:
+                del self._valid[token_hash]
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+            connection.commit()
+
+    def purge_expired(self):
+        """
+        Deletes expired sessions from the table and from memory.
+
+        Returns:
+            int: The number of sessions deleted from the table.
+        """
+        now = time.time()
+        with self._lock:
+            for token_hash in [token_hash for token_hash, entry in self._valid.items() if entry[1] <= now]:
+                del self._valid[token_hash]
+        with get_pool(self.db_name).connection() as connection:
+            deleted = connection.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+            connection.commit()
+        return deleted
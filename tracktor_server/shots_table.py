@@ -1,9 +1,43 @@
 #!/usr/bin/env -S uv run --script
 
+import re
 import sqlite3
 from sqlite3 import Error
+from db_pool import get_pool
+from queries import list_rows
+from revisions_table import bump_revision, create_revisions_table, record_deletions
+from project_cache import invalidate_projects
+from stats_table import create_status_counts
 from pathlib import Path
 
+SORT_KEY_GROUPS = 3
+SORT_KEY_GROUP_SIZE = 10**6
+
+# the columns the status endpoints may write to
+STATUS_COLUMNS = ("status", "lay_status", "anim_status", "cfx_status", "lit_status")
+
+
+def shot_sort_key(shot_name):
+    """
+    Derives a numeric sort key from the numbers in a shot name.
+
+    The first three groups of digits are packed into one integer, so SHT_0010 < SHT_0020
+    and SQ010_SH0020 < SQ010_SH0100 < SQ020_SH0010. Names without digits get 0.
+
+    Args:
+        shot_name (str): The name of the shot.
+
+    Returns:
+        int: The sort key.
+    """
+    numbers = [int(number) for number in re.findall(r"\d+", shot_name)[:SORT_KEY_GROUPS]]
+    numbers += [0] * (SORT_KEY_GROUPS - len(numbers))
+    sort_key = 0
+    for number in numbers:
+        sort_key = sort_key * SORT_KEY_GROUP_SIZE + min(number, SORT_KEY_GROUP_SIZE - 1)
+    return sort_key
+
+
 class Shots:
     """
     Class to manage connection to the backend Shots table.
@@ -29,36 +63,37 @@ class Shots:
        
     def get_db(self):
         """
-        Opens the named database or creates one if it doesn't exist.
+        Gets a pooled connection to the named database, creating the db if it doesn't exist.
+        Closing the connection returns it to the pool.
         
         Returns:
             sqlite3.Connection: The db connection object.
         """
-
-        connection = sqlite3.connect(self.db_name)
-        connection.row_factory = sqlite3.Row
-        return connection
+        return get_pool(self.db_name).connect()
 
     def init_shots_table(self):
         """
         Creates and SQL table for shots if it doesn't already exist.
         """
-        connection = self.get_db()
-        connection.execute("""
-                                CREATE TABLE IF NOT EXISTS shots(
-                                project_id INTEGER, 
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                shot_name TEXT NOT NULL,
-                                status TEXT,
-                                lay_status TEXT,
-                                anim_status TEXT,
-                                cfx_status TEXT,
-                                lit_status TEXT
-                                )
-                                """,
-                                )
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("""
+                                    CREATE TABLE IF NOT EXISTS shots(
+                                    project_id INTEGER, 
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                    shot_name TEXT NOT NULL,
+                                    status TEXT,
+                                    lay_status TEXT,
+                                    anim_status TEXT,
+                                    cfx_status TEXT,
+                                    lit_status TEXT,
+                                    sort_key INTEGER NOT NULL DEFAULT 0,
+                                    revision INTEGER NOT NULL DEFAULT 0
+                                    )
+                                    """,
+                                    )
+            create_revisions_table(connection)
+            create_status_counts(connection, "shots", STATUS_COLUMNS)
+            connection.commit()
     
     def get_shots_from_project(self, project_id):
         """
@@ -70,12 +105,11 @@ class Shots:
         Returns:
             list[sqlite3.Row]: A list of shot rows for the project.
         """
-        connection = self.get_db()
-        shot_rows = connection.execute("""
-                                        SELECT * FROM shots 
-                                        WHERE project_id = ?
-                                        ORDER BY CAST(SUBSTR(shot_name, 5) AS INTEGER)""", (project_id,)).fetchall()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            shot_rows = connection.execute("""
+                                            SELECT * FROM shots 
+                                            WHERE project_id = ?
+                                            ORDER BY sort_key, id""", (project_id,)).fetchall()
         return shot_rows
     
     def get_shot_from_project(self, project_id, shot_id):
@@ -89,58 +123,88 @@ class Shots:
         Returns:
             sqlite3.Row: The shot row, or None if not found.
         """
-        connection = self.get_db()
-        row = connection.execute("SELECT * FROM shots WHERE project_id = ? AND id = ?", (project_id, shot_id)).fetchone()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            row = connection.execute("SELECT * FROM shots WHERE project_id = ? AND id = ?", (project_id, shot_id)).fetchone()
         return row
     
-    def get_all_shots(self):
+    def get_all_shots(self, fields=None, filters=None, after=None, limit=None):
         """
-        Get all columns of one shot from one project
-        
+        Streams all shot rows, optionally filtered and paginated by id.
+
+        Args:
+            fields (list[str], optional): The columns to return. Defaults to all columns.
+            filters (dict, optional): Column -> value pairs to match (e.g. {'project_id': 1, 'lay_status': 'Approved'}).
+            after (int, optional): Only return rows with an id greater than this.
+            limit (int, optional): The maximum number of rows to return.
+
         Returns:
-            list[sqlite3.Row]: A list of all shot rows.
+            Iterator[sqlite3.Row]: The shot rows, ordered by id.
+
+        Raises:
+            ValueError: If a field or filter isn't a column of the table.
         """
-        connection = self.get_db()
-        rows = connection.execute("SELECT * FROM shots").fetchall()
-        connection.close()
-        return rows
+        return list_rows(self.get_db(), "shots", fields, filters, after, limit)
 
     def add_shots_for_project(self, project_id, shotsNum):
         """
-        Sends off a loop that creates a requested number of shots.
+        Creates a requested number of shots, named SHT_0010, SHT_0020, etc.
 
         Args:
             project_id (int): The ID of the project.
             shotsNum (int): Number of shots to create.
 
+        Returns:
+            list[int]: The IDs of the newly created shots.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        new_status ="Not Started"
-        for i in range(shotsNum):
-            shot_name = f"SHT_{(i+1)*10:04d}"
-            cursor.execute("""
-                            INSERT INTO shots(
-                            project_id, 
-                            shot_name,
-                            status,
-                            lay_status,
-                            anim_status,
-                            cfx_status,
-                            lit_status
-                           )
-                           VALUES(?, ?, ?, ?, ?, ?, ?)
-                           """, (project_id, 
-                                 shot_name,
-                                 new_status,
-                                 new_status,
-                                 new_status,
-                                 new_status,
-                                 new_status)
-                            )
+        shot_names = [f"SHT_{(i+1)*10:04d}" for i in range(shotsNum)]
+        return self.add_shots(project_id, shot_names)
+
+    def add_shots(self, project_id, shot_names):
+        """
+        Adds a list of shots to the project in a single transaction.
+
+        Args:
+            project_id (int): The ID of the project.
+            shot_names (list[str]): The names of the shots to create.
+
+        Returns:
+            list[int]: The IDs of the newly created shots, in the order of shot_names.
+        """
+        if not shot_names:
+            return []
+        new_status = "Not Started"
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            revision = bump_revision(connection, project_id)
+            cursor.executemany("""
+                                INSERT INTO shots(
+                                project_id, 
+                                shot_name,
+                                status,
+                                lay_status,
+                                anim_status,
+                                cfx_status,
+                                lit_status,
+                                sort_key,
+                                revision
+                               )
+                               VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)
+                               """, [(project_id,
+                                      shot_name,
+                                      new_status,
+                                      new_status,
+                                      new_status,
+                                      new_status,
+                                      new_status,
+                                      shot_sort_key(shot_name),
+                                      revision) for shot_name in shot_names]
+                                )
+            # writers are serialised, so the last ids of the project are the ones just inserted
+            rows = cursor.execute("SELECT id FROM shots WHERE project_id = ? ORDER BY id DESC LIMIT ?",
+                                  (project_id, len(shot_names))).fetchall()
             connection.commit()
-        connection.close()
+        invalidate_projects(self.db_name, [project_id])
+        return [row["id"] for row in reversed(rows)]
 
     def add_shot_for_project(self, project_id, shot_name):
         """
@@ -153,32 +217,37 @@ class Shots:
         Returns:
             int: The ID of the newly created shot.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        new_status = "Not Started"
-        cursor.execute("""
-                        INSERT INTO shots(
-                            project_id,
-                            shot_name,
-                            status,
-                            lay_status,
-                            anim_status,
-                            cfx_status,
-                            lit_status
-                        )
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            project_id,
-                            shot_name,
-                            new_status,
-                            new_status,
-                            new_status,
-                            new_status,
-                            new_status
-                        ))
-        shot_id = cursor.lastrowid
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            new_status = "Not Started"
+            revision = bump_revision(connection, project_id)
+            cursor.execute("""
+                            INSERT INTO shots(
+                                project_id,
+                                shot_name,
+                                status,
+                                lay_status,
+                                anim_status,
+                                cfx_status,
+                                lit_status,
+                                sort_key,
+                                revision
+                            )
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            """, (
+                                project_id,
+                                shot_name,
+                                new_status,
+                                new_status,
+                                new_status,
+                                new_status,
+                                new_status,
+                                shot_sort_key(shot_name),
+                                revision
+                            ))
+            shot_id = cursor.lastrowid
+            connection.commit()
+        invalidate_projects(self.db_name, [project_id])
         return shot_id
 
     def remove_shot_from_project(self, shot_id):
@@ -188,11 +257,12 @@ class Shots:
         Args:
             shot_id (int): The ID of the shot to remove.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM shots WHERE id=?", (shot_id,))
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            revisions = record_deletions(connection, "shots", "id = ?", (shot_id,))
+            cursor.execute("DELETE FROM shots WHERE id=?", (shot_id,))
+            connection.commit()
+        invalidate_projects(self.db_name, revisions)
     
     def remove_shots_from_project(self, project_id):
         """
@@ -201,11 +271,12 @@ class Shots:
         Args:
             project_id (int): The ID of the project.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM shots WHERE project_id = ?", (project_id,))
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            record_deletions(connection, "shots", "project_id = ?", (project_id,))
+            cursor.execute("DELETE FROM shots WHERE project_id = ?", (project_id,))
+            connection.commit()
+        invalidate_projects(self.db_name, [project_id])
 
     def change_shot_status(self, shot_id, status_item, new_status):
         """
@@ -215,11 +286,61 @@ class Shots:
             shot_id (int): The ID of the shot.
             status_item (str): The status column to update (e.g., 'lay_status').
             new_status (str): The new status value.
+
+        Raises:
+            ValueError: If status_item isn't one of STATUS_COLUMNS, or new_status isn't a string.
+        """
+        if status_item not in STATUS_COLUMNS:
+            raise ValueError(f"Unknown status item: {status_item}")
+        # checked before the transaction, a value sqlite can't bind would fail with the write lock held
+        if not isinstance(new_status, str):
+            raise ValueError("The status value must be a string")
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            row = cursor.execute("SELECT project_id FROM shots WHERE id = ?", (shot_id,)).fetchone()
+            if row is not None:
+                revision = bump_revision(connection, row["project_id"])
+                cursor.execute(f"UPDATE shots SET {status_item} = ?, revision = ? WHERE id = ?", (new_status, revision, shot_id))
+            connection.commit()
+        if row is not None:
+            invalidate_projects(self.db_name, [row["project_id"]])
+
+    def change_shot_statuses(self, project_id, changes):
+        """
+        Applies many status changes to shots of one project in a single transaction.
+        Every change is validated before anything is written, and shots of other projects are left alone.
+
+        Args:
+            project_id (int): The ID of the project the shots belong to.
+            changes (list[tuple]): (shot_id, status_item, new_status) for every change.
+
+        Returns:
+            int: The number of changes that matched a shot of the project.
+
+        Raises:
+            ValueError: If a status_item isn't one of STATUS_COLUMNS, or a new_status isn't a string.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute(f"UPDATE shots SET {status_item} = ? WHERE id = ?", (new_status, shot_id))
-        connection.commit()
-        connection.close()
+        unknown = sorted({str(status_item) for _, status_item, _ in changes if status_item not in STATUS_COLUMNS})
+        if unknown:
+            raise ValueError(f"Unknown status items: {', '.join(unknown)}")
+        if not all(isinstance(new_status, str) for _, _, new_status in changes):
+            raise ValueError("Every status value must be a string")
+
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            revision = bump_revision(connection, project_id)
+            updated = 0
+            for shot_id, status_item, new_status in changes:
+                cursor.execute(f"UPDATE shots SET {status_item} = ?, revision = ? WHERE id = ? AND project_id = ?",
+                               (new_status, revision, shot_id, project_id))
+                updated += cursor.rowcount
+            if updated:
+                connection.commit()
+            else:
+                connection.rollback()
+        if updated:
+            invalidate_projects(self.db_name, [project_id])
+        return updated
         
 
@@ -0,0 +1,144 @@
+import sqlite3
+from sqlite3 import Error
+from db_pool import get_pool
+
+# status_item/status of the row holding the number of items of a project
+TOTAL = "*"
+
+
+def create_status_counts(connection, table, columns):
+    """
+    Creates the status_counts table if it doesn't already exist, and the triggers that keep
+    it up to date with the status columns of a table.
+
+    The triggers run inside the writing transaction, so every insert, delete and status
+    change of the table (single or batched) adjusts the counts it touches, and nothing else.
+    Called from init_shots_table and init_assets_table, since triggers need their table to exist.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+        table (str): The table to count ('shots' or 'assets').
+        columns (tuple[str]): The status columns of the table.
+    """
+    connection.execute("""
+                        CREATE TABLE IF NOT EXISTS status_counts(
+                        project_id INTEGER NOT NULL,
+                        item_type TEXT NOT NULL,
+                        status_item TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        count INTEGER NOT NULL,
+                        PRIMARY KEY(project_id, item_type, status_item, status)
+                        )
+                        """)
+
+    def increment(column, value):
+        return f"""
+                INSERT INTO status_counts(project_id, item_type, status_item, status, count)
+                SELECT NEW.project_id, '{table}', '{column}', {value}, 1
+                WHERE NEW.project_id IS NOT NULL AND {value} IS NOT NULL
+                ON CONFLICT(project_id, item_type, status_item, status) DO UPDATE SET count = count + 1;
+                """
+
+    def decrement(column, value):
+        return f"""
+                UPDATE status_counts SET count = count - 1
+                WHERE project_id = OLD.project_id AND item_type = '{table}' AND status_item = '{column}' AND status = {value};
+                """
+
+    cleanup = f"DELETE FROM status_counts WHERE project_id = OLD.project_id AND item_type = '{table}' AND count <= 0;"
+
+    inserts = increment(TOTAL, f"'{TOTAL}'") + "".join(increment(column, f"NEW.{column}") for column in columns)
+    connection.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_status_counts_insert AFTER INSERT ON {table} BEGIN {inserts} END")
+
+    deletes = decrement(TOTAL, f"'{TOTAL}'") + "".join(decrement(column, f"OLD.{column}") for column in columns)
+    connection.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_status_counts_delete AFTER DELETE ON {table} BEGIN {deletes} {cleanup} END")
+
+    for column in columns:
+        connection.execute(f"""
+                            CREATE TRIGGER IF NOT EXISTS {table}_status_counts_{column} AFTER UPDATE OF {column}, project_id ON {table}
+                            WHEN OLD.{column} IS NOT NEW.{column} OR OLD.project_id IS NOT NEW.project_id
+                            BEGIN {decrement(column, f"OLD.{column}")} {increment(column, f"NEW.{column}")} {cleanup} END
+                            """)
+
+
+def rebuild_status_counts(connection, table, columns):
+    """
+    Recounts the statuses of a table from scratch, e.g. for a database created before the triggers existed.
+
+    Args:
+        connection (sqlite3.Connection): The db connection.
+        table (str): The table to count ('shots' or 'assets').
+        columns (tuple[str]): The status columns of the table.
+    """
+    connection.execute("DELETE FROM status_counts WHERE item_type = ?", (table,))
+    connection.execute(f"""
+                        INSERT INTO status_counts(project_id, item_type, status_item, status, count)
+                        SELECT project_id, ?, ?, ?, COUNT(*) FROM {table}
+                        WHERE project_id IS NOT NULL
+                        GROUP BY project_id
+                        """, (table, TOTAL, TOTAL))
+    for column in columns:
+        connection.execute(f"""
+                            INSERT INTO status_counts(project_id, item_type, status_item, status, count)
+                            SELECT project_id, ?, ?, {column}, COUNT(*) FROM {table}
+                            WHERE project_id IS NOT NULL AND {column} IS NOT NULL
+                            GROUP BY project_id, {column}
+                            """, (table, column))
+
+
+class Stats:
+    """
+    Class to read the per-project status counts.
+
+    The counts are kept up to date by triggers on the shots and assets tables,
+    so reading them costs the same whatever the size of the project.
+
+    Attributes:
+        db_name (str): The name of the SQLite database file.
+        connection (sqlite3.Connection or None): The database connection.
+    """
+
+    def __init__(self, db_name):
+        """
+        Initializes the Stats class with the database name.
+
+        Args:
+            db_name (str): The name of the SQLite database file.
+        """
+        self.db_name = db_name
+        self.connection = None
+
+    def get_db(self):
+        """
+        Gets a pooled connection to the named database, creating the db if it doesn't exist.
+        Closing the connection returns it to the pool.
+
+        Returns:
+            sqlite3.Connection: The db connection object.
+        """
+        return get_pool(self.db_name).connect()
+
+    def get_project_stats(self, project_id):
+        """
+        Gets the number of shots and assets of a project, and how many are in each status of every status column.
+
+        Args:
+            project_id (int): The ID of the project.
+
+        Returns:
+            dict: {'shots': {'total': int, 'lay_status': {'WIP': int, ...}, ...}, 'assets': {...}}.
+        """
+        with get_pool(self.db_name).connection() as connection:
+            rows = connection.execute("""
+                                       SELECT item_type, status_item, status, count FROM status_counts
+                                       WHERE project_id = ?
+                                       """, (project_id,)).fetchall()
+
+        stats = {"shots": {"total": 0}, "assets": {"total": 0}}
+        for row in rows:
+            counts = stats.setdefault(row["item_type"], {"total": 0})
+            if row["status_item"] == TOTAL:
+                counts["total"] = row["count"]
+            else:
+                counts.setdefault(row["status_item"], {})[row["status"]] = row["count"]
+        return stats
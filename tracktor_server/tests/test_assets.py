@@ -37,7 +37,8 @@ def test_init_assets_table(assets_mapper):
                         ("mod_status", "TEXT"),
                         ("srf_status", "TEXT"),
                         ("cfx_status", "TEXT"),
-                        ("lit_status", "TEXT")
+                        ("lit_status", "TEXT"),
+                        ("revision", "INTEGER")
                         ]
     
     connection = assets_mapper.get_db()
@@ -141,8 +142,7 @@ def test_get_asset_from_project(assets_mapper, projects_mapper):
 
 def test_get_all_assets_empty(assets_mapper):
     assets_mapper.init_assets_table()
-    assets = assets_mapper.get_all_assets()
-    assert isinstance(assets, list)
+    assets = list(assets_mapper.get_all_assets())
     assert len(assets) == 0
 
 def test_get_all_assets_multiple_projects(projects_mapper, assets_mapper):
@@ -151,7 +151,7 @@ def test_get_all_assets_multiple_projects(projects_mapper, assets_mapper):
     pid2 = projects_mapper.add_project("B", "vfx", "New", 1, "2025")
     assets_mapper.add_asset_for_project(pid1, "text", "model")
     assets_mapper.add_asset_for_project(pid2, "sample", "rig")
-    assets = assets_mapper.get_all_assets()
+    assets = list(assets_mapper.get_all_assets())
     assert len(assets) == 2
     project_ids = {asset["project_id"] for asset in assets}
     assert {pid1, pid2} == project_ids
@@ -187,4 +187,19 @@ def test_remove_asset_from_project(projects_mapper, assets_mapper):
 
     # check the project is actually gone
     row = assets_mapper.get_asset_from_project(new_id, asset_id)
-    assert row is None
\ No newline at end of file
+    assert row is None
+
+def test_change_asset_statuses(projects_mapper, assets_mapper):
+    assets_mapper.init_assets_table()
+    project_id = projects_mapper.add_project("TestName", "TestType", "New", 0, "2025")
+    first_id = assets_mapper.add_asset_for_project(project_id, "hero", "character")
+    second_id = assets_mapper.add_asset_for_project(project_id, "house", "prop")
+
+    updated = assets_mapper.change_asset_statuses(project_id, [(first_id, "mod_status", "Approved"),
+                                                               (second_id, "srf_status", "WIP")])
+    assert updated == 2
+    assert assets_mapper.get_asset_from_project(project_id, first_id)["mod_status"] == "Approved"
+    assert assets_mapper.get_asset_from_project(project_id, second_id)["srf_status"] == "WIP"
+
+    with pytest.raises(ValueError):
+        assets_mapper.change_asset_statuses(project_id, [(first_id, "asset_name", "renamed")])
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import pytest
+
+pytest.importorskip("quart")
+from tracktor_server.async_main import application
+from tracktor_server.main import app
+
+
+def call(method, path, body=None, headers=()):
+    """
+    Sends one request through the ASGI application and collects the response.
+    """
+    payload = json.dumps(body).encode() if body is not None else b""
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+             "root_path": "", "server": ("testserver", 80), "client": ("127.0.0.1", 1234),
+             "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+                        + [(name.encode(), value.encode()) for name, value in headers]}
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+    response = {"status": None, "headers": {}, "body": b""}
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {name.decode().lower(): value.decode() for name, value in message["headers"]}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    asyncio.run(application(scope, receive, send))
+    return response
+
+
+@pytest.fixture
+def project_id():
+    data = {"name": "async", "type": "vfx", "shotsNum": 2, "deadline": "2025"}
+    with app.test_client() as client:
+        yield client.post('/api/projects', json=data).get_json()["project_id"]
+
+
+def test_ping():
+    response = call("GET", "/api/ping")
+    assert response["status"] == 200
+    assert json.loads(response["body"])["message"] == "Tracktor API is reachable"
+    assert response["headers"]["access-control-allow-origin"] == "*"
+
+
+def test_project_views_are_async_and_conditional(project_id):
+    response = call("GET", f"/api/projects/{project_id}/shots")
+    assert response["status"] == 200
+    assert len(json.loads(response["body"])) == 2
+
+    etag = response["headers"]["etag"]
+    response = call("GET", f"/api/projects/{project_id}/shots", headers=[("if-none-match", etag)])
+    assert response["status"] == 304
+
+
+def test_missing_project_is_404():
+    assert call("GET", "/api/projects/999999")["status"] == 404
+
+
+def test_errors_match_the_flask_app(project_id):
+    with app.test_client() as client:
+        for path in ("/api/projects/999999", f"/api/projects/{project_id}/shots/999999",
+                     f"/api/projects/{project_id}/changes?since=x", f"/api/projects/{project_id}/notes/counts?since=x"):
+            expected = client.get(path)
+            response = call("GET", path)
+            assert response["status"] == expected.status_code
+            assert json.loads(response["body"]) == expected.get_json()
+
+
+def test_flask_fallback_has_its_own_threads():
+    from tracktor_server import async_main
+    assert async_main.wsgi_bridge.executor is not async_main.db_executor
+
+
+def test_other_routes_fall_back_to_flask(project_id):
+    # not an async route, served by main.app
+    response = call("POST", f"/api/projects/{project_id}/create_asset",
+                    body={"project_id": project_id, "asset_name": f"async_hero_{project_id}", "asset_type": "character"})
+    assert response["status"] == 201
+
+    response = call("GET", f"/api/projects/{project_id}/assets")
+    assert [asset["asset_name"] for asset in json.loads(response["body"])] == [f"async_hero_{project_id}"]
+
+
+def test_streamed_fallback():
+    response = call("GET", "/api/shots", headers=[("accept", "application/x-ndjson")])
+    assert response["status"] == 200
+    lines = response["body"].decode().splitlines()
+    assert all(json.loads(line)["id"] for line in lines)
+
+
+def test_login_issues_token():
+    import uuid
+    name = f"async_{uuid.uuid4().hex[:8]}"
+    with app.test_client() as client:
+        client.post('/api/users', json={"user_name": name, "user_password": "secret"})
+    response = call("POST", "/api/login", body={"user_name": name, "user_password": "secret"})
+    login = json.loads(response["body"])
+    assert login["success"] is True
+
+    response = call("GET", "/api/session", headers=[("authorization", f"Bearer {login['token']}")])
+    assert json.loads(response["body"])["user_name"] == name
+
+
+def test_note_counts_are_async(project_id):
+    with app.test_client() as client:
+        client.post(f'/api/projects/{project_id}/shots/1/lay/notes', json={"note_body": "async"})
+    response = call("GET", f"/api/projects/{project_id}/notes/counts")
+    assert response["status"] == 200
+    assert json.loads(response["body"])[0]["count"] == 1
+
+    response = call("GET", f"/api/projects/{project_id}/notes")
+    assert [note["note_body"] for note in json.loads(response["body"])] == ["async"]
+
+
+def test_note_feed_takes_the_flask_arguments(project_id):
+    with app.test_client() as client:
+        for body in ("first", "second"):
+            client.post(f'/api/projects/{project_id}/shots/1/lay/notes', json={"note_body": body})
+        flask_notes = client.get(f'/api/projects/{project_id}/notes?fields=note_body').get_json()
+
+    response = call("GET", f"/api/projects/{project_id}/notes?fields=note_body&_=1")
+    assert response["status"] == 200
+    assert json.loads(response["body"]) == flask_notes
+    assert set(flask_notes[0]) == {"id", "note_body"}
+
+    response = call("GET", f"/api/projects/{project_id}/notes?stream=ndjson")
+    assert response["status"] == 200
+    assert response["headers"]["content-type"].startswith("application/x-ndjson")
+    lines = response["body"].decode().splitlines()
+    assert [json.loads(line)["note_body"] for line in lines] == ["first", "second"]
+
+    response = call("GET", f"/api/projects/{project_id}/notes?stream=json&limit=1")
+    assert [note["note_body"] for note in json.loads(response["body"])] == ["first"]
+
+    assert call("GET", f"/api/projects/{project_id}/notes?fields=nope")["status"] == 400
@@ -0,0 +1,106 @@
+import pytest
+import tempfile
+import os
+import sqlite3
+from tracktor_server.db_pool import ConnectionPool
+from tracktor_server.projects_table import Projects
+
+@pytest.fixture
+def pool():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    pool = ConnectionPool(path, size=2)
+    yield pool
+    pool.close_all()
+    os.remove(path)
+
+def test_connection_is_reused(pool):
+    connection = pool.connect()
+    connection.close()
+
+    # the idle connection is handed out again
+    assert pool.connect() is connection
+
+def test_pool_keeps_at_most_size_idle(pool):
+    connections = [pool.connect() for i in range(4)]
+    assert len({id(connection) for connection in connections}) == 4
+
+    for connection in connections:
+        connection.close()
+
+    reused = {id(pool.connect()) for i in range(4)}
+    assert len(reused & {id(connection) for connection in connections}) == 2
+
+def test_release_rolls_back_uncommitted(pool):
+    connection = pool.connect()
+    connection.execute("CREATE TABLE t(x INTEGER)")
+    connection.commit()
+    connection.execute("INSERT INTO t VALUES (1)")
+    connection.close()
+
+    connection = pool.connect()
+    assert not connection.in_transaction
+    assert connection.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    connection.close()
+
+def test_broken_connection_is_replaced(pool):
+    connection = pool.connect()
+    connection.close()
+    connection.discard()
+
+    new_connection = pool.connect()
+    assert new_connection is not connection
+    assert new_connection.execute("SELECT 1").fetchone()[0] == 1
+    new_connection.close()
+
+def test_table_classes_share_pool():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    projects = Projects(path)
+    projects.init_project_table()
+
+    connection = projects.get_db()
+    connection.close()
+    assert projects.get_db() is connection
+    connection.close()
+    os.remove(path)
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_gets_its_own_pool(pool):
+    from tracktor_server import db_pool
+    parent_pool = db_pool.get_pool(pool.db_name)
+    pid = os.fork()
+    if pid == 0:
+        # exit code 0 only if the child got a fresh pool
+        os._exit(0 if db_pool.get_pool(pool.db_name) is not parent_pool else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert db_pool.get_pool(pool.db_name) is parent_pool
+
+def test_second_close_does_nothing(pool):
+    connection = pool.connect()
+    connection.close()
+    # the connection is idle in the pool, a stale close must not close its handle
+    connection.close()
+
+    assert pool.connect() is connection
+    assert connection.execute("SELECT 1").fetchone()[0] == 1
+
+def test_connection_block_rolls_back_and_releases_on_error(pool):
+    with pool.connection() as connection:
+        connection.execute("CREATE TABLE t(x INTEGER)")
+        connection.commit()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        with pool.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("INSERT INTO t VALUES (1)")
+            connection.execute("INSERT INTO t VALUES (?)", (["not", "bindable"],))
+    assert not connection.checked_out
+
+    # the write lock was given back, so another connection can write straight away
+    other = sqlite3.connect(pool.db_name, timeout=0)
+    other.execute("INSERT INTO t VALUES (2)")
+    other.commit()
+    assert [row[0] for row in other.execute("SELECT x FROM t")] == [2]
+    other.close()
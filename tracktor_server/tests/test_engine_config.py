@@ -0,0 +1,40 @@
+import pytest
+import tempfile
+import os
+from tracktor_server.engine_config import EngineProfile
+from tracktor_server.projects_table import Projects
+
+@pytest.fixture
+def db_path():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    yield path
+    os.remove(path)
+
+def test_default_profile():
+    profile = EngineProfile()
+    assert profile.journal_mode == "WAL"
+    assert profile.synchronous == "NORMAL"
+
+def test_profile_from_env(monkeypatch):
+    monkeypatch.setenv("TRACKTOR_DB_JOURNAL_MODE", "delete")
+    monkeypatch.setenv("TRACKTOR_DB_BUSY_TIMEOUT", "250")
+    profile = EngineProfile.from_env()
+    assert profile.journal_mode == "DELETE"
+    assert profile.busy_timeout == 250
+    assert profile.synchronous == "NORMAL"
+
+def test_profile_rejects_invalid_values():
+    with pytest.raises(ValueError):
+        EngineProfile(journal_mode="WAL; DROP TABLE projects")
+    with pytest.raises(ValueError):
+        EngineProfile(synchronous="sometimes")
+    with pytest.raises(ValueError):
+        EngineProfile(mmap_size="lots")
+
+def test_table_connections_use_profile(db_path):
+    connection = Projects(db_path).get_db()
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert connection.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert connection.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    connection.close()
@@ -0,0 +1,23 @@
+import pytest
+from tracktor_server.login_throttle import LoginThrottle
+
+def test_user_limit():
+    throttle = LoginThrottle(window=60, user_limit=2, ip_limit=100)
+    assert throttle.attempt("bob", "10.0.0.1") == 0
+    assert throttle.attempt("bob", "10.0.0.2") == 0
+    assert throttle.attempt("bob", "10.0.0.3") > 0
+    # other users aren't affected
+    assert throttle.attempt("alice", "10.0.0.1") == 0
+    assert throttle.stats()["throttled"] == 1
+
+def test_ip_limit():
+    throttle = LoginThrottle(window=60, user_limit=100, ip_limit=2)
+    assert throttle.attempt("bob", "10.0.0.1") == 0
+    assert throttle.attempt("alice", "10.0.0.1") == 0
+    assert throttle.attempt("carol", "10.0.0.1") > 0
+    assert throttle.attempt("carol", "10.0.0.2") == 0
+
+def test_window_expires():
+    throttle = LoginThrottle(window=0, user_limit=1, ip_limit=1)
+    assert throttle.attempt("bob", "10.0.0.1") == 0
+    assert throttle.attempt("bob", "10.0.0.1") == 0
@@ -119,10 +119,379 @@ def test_change_status_success(client):
     assert response.status_code == 200
     assert response.get_json().get("message") == "Shot updated"
 
+def test_change_shot_status_unknown_column(client):
+    response = client.patch('/api/projects/1/shots/1', json={"status_item": "shot_name", "value": "x"})
+    assert response.status_code == 400
 
+def test_change_status_rejects_non_string_value(client):
+    project_id = client.post('/api/projects', json={"name": "test", "type": "vfx", "shotsNum": 1, "deadline": "2025"}).get_json()["project_id"]
+    shot_id = client.get(f'/api/projects/{project_id}/shots').get_json()[0]["id"]
 
+    response = client.patch(f'/api/projects/{project_id}/shots/{shot_id}', json={"status_item": "lay_status", "value": {"a": 1}})
+    assert response.status_code == 400
+    # the database isn't left locked for the next write
+    response = client.patch(f'/api/projects/{project_id}/shots/{shot_id}', json={"status_item": "lay_status", "value": "WIP"})
+    assert response.status_code == 200
+
+def test_change_shot_statuses(client):
+    data = { "name" : "test",
+             "type" : "vfx",
+             "shotsNum" : 3,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+    shots = client.get(f'/api/projects/{project_id}/shots').get_json()
+
+    changes = [{"id": shot["id"], "status_item": "lay_status", "value": "Approved"} for shot in shots]
+    response = client.patch(f'/api/projects/{project_id}/shots', json={"changes": changes})
+    assert response.status_code == 200
+    assert response.get_json()["updated"] == 3
+
+    shots = client.get(f'/api/projects/{project_id}/shots').get_json()
+    assert {shot["lay_status"] for shot in shots} == {"Approved"}
+
+def test_change_statuses_bad_request(client):
+    response = client.patch('/api/projects/1/shots', json={"changes": []})
+    assert response.status_code == 400
+    response = client.patch('/api/projects/1/assets', json={"changes": [{"id": 1, "status_item": "asset_name", "value": "x"}]})
+    assert response.status_code == 400
+    response = client.patch('/api/projects/1/assets', json={"changes": [{"status_item": "mod_status", "value": "x"}]})
+    assert response.status_code == 400
+    for value in (["x"], {"x": 1}, 5):
+        response = client.patch('/api/projects/1/shots', json={"changes": [{"id": 1, "status_item": "lay_status", "value": value}]})
+        assert response.status_code == 400
+    response = client.patch('/api/projects/1/shots', json={"changes": [{"id": 1, "status_item": ["lay_status"], "value": "x"}]})
+    assert response.status_code == 400
+    # nothing was left holding the write lock
+    response = client.patch('/api/projects/1/shots', json={"changes": [{"id": 1, "status_item": "lay_status", "value": "x"}]})
+    assert response.status_code == 200
+
+def test_create_shots(client):
+    data = { "name" : "test",
+             "type" : "vfx",
+             "shotsNum" : 0,
+             "deadline" : "2025"
+             }
+    create_response = client.post('/api/projects', json=data)
+    project_id = create_response.get_json()["project_id"]
+
+    response = client.post(f'/api/projects/{project_id}/create_shots', json={"shot_names": ["A_010", "A_020"]})
+    assert response.status_code == 201
+    assert len(response.get_json()["shot_ids"]) == 2
+
+    shots = client.get(f'/api/projects/{project_id}/shots').get_json()
+    assert [shot["shot_name"] for shot in shots] == ["A_010", "A_020"]
+
+def test_create_shots_missing_names(client):
+    response = client.post('/api/projects/1/create_shots', json={})
+    assert response.status_code == 400
+
+def test_existing_shots_paginated(client):
+    data = { "name" : "test",
+             "type" : "vfx",
+             "shotsNum" : 3,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+
+    response = client.get(f'/api/shots?project_id={project_id}&limit=2&fields=shot_name')
+    assert response.status_code == 200
+    shots = response.get_json()
+    assert len(shots) == 2
+    assert set(shots[0].keys()) == {"id", "shot_name"}
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f'/api/shots?project_id={project_id}&limit=2&after={cursor}')
+    assert len(response.get_json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+def test_existing_shots_bad_filter(client):
+    response = client.get('/api/shots?not_a_column=1')
+    assert response.status_code == 400
+
+def test_existing_shots_ignores_cache_buster(client):
+    response = client.get('/api/shots?_=1700000000&limit=1')
+    assert response.status_code == 200
+
+def test_existing_users_hides_passwords(client):
+    response = client.get('/api/users')
+    assert response.status_code == 200
+    assert all("user_password" not in user for user in response.get_json())
+    response = client.get('/api/users?user_password=x')
+    assert response.status_code == 400
+
+def test_existing_shots_ndjson(client):
+    data = { "name" : "test",
+             "type" : "vfx",
+             "shotsNum" : 2,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+
+    response = client.get(f'/api/shots?project_id={project_id}&stream=ndjson')
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    shots = [json.loads(line) for line in lines]
+    assert [shot["shot_name"] for shot in shots] == ["SHT_0010", "SHT_0020"]
+
+def test_existing_notes_streamed_json(client):
+    response = client.get('/api/notes?stream=json')
+    assert response.status_code == 200
+    assert isinstance(json.loads(response.get_data(as_text=True)), list)
+
+def test_existing_assets_ndjson_accept_header(client):
+    response = client.get('/api/assets', headers={"Accept": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+
+def test_display_shots_etag(client):
+    data = { "name" : "test",
+             "type" : "vfx",
+             "shotsNum" : 2,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+
+    response = client.get(f'/api/projects/{project_id}/shots')
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
 
+    response = client.get(f'/api/projects/{project_id}/shots', headers={"If-None-Match": etag})
+    assert response.status_code == 304
 
+    # a write changes the ETag
+    shot_id = client.get(f'/api/projects/{project_id}/shots').get_json()[0]["id"]
+    client.patch(f'/api/projects/{project_id}/shots/{shot_id}', json={"status_item": "lay_status", "value": "WIP"})
+    response = client.get(f'/api/projects/{project_id}/shots', headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_display_project_etag_differs_per_view(client):
+    data = { "name" : "test",
+             "type" : "vfx",
+             "shotsNum" : 1,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+    project_etag = client.get(f'/api/projects/{project_id}').headers["ETag"]
+    shots_etag = client.get(f'/api/projects/{project_id}/shots').headers["ETag"]
+    assert project_etag != shots_etag
+
+def test_project_changes(client):
+    data = { "name" : "test",
+             "type" : "vfx",
+             "shotsNum" : 2,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+    changes = client.get(f'/api/projects/{project_id}/changes').get_json()
+    assert len(changes["shots"]) == 2
+    revision = changes["revision"]
+
+    shot_id = changes["shots"][0]["id"]
+    client.patch(f'/api/projects/{project_id}/shots/{shot_id}', json={"status_item": "anim_status", "value": "WIP"})
+
+    response = client.get(f'/api/projects/{project_id}/changes?since={revision}')
+    assert response.status_code == 200
+    changes = response.get_json()
+    assert changes["revision"] == revision + 1
+    assert [shot["id"] for shot in changes["shots"]] == [shot_id]
+
+def test_project_changes_bad_since(client):
+    response = client.get('/api/projects/1/changes?since=yesterday')
+    assert response.status_code == 400
+
+def test_project_views_are_cached(client):
+    data = { "name" : "test",
+             "type" : "vfx",
+             "shotsNum" : 1,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+    hits = client.get('/api/cache').get_json()["hits"]
+
+    first = client.get(f'/api/projects/{project_id}/shots')
+    second = client.get(f'/api/projects/{project_id}/shots')
+    assert second.get_json() == first.get_json()
+    assert client.get('/api/cache').get_json()["hits"] == hits + 1
+
+    # a write drops the project's entries and is visible straight away
+    invalidations = client.get('/api/cache').get_json()["invalidations"]
+    shot_id = first.get_json()[0]["id"]
+    client.patch(f'/api/projects/{project_id}/shots/{shot_id}', json={"status_item": "lit_status", "value": "WIP"})
+    assert client.get('/api/cache').get_json()["invalidations"] > invalidations
+    shots = client.get(f'/api/projects/{project_id}/shots').get_json()
+    assert shots[0]["lit_status"] == "WIP"
+
+def test_project_snapshot(client):
+    data = { "name" : "test",
+             "type" : "vfx",
+             "shotsNum" : 2,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+    response = client.get(f'/api/projects/{project_id}/snapshot')
+    assert response.status_code == 200
+    snapshot = response.get_json()
+    assert snapshot["project"]["id"] == project_id
+    assert len(snapshot["shots"]) == 2
+    assert snapshot["assets"] == []
+    assert snapshot["note_counts"] == []
+    assert len(snapshot["members"]) == 1
+
+    # the snapshot is conditional like the other project views
+    response = client.get(f'/api/projects/{project_id}/snapshot', headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+def test_project_snapshot_missing(client):
+    response = client.get('/api/projects/999999/snapshot')
+    assert response.status_code == 404
+
+def test_project_stats(client):
+    data = { "name" : "test",
+             "type" : "vfx",
+             "shotsNum" : 2,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+    shots = client.get(f'/api/projects/{project_id}/shots').get_json()
+    client.patch(f'/api/projects/{project_id}/shots/{shots[0]["id"]}', json={"status_item": "lay_status", "value": "Complete"})
+
+    response = client.get(f'/api/projects/{project_id}/stats')
+    assert response.status_code == 200
+    stats = response.get_json()
+    assert stats["shots"]["total"] == 2
+    assert stats["shots"]["lay_status"]["Complete"] == 1
+    assert stats["assets"]["total"] == 0
+
+def test_login_is_throttled(client, monkeypatch):
+    from tracktor_server.login_throttle import LoginThrottle
+    monkeypatch.setattr("tracktor_server.main.login_throttle", LoginThrottle(user_limit=1))
+    credentials = {"user_name": "nobody", "user_password": "wrong"}
+
+    assert client.post('/api/login', json=credentials).get_json()["success"] is False
+    response = client.post('/api/login', json=credentials)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+def test_auth_stats(client):
+    stats = client.get('/api/auth/stats').get_json()
+    assert "queued" in stats["hasher"]
+    assert "throttled" in stats["throttle"]
+
+def test_login_session(client):
+    import uuid
+    name = f"session_{uuid.uuid4().hex[:8]}"
+    client.post('/api/users', json={"user_name": name, "user_password": "secret"})
+    login = client.post('/api/login', json={"user_name": name, "user_password": "secret"}).get_json()
+    assert login["success"] is True
+    headers = {"Authorization": f"Bearer {login['token']}"}
+
+    session = client.get('/api/session', headers=headers)
+    assert session.status_code == 200
+    assert session.get_json()["user_name"] == name
+
+    client.post('/api/logout', headers=headers)
+    assert client.get('/api/session', headers=headers).status_code == 401
+    assert client.get('/api/session').status_code == 401
+
+def test_logout_all(client):
+    import uuid
+    name = f"logout_{uuid.uuid4().hex[:8]}"
+    client.post('/api/users', json={"user_name": name, "user_password": "secret"})
+    tokens = [client.post('/api/login', json={"user_name": name, "user_password": "secret"}).get_json()["token"]
+              for i in range(2)]
+
+    assert client.post('/api/logout_all').status_code == 401
+    assert client.post('/api/logout_all', headers={"Authorization": f"Bearer {tokens[0]}"}).status_code == 200
+    assert all(client.get('/api/session', headers={"Authorization": f"Bearer {token}"}).status_code == 401
+               for token in tokens)
+
+def test_note_author_from_session(client):
+    import uuid
+    name = f"author_{uuid.uuid4().hex[:8]}"
+    client.post('/api/users', json={"user_name": name, "user_password": "secret"})
+    token = client.post('/api/login', json={"user_name": name, "user_password": "secret"}).get_json()["token"]
+
+    response = client.post('/api/projects/1/shots/1/LAY/notes', json={"note_body": "hi"},
+                           headers={"Authorization": f"Bearer {token}"})
+    assert response.get_json()["author"] == name
+
+def test_search_project_notes(client):
+    client.post('/api/projects/1/shots/1/CFX/notes', json={"note_body": "fix the flicker on the cape"})
+    client.post('/api/projects/1/shots/2/CFX/notes', json={"note_body": "cape flickering again"})
+
+    response = client.get('/api/projects/1/notes/search?q=cape flicker&limit=1')
+    assert response.status_code == 200
+    page = response.get_json()
+    assert len(page["results"]) == 1
+    assert "snippet" in page["results"][0]
+    assert page["next_offset"] == 1
+
+    assert client.get('/api/projects/1/notes/search').status_code == 400
+    assert client.get('/api/projects/1/notes/search?q=cape&offset=x').status_code == 400
+
+def test_project_note_feed(client):
+    data = { "name" : "feed",
+             "type" : "vfx",
+             "shotsNum" : 1,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+    first = client.post(f'/api/projects/{project_id}/shots/1/lay/notes', json={"note_body": "one"}).get_json()["id"]
+    client.post(f'/api/projects/{project_id}/shots/1/anim/notes', json={"note_body": "two"})
+
+    response = client.get(f'/api/projects/{project_id}/notes?limit=1')
+    assert [note["note_body"] for note in response.get_json()] == ["one"]
+    assert response.headers["X-Next-Cursor"] == str(first)
+    response = client.get(f'/api/projects/{project_id}/notes?after={first}')
+    assert [note["note_body"] for note in response.get_json()] == ["two"]
+    assert client.get(f'/api/projects/{project_id}/notes?bogus=1').status_code == 400
+
+    response = client.get(f'/api/projects/{project_id}/notes?fields=note_body')
+    assert response.get_json() == [{"id": first, "note_body": "one"}, {"id": first + 1, "note_body": "two"}]
+    assert client.get(f'/api/projects/{project_id}/notes?fields=bogus').status_code == 400
+
+def test_project_note_counts(client):
+    data = { "name" : "counts",
+             "type" : "vfx",
+             "shotsNum" : 1,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+    first = client.post(f'/api/projects/{project_id}/shots/1/lay/notes', json={"note_body": "one"}).get_json()["id"]
+    client.post(f'/api/projects/{project_id}/shots/1/lay/notes', json={"note_body": "two"})
+
+    response = client.get(f'/api/projects/{project_id}/notes/counts')
+    assert response.get_json() == [{"item_type": "shots", "item_id": 1, "item_dept": "lay",
+                                    "count": 2, "unread": 2, "latest_id": first + 1}]
+    assert client.get(f'/api/projects/{project_id}/notes/counts',
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+    unread = client.get(f'/api/projects/{project_id}/notes/counts?since={first}').get_json()
+    assert unread[0]["unread"] == 1
+    assert client.get(f'/api/projects/{project_id}/notes/counts?since=x').status_code == 400
+
+def test_join_project_updates_snapshot(client):
+    import uuid
+    data = { "name" : "join",
+             "type" : "vfx",
+             "shotsNum" : 1,
+             "deadline" : "2025"
+             }
+    project_id = client.post('/api/projects', json=data).get_json()["project_id"]
+    sharecode = client.get(f'/api/projects/{project_id}/share').get_json()["sharecode"]
+    credentials = {"user_name": f"joiner_{uuid.uuid4().hex[:8]}", "user_password": "secret"}
+    client.post('/api/users', json=credentials)
+    user_id = client.post('/api/login', json=credentials).get_json()["user_id"]
 
+    before = client.get(f'/api/projects/{project_id}/snapshot')
+    assert len(before.get_json()["members"]) == 1
 
+    client.post('/api/join_project', json={"sharecode": sharecode, "user_id": user_id})
 
+    after = client.get(f'/api/projects/{project_id}/snapshot', headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert user_id in [member["user_id"] for member in after.get_json()["members"]]
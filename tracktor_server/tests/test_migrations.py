@@ -0,0 +1,142 @@
+import pytest
+import tempfile
+import os
+from tracktor_server.migrations import migrate, get_version, LATEST_VERSION
+from tracktor_server.shots_table import Shots
+from tracktor_server.stats_table import Stats
+from tracktor_server.notes_table import Notes
+from tracktor_server.revisions_table import Revisions
+
+@pytest.fixture
+def db_path():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    yield path
+    os.remove(path)
+
+def get_indexes(db_path, table):
+    connection = Shots(db_path).get_db()
+    rows = connection.execute(f"PRAGMA index_list({table})").fetchall()
+    connection.close()
+    return {row["name"] for row in rows}
+
+def test_migrate_fresh_db(db_path):
+    applied = migrate(db_path)
+    assert applied[-1] == LATEST_VERSION
+    assert get_version(db_path) == LATEST_VERSION
+
+    assert "idx_shots_project_sort" in get_indexes(db_path, "shots")
+    assert "idx_assets_project_id" in get_indexes(db_path, "assets")
+    assert "idx_notes_item" in get_indexes(db_path, "notes")
+    assert "idx_notes_project_feed" in get_indexes(db_path, "notes")
+    assert "idx_notes_project_item" in get_indexes(db_path, "notes")
+    assert "idx_usersProjects_user_id" in get_indexes(db_path, "usersProjects")
+    assert "idx_users_user_name" in get_indexes(db_path, "users")
+
+def test_migrate_logs_applied_steps(db_path, caplog):
+    with caplog.at_level("INFO"):
+        migrate(db_path)
+    assert f"Applied migration {LATEST_VERSION}:" in caplog.text
+
+def test_migrate_is_idempotent(db_path):
+    migrate(db_path)
+    assert migrate(db_path) == []
+    assert get_version(db_path) == LATEST_VERSION
+
+def test_migrate_existing_db_keeps_data(db_path):
+    # a db created before migrations existed
+    shots = Shots(db_path)
+    shots.init_shots_table()
+    shots.add_shots_for_project(1, 2)
+    assert get_version(db_path) == 0
+
+    migrate(db_path)
+
+    assert get_version(db_path) == LATEST_VERSION
+    assert len(shots.get_shots_from_project(1)) == 2
+
+def test_migrate_backfills_shot_sort_key(db_path):
+    # shots table as it was before sort_key existed
+    connection = Shots(db_path).get_db()
+    connection.execute("""CREATE TABLE shots(
+                          project_id INTEGER,
+                          id INTEGER PRIMARY KEY AUTOINCREMENT,
+                          shot_name TEXT NOT NULL,
+                          status TEXT,
+                          lay_status TEXT,
+                          anim_status TEXT,
+                          cfx_status TEXT,
+                          lit_status TEXT)""")
+    connection.executemany("INSERT INTO shots(project_id, shot_name) VALUES(?, ?)",
+                           [(1, "SHT_0100"), (1, "SHT_0020"), (1, "custom")])
+    connection.commit()
+    connection.close()
+
+    migrate(db_path)
+
+    shots = Shots(db_path).get_shots_from_project(1)
+    assert [shot["shot_name"] for shot in shots] == ["custom", "SHT_0020", "SHT_0100"]
+
+    # rows written before the status_counts triggers existed are counted
+    assert Stats(db_path).get_project_stats(1)["shots"]["total"] == 3
+
+def test_migrate_indexes_existing_notes(db_path):
+    # notes written before the full-text index existed
+    connection = Shots(db_path).get_db()
+    connection.execute("""CREATE TABLE notes(
+                          id INTEGER PRIMARY KEY AUTOINCREMENT,
+                          item_type TEXT NOT NULL,
+                          item_id INTEGER,
+                          item_dept TEXT NOT NULL,
+                          timestamp TEXT NOT NULL,
+                          note_body TEXT NOT NULL,
+                          author TEXT NOT NULL)""")
+    connection.execute("INSERT INTO notes(item_type, item_id, item_dept, timestamp, note_body, author) "
+                       "VALUES('shot', 1, 'LAY', '2025', 'camera shake on the crane move', 'janedoe')")
+    connection.commit()
+    connection.close()
+
+    migrate(db_path)
+
+    # the note has no project_id, it belongs to project 1 through its shot
+    Shots(db_path).add_shots_for_project(1, 1)
+    results = Notes(db_path).search_notes(1, "crane")
+    assert [result["item_id"] for result in results] == [1]
+
+def test_migrate_makes_legacy_rows_visible_to_changes(db_path):
+    # shots and notes as they were before change tracking existed
+    connection = Shots(db_path).get_db()
+    connection.execute("""CREATE TABLE shots(
+                          project_id INTEGER,
+                          id INTEGER PRIMARY KEY AUTOINCREMENT,
+                          shot_name TEXT NOT NULL,
+                          status TEXT,
+                          lay_status TEXT,
+                          anim_status TEXT,
+                          cfx_status TEXT,
+                          lit_status TEXT)""")
+    connection.execute("""CREATE TABLE notes(
+                          id INTEGER PRIMARY KEY AUTOINCREMENT,
+                          item_type TEXT NOT NULL,
+                          item_id INTEGER,
+                          item_dept TEXT NOT NULL,
+                          timestamp TEXT NOT NULL,
+                          note_body TEXT NOT NULL,
+                          author TEXT NOT NULL)""")
+    connection.executemany("INSERT INTO shots(project_id, shot_name) VALUES(?, ?)", [(1, "SHT_0010"), (1, "SHT_0020")])
+    connection.execute("INSERT INTO notes(item_type, item_id, item_dept, timestamp, note_body, author) "
+                       "VALUES('shot', 1, 'LAY', '2025', 'legacy note', 'janedoe')")
+    connection.commit()
+    connection.close()
+
+    migrate(db_path)
+
+    changes = Revisions(db_path).get_changes(1, 0)
+    assert changes["revision"] == 1
+    assert [shot["shot_name"] for shot in changes["shots"]] == ["SHT_0010", "SHT_0020"]
+    assert [note["note_body"] for note in changes["notes"]] == ["legacy note"]
+    assert Revisions(db_path).get_changes(1, 1)["shots"] == []
+
+    # the next write moves past the stamped rows
+    Shots(db_path).add_shots_for_project(1, 1)
+    assert len(Revisions(db_path).get_changes(1, 1)["shots"]) == 1
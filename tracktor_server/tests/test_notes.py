@@ -1,7 +1,7 @@
 import pytest
 import tempfile
 import os
-from tracktor_server.notes_table import Notes
+from tracktor_server.notes_table import Notes, like_snippet
 from tracktor_server.projects_table import Projects
 from tracktor_server.shots_table import Shots
 
@@ -41,7 +41,9 @@ def test_init_notes_table(notes_mapper):
                         ("item_dept", "TEXT"),
                         ("timestamp", "TEXT"),
                         ("note_body", "TEXT"),
-                        ("author", "TEXT")]
+                        ("author", "TEXT"),
+                        ("project_id", "INTEGER"),
+                        ("revision", "INTEGER")]
     
     connection = notes_mapper.get_db()
     cursor = connection.cursor()
@@ -125,14 +127,14 @@ def test_get_all_notes(notes_mapper, projects_mapper, shots_mapper):
     pid2 = projects_mapper.add_project("B", "vfx", "New", 1, "2025")
     shots_mapper.add_shots_for_project(pid1, 1)
     shots_mapper.add_shots_for_project(pid2, 1)
-    shots = shots_mapper.get_all_shots()
+    shots = list(shots_mapper.get_all_shots())
     shot_id1 = shots[0]["id"]
     shot_id2 = shots[1]["id"]
 
     note1 = notes_mapper.add_note("shot",shot_id1, "LAY", "message", "12:30", "username")
     note2 = notes_mapper.add_note("shot", shot_id2, "ANI", "message", "12:50", "username")
      
-    all_notes = notes_mapper.get_all_notes()
+    all_notes = list(notes_mapper.get_all_notes())
     note_ids = [note["id"] for note in all_notes]
     assert note1 in note_ids
     assert note2 in note_ids
@@ -168,13 +170,77 @@ def test_remove_notes(notes_mapper):
     notes_mapper.add_note("shot", 3, "LAY", "Note 2", "eve")
     before = notes_mapper.get_notes_for_dept("shot", 3, "LAY")
     assert len(before) == 2
-    notes_mapper.remove_notes(3)
+    notes_mapper.remove_notes("shot", 3)
     after = notes_mapper.get_notes_for_dept("shot", 3, "LAY")
     assert len(after) == 0
 
+def test_remove_notes_keeps_other_item_types(notes_mapper):
+    # a shot and an asset can share an id
+    notes_mapper.add_note("shot", 4, "LAY", "Shot note", "dave")
+    notes_mapper.add_note("asset", 4, "MOD", "Asset note", "eve")
+    notes_mapper.remove_notes("shot", 4)
+    assert len(notes_mapper.get_notes("shot", 4)) == 0
+    assert len(notes_mapper.get_notes("asset", 4)) == 1
 
 
 
 
 
-    
\ No newline at end of file
+
+    
+def test_search_notes(notes_mapper):
+    notes_mapper.add_note("shot", 1, "CFX", "Please fix the flickering on the cape", "janedoe", project_id=1)
+    notes_mapper.add_note("shot", 2, "LIT", "The cape looks great", "janedoe", project_id=1)
+    notes_mapper.add_note("shot", 3, "CFX", "fix the flicker on the cape", "janedoe", project_id=2)
+
+    results = notes_mapper.search_notes(1, "fix the flicker on the cape")
+    assert [result["item_id"] for result in results] == [1]
+    assert "<mark>flickering</mark>" in results[0]["snippet"]
+
+    assert len(notes_mapper.search_notes(1, "cape")) == 2
+    assert len(notes_mapper.search_notes(1, "cape", limit=1, offset=1)) == 1
+    # query syntax is treated as plain words
+    assert notes_mapper.search_notes(1, 'cape" OR flick*') == []
+
+def test_search_notes_escapes_note_text(notes_mapper):
+    notes_mapper.add_note("shot", 1, "CFX", "<script>alert(1)</script> cape & cloth", "janedoe", project_id=1)
+
+    snippet = notes_mapper.search_notes(1, "cape")[0]["snippet"]
+    assert "<script>" not in snippet
+    assert "&lt;script&gt;" in snippet
+    assert "<mark>cape</mark> &amp;" in snippet
+
+def test_like_snippet_escapes_note_text():
+    snippet = like_snippet("<img src=x onerror=alert(1)> cape", ["cape"])
+    assert snippet == "&lt;img src=x onerror=alert(1)&gt; <mark>cape</mark>"
+
+def test_search_notes_follows_removals(notes_mapper):
+    notes_mapper.add_note("shot", 1, "CFX", "cape flicker", "janedoe", project_id=1)
+    notes_mapper.remove_notes("shot", 1)
+    assert notes_mapper.search_notes(1, "cape") == []
+
+def test_search_notes_needs_words(notes_mapper):
+    with pytest.raises(ValueError):
+        notes_mapper.search_notes(1, " ?! ")
+
+def test_get_project_notes(notes_mapper):
+    first = notes_mapper.add_note("shots", 1, "lay", "first", "janedoe", project_id=1)
+    notes_mapper.add_note("shots", 1, "anim", "other project", "janedoe", project_id=2)
+    notes_mapper.add_note("assets", 4, "mod", "second", "janedoe", project_id=1)
+
+    notes = list(notes_mapper.get_project_notes(1))
+    assert [note["note_body"] for note in notes] == ["first", "second"]
+    assert [note["note_body"] for note in notes_mapper.get_project_notes(1, after=first)] == ["second"]
+    assert [note["note_body"] for note in notes_mapper.get_project_notes(1, {"item_dept": "mod"})] == ["second"]
+
+def test_get_note_counts(notes_mapper):
+    seen = notes_mapper.add_note("shots", 1, "lay", "a", "janedoe", project_id=1)
+    notes_mapper.add_note("shots", 1, "lay", "b", "janedoe", project_id=1)
+    latest = notes_mapper.add_note("shots", 1, "anim", "c", "janedoe", project_id=1)
+    notes_mapper.add_note("shots", 1, "lay", "other project", "janedoe", project_id=2)
+
+    counts = [dict(row) for row in notes_mapper.get_note_counts(1, since=seen)]
+    assert counts == [
+        {"item_type": "shots", "item_id": 1, "item_dept": "anim", "count": 1, "unread": 1, "latest_id": latest},
+        {"item_type": "shots", "item_id": 1, "item_dept": "lay", "count": 2, "unread": 1, "latest_id": seen + 1},
+    ]
@@ -0,0 +1,46 @@
+import threading
+import pytest
+import bcrypt
+from tracktor_server.password_hasher import PasswordHasher, HasherBusy
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(workers=1, max_queue=0, rounds=4)
+
+def test_hash_and_check(hasher):
+    hashed = hasher.hash("secret")
+    assert hasher.check("secret", hashed)
+    assert hasher.check("secret", hashed.encode("utf-8"))
+    assert not hasher.check("wrong", hashed)
+    assert hasher.stats()["completed"] == 4
+
+def test_rounds_are_configurable(hasher):
+    hashed = hasher.hash("secret")
+    assert hashed.startswith("$2b$04$")
+    # hashes made with another work factor still check out
+    assert hasher.check("secret", bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=5)).decode("utf-8"))
+
+def test_invalid_rounds():
+    with pytest.raises(ValueError):
+        PasswordHasher(rounds=3)
+
+def test_full_queue_is_rejected(hasher):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait()
+
+    worker = threading.Thread(target=hasher._run, args=(slow,))
+    worker.start()
+    started.wait()
+    try:
+        assert hasher.stats()["in_progress"] == 1
+        with pytest.raises(HasherBusy):
+            hasher.hash("secret")
+    finally:
+        release.set()
+        worker.join()
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.check("secret", hasher.hash("secret"))
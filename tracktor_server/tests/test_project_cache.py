@@ -0,0 +1,53 @@
+import pytest
+from tracktor_server.project_cache import ProjectCache
+
+@pytest.fixture
+def cache():
+    return ProjectCache(max_bytes=100, ttl=60)
+
+def test_hit_and_miss(cache):
+    assert cache.get(1, "/api/projects/1", 1) is None
+    cache.set(1, "/api/projects/1", 1, b"body")
+    assert cache.get(1, "/api/projects/1", 1) == b"body"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["bytes"] == 4
+
+def test_other_revision_misses(cache):
+    cache.set(1, "/api/projects/1", 1, b"old")
+    assert cache.get(1, "/api/projects/1", 2) is None
+    # the stale entry is dropped
+    assert cache.stats()["entries"] == 0
+
+def test_ttl_expires(cache):
+    cache.ttl = 0
+    cache.set(1, "/api/projects/1", 1, b"body")
+    assert cache.get(1, "/api/projects/1", 1) is None
+
+def test_lru_eviction_by_size(cache):
+    cache.set(1, "a", 1, b"x" * 40)
+    cache.set(2, "b", 1, b"x" * 40)
+    # touch a so b is the least recently used
+    cache.get(1, "a", 1)
+    cache.set(3, "c", 1, b"x" * 40)
+
+    assert cache.get(2, "b", 1) is None
+    assert cache.get(1, "a", 1) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 80
+
+def test_too_big_body_isnt_stored(cache):
+    cache.set(1, "a", 1, b"x" * 101)
+    assert cache.stats()["entries"] == 0
+
+def test_invalidate_project(cache):
+    cache.set(1, "a", 1, b"one")
+    cache.set(1, "b", 1, b"one")
+    cache.set(2, "a", 1, b"two")
+    cache.invalidate(1)
+    assert cache.get(1, "a", 1) is None
+    assert cache.get(2, "a", 1) == b"two"
+    assert cache.stats()["invalidations"] == 2
@@ -2,6 +2,11 @@ import pytest
 import tempfile
 import os
 from tracktor_server.projects_table import Projects
+from tracktor_server.shots_table import Shots
+from tracktor_server.assets_table import Assets
+from tracktor_server.notes_table import Notes
+from tracktor_server.usersProjects_table import UsersProjects
+from tracktor_server.users_table import Users
 
 @pytest.fixture
 def db_mapper():
@@ -112,6 +117,46 @@ def test_remove_project(db_mapper):
     row = db_mapper.get_project(new_id)
     assert row is None
 
+def test_remove_project_cascades(db_mapper):
+    db_mapper.init_project_table()
+    shots = Shots(db_mapper.db_name)
+    shots.init_shots_table()
+    assets = Assets(db_mapper.db_name)
+    assets.init_assets_table()
+    notes = Notes(db_mapper.db_name)
+    notes.init_notes_table()
+    assignments = UsersProjects(db_mapper.db_name)
+    assignments.init_usersProjects_table()
+
+    project_id = db_mapper.add_project("Doomed", "vfx", "New", 2, "2025")
+    other_id = db_mapper.add_project("Kept", "vfx", "New", 1, "2025")
+    shot_ids = shots.add_shots_for_project(project_id, 2)
+    other_shot_ids = shots.add_shots_for_project(other_id, 1)
+    asset_id = assets.add_asset_for_project(project_id, "hero", "character")
+    assignments.add_assignment(1, project_id, "Admin")
+    assignments.add_assignment(1, other_id, "Admin")
+
+    notes.add_note("shots", shot_ids[0], "LAY", "with project", "bob", project_id=project_id)
+    notes.add_note("shot", shot_ids[1], "LAY", "legacy shot note", "bob")
+    notes.add_note("asset", asset_id, "MOD", "legacy asset note", "bob")
+    kept_note = notes.add_note("shots", other_shot_ids[0], "LAY", "other project", "bob", project_id=other_id)
+
+    db_mapper.remove_project(project_id)
+
+    assert db_mapper.get_project(project_id) is None
+    assert shots.get_shots_from_project(project_id) == []
+    assert assets.get_assets_from_project(project_id) == []
+    assert [note["id"] for note in notes.get_all_notes()] == [kept_note]
+    assert [row["project_id"] for row in assignments.get_assignments(1)] == [other_id]
+    assert len(shots.get_shots_from_project(other_id)) == 1
+
+def test_remove_project_without_other_tables(db_mapper):
+    # only the projects table exists
+    db_mapper.init_project_table()
+    new_id = db_mapper.add_project("TestName", "TestType", "New", 5, "2025")
+    db_mapper.remove_project(new_id)
+    assert db_mapper.get_project(new_id) is None
+
 def test_get_project_empty(db_mapper):
     # check the table exists
     db_mapper.init_project_table()
@@ -136,3 +181,38 @@ def test_get_project(db_mapper):
     assert row["status"] == "New"
     assert row["shotsNum"] == 5
     assert row["deadline"] == "2025"
+
+def test_get_snapshot(db_mapper):
+    db_mapper.init_project_table()
+    shots = Shots(db_mapper.db_name)
+    shots.init_shots_table()
+    assets = Assets(db_mapper.db_name)
+    assets.init_assets_table()
+    notes = Notes(db_mapper.db_name)
+    notes.init_notes_table()
+    assignments = UsersProjects(db_mapper.db_name)
+    assignments.init_usersProjects_table()
+    users = Users(db_mapper.db_name)
+    users.init_users_table()
+
+    project_id = db_mapper.add_project("Snap", "vfx", "New", 0, "2025")
+    shot_ids = shots.add_shots(project_id, ["SHT_0020", "SHT_0010"])
+    asset_id = assets.add_asset_for_project(project_id, "hero", "character")
+    user_id = users.add_user("janedoe", "secret")
+    assignments.add_assignment(user_id, project_id, "Admin")
+    notes.add_note("shots", shot_ids[0], "LAY", "one", "janedoe", project_id=project_id)
+    notes.add_note("shots", shot_ids[0], "LAY", "two", "janedoe", project_id=project_id)
+    notes.add_note("asset", asset_id, "MOD", "legacy", "janedoe")
+
+    snapshot = db_mapper.get_snapshot(project_id)
+    assert snapshot["project"]["name"] == "Snap"
+    assert snapshot["revision"] > 0
+    assert [shot["shot_name"] for shot in snapshot["shots"]] == ["SHT_0010", "SHT_0020"]
+    assert [asset["id"] for asset in snapshot["assets"]] == [asset_id]
+    assert [tuple(row) for row in snapshot["note_counts"]] == [("asset", asset_id, "MOD", 1),
+                                                               ("shots", shot_ids[0], "LAY", 2)]
+    assert [tuple(row) for row in snapshot["members"]] == [(user_id, "janedoe", "Admin")]
+
+def test_get_snapshot_missing(db_mapper):
+    db_mapper.init_project_table()
+    assert db_mapper.get_snapshot(1) is None
@@ -0,0 +1,93 @@
+import pytest
+import tempfile
+import os
+from tracktor_server.revisions_table import Revisions
+from tracktor_server.projects_table import Projects
+from tracktor_server.shots_table import Shots
+from tracktor_server.assets_table import Assets
+from tracktor_server.notes_table import Notes
+
+@pytest.fixture
+def projects_mapper():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    projects = Projects(path)
+    projects.init_project_table()
+    yield projects
+    os.remove(path)
+
+@pytest.fixture
+def revisions_mapper(projects_mapper):
+    revisions = Revisions(projects_mapper.db_name)
+    revisions.init_revisions_table()
+    yield revisions
+
+def test_get_revision_unknown_project(revisions_mapper):
+    assert revisions_mapper.get_revision(42) == 0
+
+def test_writes_bump_revision(projects_mapper, revisions_mapper):
+    shots = Shots(projects_mapper.db_name)
+    shots.init_shots_table()
+    assets = Assets(projects_mapper.db_name)
+    assets.init_assets_table()
+    notes = Notes(projects_mapper.db_name)
+    notes.init_notes_table()
+
+    project_id = projects_mapper.add_project("A", "vfx", "New", 0, "2025")
+    revision = revisions_mapper.get_revision(project_id)
+    assert revision == 1
+
+    shot_id = shots.add_shot_for_project(project_id, "SHT_0010")
+    assert revisions_mapper.get_revision(project_id) == revision + 1
+
+    shots.change_shot_status(shot_id, "lay_status", "WIP")
+    assert revisions_mapper.get_revision(project_id) == revision + 2
+
+    asset_id = assets.add_asset_for_project(project_id, "hero", "character")
+    assets.change_asset_status(asset_id, "mod_status", "WIP")
+    assert revisions_mapper.get_revision(project_id) == revision + 4
+
+    notes.add_note("shots", shot_id, "LAY", "message", "bob", project_id=project_id)
+    assert revisions_mapper.get_revision(project_id) == revision + 5
+
+def test_revisions_are_per_project(projects_mapper, revisions_mapper):
+    pid1 = projects_mapper.add_project("A", "vfx", "New", 0, "2025")
+    pid2 = projects_mapper.add_project("B", "vfx", "New", 0, "2025")
+    projects_mapper.get_sharecode(pid1)
+    assert revisions_mapper.get_revision(pid1) == 2
+    assert revisions_mapper.get_revision(pid2) == 1
+
+def test_get_changes(projects_mapper, revisions_mapper):
+    shots = Shots(projects_mapper.db_name)
+    shots.init_shots_table()
+    assets = Assets(projects_mapper.db_name)
+    assets.init_assets_table()
+    notes = Notes(projects_mapper.db_name)
+    notes.init_notes_table()
+
+    project_id = projects_mapper.add_project("A", "vfx", "New", 0, "2025")
+    shot_ids = shots.add_shots(project_id, ["SHT_0010", "SHT_0020", "SHT_0030"])
+    asset_id = assets.add_asset_for_project(project_id, "hero", "character")
+    since = revisions_mapper.get_revision(project_id)
+
+    # nothing changed yet
+    changes = revisions_mapper.get_changes(project_id, since)
+    assert changes["revision"] == since
+    assert changes["shots"] == [] and changes["assets"] == [] and changes["notes"] == []
+
+    shots.change_shot_status(shot_ids[0], "lay_status", "WIP")
+    shots.remove_shot_from_project(shot_ids[1])
+    note_id = notes.add_note("shots", shot_ids[0], "LAY", "message", "bob", project_id=project_id)
+
+    changes = revisions_mapper.get_changes(project_id, since)
+    assert changes["revision"] == since + 3
+    assert [shot["id"] for shot in changes["shots"]] == [shot_ids[0]]
+    assert changes["shots"][0]["lay_status"] == "WIP"
+    assert changes["assets"] == []
+    assert [note["id"] for note in changes["notes"]] == [note_id]
+    assert changes["deleted"]["shots"] == [shot_ids[1]]
+
+    # a full sync returns everything still alive
+    changes = revisions_mapper.get_changes(project_id, 0)
+    assert {shot["id"] for shot in changes["shots"]} == {shot_ids[0], shot_ids[2]}
+    assert [asset["id"] for asset in changes["assets"]] == [asset_id]
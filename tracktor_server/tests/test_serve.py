@@ -0,0 +1,22 @@
+import pytest
+from tracktor_server.serve import get_options
+
+def test_default_options(monkeypatch):
+    for name in ("TRACKTOR_HOST", "TRACKTOR_PORT", "TRACKTOR_WORKERS", "TRACKTOR_THREADS", "TRACKTOR_PRELOAD"):
+        monkeypatch.delenv(name, raising=False)
+    options = get_options()
+    assert options["bind"] == "0.0.0.0:8080"
+    assert options["workers"] >= 1
+    assert options["worker_class"] == "gthread"
+    assert options["preload_app"] is True
+
+def test_options_from_env(monkeypatch):
+    monkeypatch.setenv("TRACKTOR_PORT", "9000")
+    monkeypatch.setenv("TRACKTOR_WORKERS", "3")
+    monkeypatch.setenv("TRACKTOR_THREADS", "8")
+    monkeypatch.setenv("TRACKTOR_PRELOAD", "0")
+    options = get_options()
+    assert options["bind"] == "0.0.0.0:9000"
+    assert options["workers"] == 3
+    assert options["threads"] == 8
+    assert options["preload_app"] is False
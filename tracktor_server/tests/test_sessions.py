@@ -0,0 +1,81 @@
+import pytest
+import tempfile
+import os
+from tracktor_server import sessions_table
+from tracktor_server.sessions_table import Sessions, hash_token
+
+@pytest.fixture
+def sessions_mapper():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    sessions = Sessions(path, ttl=60, recheck=30)
+    sessions.init_sessions_table()
+    yield sessions
+    os.remove(path)
+
+def test_create_and_validate(sessions_mapper):
+    token, expires_at = sessions_mapper.create_session(7)
+    assert sessions_mapper.get_user_id(token) == 7
+    assert sessions_mapper.get_user_id("not-a-token") is None
+    assert sessions_mapper.get_user_id(None) is None
+
+def test_only_the_hash_is_stored(sessions_mapper):
+    token, _ = sessions_mapper.create_session(7)
+    connection = sessions_mapper.get_db()
+    rows = connection.execute("SELECT token_hash FROM sessions").fetchall()
+    connection.close()
+    assert [row["token_hash"] for row in rows] == [hash_token(token)]
+
+def test_other_process_sees_session(sessions_mapper):
+    token, _ = sessions_mapper.create_session(7)
+    # a second store on the same db, like another worker, reads it from the table
+    other = Sessions(sessions_mapper.db_name)
+    assert other.get_user_id(token) == 7
+
+def test_revoke(sessions_mapper):
+    token, _ = sessions_mapper.create_session(7)
+    other_token, _ = sessions_mapper.create_session(8)
+    sessions_mapper.revoke(token)
+    assert sessions_mapper.get_user_id(token) is None
+    assert sessions_mapper.get_user_id(other_token) == 8
+
+def test_revoke_user(sessions_mapper):
+    tokens = [sessions_mapper.create_session(7)[0] for i in range(2)]
+    sessions_mapper.revoke_user(7)
+    assert all(sessions_mapper.get_user_id(token) is None for token in tokens)
+
+def test_revoked_elsewhere_after_recheck(sessions_mapper):
+    sessions_mapper.recheck = 0
+    token, _ = sessions_mapper.create_session(7)
+    Sessions(sessions_mapper.db_name).revoke(token)
+    assert sessions_mapper.get_user_id(token) is None
+
+def test_expired_session(sessions_mapper):
+    sessions_mapper.ttl = 0
+    token, _ = sessions_mapper.create_session(7)
+    assert sessions_mapper.get_user_id(token) is None
+    assert sessions_mapper.purge_expired() == 1
+
+def test_expired_session_leaves_memory(sessions_mapper):
+    sessions_mapper.ttl = 0
+    token, _ = sessions_mapper.create_session(7)
+    sessions_mapper.get_user_id(token)
+    assert sessions_mapper._valid == {}
+
+def test_memory_is_capped(sessions_mapper, monkeypatch):
+    monkeypatch.setattr(sessions_table, "MAX_CACHED_SESSIONS", 3)
+    tokens = [sessions_mapper.create_session(user_id)[0] for user_id in range(5)]
+    assert len(sessions_mapper._valid) == 3
+    # dropped tokens are still valid, they're read from the table again
+    assert [sessions_mapper.get_user_id(token) for token in tokens] == list(range(5))
+    assert len(sessions_mapper._valid) == 3
+
+def test_memory_drops_least_recently_checked(sessions_mapper, monkeypatch):
+    monkeypatch.setattr(sessions_table, "MAX_CACHED_SESSIONS", 2)
+    sessions_mapper.recheck = 0
+    first, _ = sessions_mapper.create_session(1)
+    second, _ = sessions_mapper.create_session(2)
+    sessions_mapper.get_user_id(first)
+    sessions_mapper.create_session(3)
+    assert hash_token(first) in sessions_mapper._valid
+    assert hash_token(second) not in sessions_mapper._valid
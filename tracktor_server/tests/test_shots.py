@@ -1,7 +1,7 @@
 import pytest
 import tempfile
 import os
-from tracktor_server.shots_table import Shots
+from tracktor_server.shots_table import Shots, shot_sort_key
 from tracktor_server.projects_table import Projects
 
 
@@ -32,7 +32,9 @@ def test_init_shots_table(shots_mapper):
                         ("lay_status", "TEXT"),
                         ("anim_status", "TEXT"),
                         ("cfx_status", "TEXT"),
-                        ("lit_status", "TEXT")
+                        ("lit_status", "TEXT"),
+                        ("sort_key", "INTEGER"),
+                        ("revision", "INTEGER")
                         ]
     
     connection = shots_mapper.get_db()
@@ -113,8 +115,7 @@ def test_get_shot_from_project(projects_mapper, shots_mapper):
 
 def test_get_all_shots_empty(shots_mapper):
     shots_mapper.init_shots_table()
-    shots = shots_mapper.get_all_shots()
-    assert isinstance(shots, list)
+    shots = list(shots_mapper.get_all_shots())
     assert len(shots) == 0
 
 def test_get_all_shots_multiple_projects(projects_mapper, shots_mapper):
@@ -123,7 +124,7 @@ def test_get_all_shots_multiple_projects(projects_mapper, shots_mapper):
     pid2 = projects_mapper.add_project("B", "vfx", "New", 1, "2025")
     shots_mapper.add_shots_for_project(pid1, 1)
     shots_mapper.add_shots_for_project(pid2, 1)
-    shots = shots_mapper.get_all_shots()
+    shots = list(shots_mapper.get_all_shots())
     assert len(shots) == 2
     project_ids = {shot["project_id"] for shot in shots}
     assert {pid1, pid2} == project_ids
@@ -204,11 +205,120 @@ def test_change_shot_status(projects_mapper, shots_mapper):
     updated_shot = shots_mapper.get_shot_from_project(project_id, shot_id)
     assert updated_shot["anim_status"] == "WIP"
 
+def test_change_shot_status_unknown_column(projects_mapper, shots_mapper):
+    shots_mapper.init_shots_table()
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 1, "2025")
+    shot_id = shots_mapper.add_shots_for_project(project_id, 1)[0]
+    with pytest.raises(ValueError):
+        shots_mapper.change_shot_status(shot_id, "shot_name", "renamed")
+
+def test_change_shot_status_needs_string_value(projects_mapper, shots_mapper):
+    shots_mapper.init_shots_table()
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 1, "2025")
+    shot_id = shots_mapper.add_shots_for_project(project_id, 1)[0]
+    with pytest.raises(ValueError):
+        shots_mapper.change_shot_status(shot_id, "lay_status", ["WIP"])
+    shots_mapper.change_shot_status(shot_id, "lay_status", "WIP")
+    assert shots_mapper.get_shot_from_project(project_id, shot_id)["lay_status"] == "WIP"
 
+def test_change_shot_statuses(projects_mapper, shots_mapper):
+    shots_mapper.init_shots_table()
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 3, "2025")
+    other_id = projects_mapper.add_project("Other", "vfx", "New", 1, "2025")
+    shot_ids = shots_mapper.add_shots_for_project(project_id, 3)
+    other_shot_id = shots_mapper.add_shots_for_project(other_id, 1)[0]
+
+    updated = shots_mapper.change_shot_statuses(project_id, [(shot_ids[0], "lay_status", "Approved"),
+                                                             (shot_ids[1], "anim_status", "Approved"),
+                                                             (other_shot_id, "lay_status", "Approved")])
+    # the shot of the other project isn't touched
+    assert updated == 2
+    assert shots_mapper.get_shot_from_project(project_id, shot_ids[0])["lay_status"] == "Approved"
+    assert shots_mapper.get_shot_from_project(project_id, shot_ids[1])["anim_status"] == "Approved"
+    assert shots_mapper.get_shot_from_project(other_id, other_shot_id)["lay_status"] == "Not Started"
+
+def test_change_shot_statuses_validates_first(projects_mapper, shots_mapper):
+    shots_mapper.init_shots_table()
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 1, "2025")
+    shot_id = shots_mapper.add_shots_for_project(project_id, 1)[0]
+    with pytest.raises(ValueError):
+        shots_mapper.change_shot_statuses(project_id, [(shot_id, "lay_status", "Approved"),
+                                                       (shot_id, "id", 5)])
+    with pytest.raises(ValueError):
+        shots_mapper.change_shot_statuses(project_id, [(shot_id, "lay_status", "Approved"),
+                                                       (shot_id, "anim_status", ["Approved"])])
+    assert shots_mapper.get_shot_from_project(project_id, shot_id)["lay_status"] == "Not Started"
 
+def test_add_shots_for_project_names(projects_mapper, shots_mapper):
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 3, "2025")
 
+    shot_ids = shots_mapper.add_shots_for_project(project_id, 3)
+    assert len(shot_ids) == 3
 
+    names = [shots_mapper.get_shot_from_project(project_id, shot_id)["shot_name"] for shot_id in shot_ids]
+    assert names == ["SHT_0010", "SHT_0020", "SHT_0030"]
 
+def test_add_shots(projects_mapper, shots_mapper):
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 0, "2025")
 
-    
+    shot_ids = shots_mapper.add_shots(project_id, ["SQ010_SH0010", "SQ010_SH0020"])
+    assert len(shot_ids) == 2
 
+    shot = shots_mapper.get_shot_from_project(project_id, shot_ids[1])
+    assert shot["shot_name"] == "SQ010_SH0020"
+    assert shot["lit_status"] == "Not Started"
+
+def test_add_shots_empty(projects_mapper, shots_mapper):
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 0, "2025")
+    assert shots_mapper.add_shots(project_id, []) == []
+
+def test_shot_sort_key():
+    assert shot_sort_key("SHT_0010") < shot_sort_key("SHT_0020") < shot_sort_key("SHT_0100")
+    assert shot_sort_key("SQ010_SH0100") < shot_sort_key("SQ020_SH0010")
+    assert shot_sort_key("no_digits") == 0
+
+def test_get_shots_from_project_order(projects_mapper, shots_mapper):
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 0, "2025")
+    shots_mapper.add_shots(project_id, ["SQ020_SH0010", "SQ010_SH0100", "SQ010_SH0020"])
+    shots_mapper.add_shot_for_project(project_id, "SQ010_SH0050")
+
+    shots = shots_mapper.get_shots_from_project(project_id)
+    assert [shot["shot_name"] for shot in shots] == ["SQ010_SH0020", "SQ010_SH0050", "SQ010_SH0100", "SQ020_SH0010"]
+
+def test_get_all_shots_streams(projects_mapper, shots_mapper):
+    project_id = projects_mapper.add_project("A", "vfx", "New", 1, "2025")
+    shots_mapper.add_shots_for_project(project_id, 1)
+    shots = shots_mapper.get_all_shots()
+    assert not isinstance(shots, list)
+    assert next(shots)["project_id"] == project_id
+
+def test_get_all_shots_filters_and_fields(projects_mapper, shots_mapper):
+    pid1 = projects_mapper.add_project("A", "vfx", "New", 2, "2025")
+    pid2 = projects_mapper.add_project("B", "vfx", "New", 1, "2025")
+    shots_mapper.add_shots_for_project(pid1, 2)
+    shots_mapper.add_shots_for_project(pid2, 1)
+    shot_id = shots_mapper.get_shots_from_project(pid1)[0]["id"]
+    shots_mapper.change_shot_status(shot_id, "lay_status", "Approved")
+
+    shots = list(shots_mapper.get_all_shots(fields=["shot_name"], filters={"project_id": pid1, "lay_status": "Approved"}))
+    assert len(shots) == 1
+    assert dict(shots[0]) == {"id": shot_id, "shot_name": "SHT_0010"}
+
+def test_get_all_shots_pagination(projects_mapper, shots_mapper):
+    project_id = projects_mapper.add_project("A", "vfx", "New", 5, "2025")
+    shots_mapper.add_shots_for_project(project_id, 5)
+
+    first_page = list(shots_mapper.get_all_shots(limit=2))
+    second_page = list(shots_mapper.get_all_shots(after=first_page[-1]["id"], limit=2))
+    last_page = list(shots_mapper.get_all_shots(after=second_page[-1]["id"], limit=2))
+    ids = [shot["id"] for shot in first_page + second_page + last_page]
+    assert len(ids) == 5
+    assert ids == sorted(ids)
+
+def test_get_all_shots_invalid_arguments(shots_mapper):
+    with pytest.raises(ValueError):
+        shots_mapper.get_all_shots(fields=["nope"])
+    with pytest.raises(ValueError):
+        shots_mapper.get_all_shots(filters={"1=1; --": 1})
+    with pytest.raises(ValueError):
+        shots_mapper.get_all_shots(limit=0)
@@ -0,0 +1,83 @@
+import pytest
+import tempfile
+import os
+from tracktor_server.stats_table import Stats, rebuild_status_counts
+from tracktor_server.projects_table import Projects
+from tracktor_server.shots_table import Shots, STATUS_COLUMNS
+from tracktor_server.assets_table import Assets
+
+@pytest.fixture
+def projects_mapper():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    projects = Projects(path)
+    projects.init_project_table()
+    yield projects
+    os.remove(path)
+
+@pytest.fixture
+def shots_mapper(projects_mapper):
+    shots = Shots(projects_mapper.db_name)
+    shots.init_shots_table()
+    yield shots
+
+@pytest.fixture
+def stats_mapper(projects_mapper):
+    yield Stats(projects_mapper.db_name)
+
+def test_empty_project(shots_mapper, stats_mapper):
+    stats = stats_mapper.get_project_stats(1)
+    assert stats == {"shots": {"total": 0}, "assets": {"total": 0}}
+
+def test_counts_follow_inserts_and_updates(projects_mapper, shots_mapper, stats_mapper):
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 3, "2025")
+    shot_ids = shots_mapper.add_shots_for_project(project_id, 3)
+
+    stats = stats_mapper.get_project_stats(project_id)
+    assert stats["shots"]["total"] == 3
+    assert stats["shots"]["lay_status"] == {"Not Started": 3}
+
+    shots_mapper.change_shot_status(shot_ids[0], "lay_status", "Complete")
+    shots_mapper.change_shot_statuses(project_id, [(shot_ids[1], "lay_status", "Complete"),
+                                                   (shot_ids[2], "anim_status", "WIP")])
+
+    stats = stats_mapper.get_project_stats(project_id)
+    assert stats["shots"]["lay_status"] == {"Not Started": 1, "Complete": 2}
+    assert stats["shots"]["anim_status"] == {"Not Started": 2, "WIP": 1}
+
+def test_counts_follow_deletes(projects_mapper, shots_mapper, stats_mapper):
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 2, "2025")
+    shot_ids = shots_mapper.add_shots_for_project(project_id, 2)
+    shots_mapper.change_shot_status(shot_ids[0], "lit_status", "WIP")
+
+    shots_mapper.remove_shot_from_project(shot_ids[0])
+    stats = stats_mapper.get_project_stats(project_id)
+    assert stats["shots"]["total"] == 1
+    # statuses nobody has any more are gone
+    assert stats["shots"]["lit_status"] == {"Not Started": 1}
+
+    projects_mapper.remove_project(project_id)
+    assert stats_mapper.get_project_stats(project_id)["shots"] == {"total": 0}
+
+def test_asset_counts(projects_mapper, stats_mapper):
+    assets = Assets(projects_mapper.db_name)
+    assets.init_assets_table()
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 0, "2025")
+    asset_id = assets.add_asset_for_project(project_id, "hero", "character")
+    assets.change_asset_status(asset_id, "srf_status", "WIP")
+
+    stats = stats_mapper.get_project_stats(project_id)
+    assert stats["assets"]["total"] == 1
+    assert stats["assets"]["srf_status"] == {"WIP": 1}
+
+def test_rebuild_matches_triggers(projects_mapper, shots_mapper, stats_mapper):
+    project_id = projects_mapper.add_project("Test", "vfx", "New", 4, "2025")
+    shot_ids = shots_mapper.add_shots_for_project(project_id, 4)
+    shots_mapper.change_shot_status(shot_ids[0], "cfx_status", "Omitted")
+    before = stats_mapper.get_project_stats(project_id)
+
+    connection = shots_mapper.get_db()
+    rebuild_status_counts(connection, "shots", STATUS_COLUMNS)
+    connection.commit()
+    connection.close()
+    assert stats_mapper.get_project_stats(project_id) == before
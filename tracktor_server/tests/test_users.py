@@ -82,6 +82,5 @@ def test_get_users(db_mapper):
     db_mapper.add_user("sampleUser1", "samplePass1")
     db_mapper.add_user("sampleUser2", "samplePass2")
 
-    rows = db_mapper.get_users()
-    assert isinstance(rows, list)
+    rows = list(db_mapper.get_users())
     assert len(rows) == 2
\ No newline at end of file
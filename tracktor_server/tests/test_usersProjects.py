@@ -82,6 +82,5 @@ def test_get_all_assignments(db_mapper):
     db_mapper.add_assignment(2, 3, "Admin")
     db_mapper.add_assignment(1, 3, "Observer")
 
-    rows = db_mapper.get_all_assignments()
-    assert isinstance(rows, list)
+    rows = list(db_mapper.get_all_assignments())
     assert len(rows) == 2
\ No newline at end of file
@@ -1,6 +1,10 @@
 
 import sqlite3
 from sqlite3 import Error
+from db_pool import get_pool
+from queries import list_rows
+from revisions_table import bump_revision, create_revisions_table
+from project_cache import invalidate_projects
 
 
 class UsersProjects:
@@ -27,35 +31,35 @@ class UsersProjects:
     
     def get_db(self):
         """
-        Opens the named database or creates one if it doesn't exist.
+        Gets a pooled connection to the named database, creating the db if it doesn't exist.
+        Closing the connection returns it to the pool.
         
         Returns:
             sqlite3.Connection: The db connection object.
         """
-        connection = sqlite3.connect(self.db_name)
-        connection.row_factory = sqlite3.Row
-        return connection
+        return get_pool(self.db_name).connect()
         
     def init_usersProjects_table(self):
         """
         Creates and SQL table for users if it doesn't already exist.
         """
-        connection = self.get_db()
-        connection.execute("""
-                                CREATE TABLE IF NOT EXISTS usersProjects(
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                user_id INTEGER,
-                                project_id INTEGER,
-                                role TEXT 
-                                )
-                                """,
-                                )
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("""
+                                    CREATE TABLE IF NOT EXISTS usersProjects(
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                    user_id INTEGER,
+                                    project_id INTEGER,
+                                    role TEXT 
+                                    )
+                                    """,
+                                    )
+            create_revisions_table(connection)
+            connection.commit()
 
     def add_assignment(self, user_id, project_id, role):
         """
         Add a connection from a user_id to the project_id.
+        The project's revision is bumped, since its member list is part of the project snapshot.
         
         Args:
             user_id (int): The ID of the user.
@@ -65,21 +69,22 @@ class UsersProjects:
         Returns:
             int: The ID of the newly created assignment.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-
-
-        cursor.execute("""
-                       INSERT INTO usersProjects(
-                       user_id,
-                       project_id,
-                       role
-                       )
-                       VALUES(?, ?, ?)
-                        """, (user_id, project_id, role))
-        connection.commit()
-        new_id = cursor.lastrowid
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+
+
+            cursor.execute("""
+                           INSERT INTO usersProjects(
+                           user_id,
+                           project_id,
+                           role
+                           )
+                           VALUES(?, ?, ?)
+                            """, (user_id, project_id, role))
+            new_id = cursor.lastrowid
+            bump_revision(connection, project_id)
+            connection.commit()
+        invalidate_projects(self.db_name, [project_id])
         return new_id
     
     def get_assignments(self, user_id):
@@ -92,23 +97,28 @@ class UsersProjects:
         Returns:
             list[sqlite3.Row]: A list of project IDs for the user.
         """
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute("SELECT project_id FROM usersProjects WHERE user_id = ?", (user_id,))
-        assignments = cursor.fetchall()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT project_id FROM usersProjects WHERE user_id = ?", (user_id,))
+            assignments = cursor.fetchall()
         return assignments
         
-    def get_all_assignments(self):
+    def get_all_assignments(self, fields=None, filters=None, after=None, limit=None):
         """
-        Get all user-project assignments
+        Streams all assignment rows, optionally filtered and paginated by id.
+
+        Args:
+            fields (list[str], optional): The columns to return. Defaults to all columns.
+            filters (dict, optional): Column -> value pairs to match (e.g. {'project_id': 1, 'role': 'Admin'}).
+            after (int, optional): Only return rows with an id greater than this.
+            limit (int, optional): The maximum number of rows to return.
 
         Returns:
-            list[sqlite3.Row]: A list of all user-project assignment rows.
+            Iterator[sqlite3.Row]: The assignment rows, ordered by id.
+
+        Raises:
+            ValueError: If a field or filter isn't a column of the table.
         """
-        connection = self.get_db()
-        rows = connection.execute("SELECT * FROM usersProjects").fetchall()
-        connection.close()
-        return rows
+        return list_rows(self.get_db(), "usersProjects", fields, filters, after, limit)
 
         
\ No newline at end of file
@@ -1,6 +1,8 @@
 import sqlite3
-import bcrypt
 from sqlite3 import Error
+from db_pool import get_pool
+from queries import list_rows
+from password_hasher import get_hasher
 
 class Users:
     """
@@ -26,30 +28,28 @@ class Users:
     
     def get_db(self):
         """
-        Opens the named database or creates one if it doesn't exist.
+        Gets a pooled connection to the named database, creating the db if it doesn't exist.
+        Closing the connection returns it to the pool.
         
         Returns:
             sqlite3.Connection: The db connection object.
         """
-        connection = sqlite3.connect(self.db_name)
-        connection.row_factory = sqlite3.Row
-        return connection
+        return get_pool(self.db_name).connect()
         
     def init_users_table(self):
         """
         Creates and SQL table for users if it doesn't already exist.
         """
-        connection = self.get_db()
-        connection.execute("""
-                                CREATE TABLE IF NOT EXISTS users(
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                user_name TEXT NOT NULL,
-                                user_password TEXT NOT NULL
-                                )
-                                """,
-                                )
-        connection.commit()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            connection.execute("""
+                                    CREATE TABLE IF NOT EXISTS users(
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                    user_name TEXT NOT NULL,
+                                    user_password TEXT NOT NULL
+                                    )
+                                    """,
+                                    )
+            connection.commit()
 
     def add_user(self, username, password):
         """
@@ -61,25 +61,27 @@ class Users:
 
         Returns:
             int: The ID of the newly created user.
+
+        Raises:
+            HasherBusy: If the password hashing pool is overloaded.
         """
 
-        # hash the password
-        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode("utf-8")
-
-        connection = self.get_db()
-        cursor = connection.cursor()
-        cursor.execute("""
-                        INSERT INTO users(
-                        user_name,
-                        user_password
-                       )
-                       VALUES(?, ?)
-                       """,
-                       (username, hashed))
+        # hash the password on the hashing pool
+        hashed = get_hasher().hash(password)
+
+        with get_pool(self.db_name).connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("""
+                            INSERT INTO users(
+                            user_name,
+                            user_password
+                           )
+                           VALUES(?, ?)
+                           """,
+                           (username, hashed))
         
-        connection.commit()
-        new_id = cursor.lastrowid
-        connection.close()
+            connection.commit()
+            new_id = cursor.lastrowid
 
         return new_id
     
@@ -94,23 +96,27 @@ class Users:
             sqlite3.Row: The user row, or None if not found.
         """
 
-        connection = self.get_db()
-        row = connection.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            row = connection.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
         return row
     
-    def get_users(self):
+    def get_users(self, fields=None, filters=None, after=None, limit=None):
         """
-        Gets all users from the database.
+        Streams all user rows, optionally filtered and paginated by id.
+
+        Args:
+            fields (list[str], optional): The columns to return. Defaults to all columns.
+            filters (dict, optional): Column -> value pairs to match (e.g. {'user_name': 'janedoe'}).
+            after (int, optional): Only return rows with an id greater than this.
+            limit (int, optional): The maximum number of rows to return.
 
         Returns:
-            list[sqlite3.Row]: A list of all user rows.
-        """
+            Iterator[sqlite3.Row]: The user rows, ordered by id.
 
-        connection = self.get_db()
-        rows = connection.execute("SELECT * FROM users").fetchall()
-        connection.close()
-        return rows
+        Raises:
+            ValueError: If a field or filter isn't a column of the table.
+        """
+        return list_rows(self.get_db(), "users", fields, filters, after, limit)
     
     def verify_user(self, username, password):
         """
@@ -122,20 +128,19 @@ class Users:
 
         Returns:
             tuple: (bool, int or None). True and user ID if credentials are correct, otherwise False and None.
+
+        Raises:
+            HasherBusy: If the password hashing pool is overloaded.
         """
         
-        connection = self.get_db()
-        row = connection.execute("SELECT user_password, id FROM users WHERE user_name = ?", (username,)).fetchone()
-        connection.close()
+        with get_pool(self.db_name).connection() as connection:
+            row = connection.execute("SELECT user_password, id FROM users WHERE user_name = ?", (username,)).fetchone()
 
         if row is None:
             return False, None
-        stored_hash = row["user_password"]
-        if isinstance(stored_hash, str):
-            stored_hash = stored_hash.encode("utf-8")
 
         # return True is match, overwise False
-        if bcrypt.checkpw(password.encode("utf-8"), stored_hash):
+        if get_hasher().check(password, row["user_password"]):
             return True, row["id"]
         else:
             return False, None